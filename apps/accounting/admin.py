@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
-from .models import Transaction, Ledger, Account, FinancialReport
+from .models import Transaction, Ledger, Account, FinancialReport, SyncOutbox
 
 
 @admin.register(Transaction)
@@ -157,6 +157,17 @@ class FinancialReportAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('company', 'created_by')
 
 
+
+@admin.register(SyncOutbox)
+class SyncOutboxAdmin(admin.ModelAdmin):
+    list_display = ['source_app', 'reference_id', 'user', 'created_at']
+    list_filter = ['source_app', 'created_at']
+    search_fields = ['reference_id', 'user__email']
+    readonly_fields = ['created_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
 # Custom admin site configuration
 admin.site.site_header = "Business App Administration"
 admin.site.site_title = "Business App Admin"
@@ -7,5 +7,6 @@ class AccountingConfig(AppConfig):
     verbose_name = 'Accounting'
 
     def ready(self):
-        """Import signals when the app is ready"""
+        """Import signals and job handlers when the app is ready"""
         import apps.accounting.signals
+        import apps.accounting.jobs
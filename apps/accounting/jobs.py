@@ -0,0 +1,63 @@
+"""
+Background job handlers for financial reports.
+
+Registered from AccountingConfig.ready(); see apps.core.jobs.
+"""
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.exports import ExcelExport
+from apps.core.jobs import job_handler, response_content
+from .models import FinancialReport
+
+# Report data keys that describe how the report was built, not its figures
+REPORT_META_KEYS = {'date_adjusted', 'original_period', 'adjusted_period', 'debug_info'}
+
+
+@job_handler('accounting.financial_report')
+def build_financial_report(job):
+    """Calculate a FinancialReport's data and store it as PDF and Excel files"""
+    from .views import build_report_data, generate_balance_sheet, generate_income_statement, render_report_pdf
+
+    report = FinancialReport.objects.select_related('company').get(
+        pk=job.payload['report_id'], created_by=job.user
+    )
+    company = report.company
+
+    # Generate report data based on type
+    job.set_progress(10, 'Calculating report figures')
+    if report.report_type == 'income_statement':
+        report.report_data = generate_income_statement(company, report.start_date, report.end_date)
+    elif report.report_type == 'balance_sheet':
+        report.report_data = generate_balance_sheet(company, report.end_date)
+    report.save(update_fields=['report_data'])
+
+    report_data = build_report_data(report, company)
+    file_name = f'{report.title}_{timezone.now().strftime("%Y%m%d")}'
+
+    job.set_progress(40, 'Writing PDF')
+    report.pdf_file.save(f'{file_name}.pdf', ContentFile(render_report_pdf(report, company, report_data)), save=False)
+
+    job.set_progress(70, 'Writing Excel workbook')
+    excel = ExcelExport(report.get_report_type_display(), header_color='366092')
+    excel.set_widths([30, 25])
+    excel.add_branding(company, f'{report.title} - {report.start_date} to {report.end_date}')
+    excel.add_header(['Item', 'Value'])
+    excel.add_rows(
+        (
+            [key.replace('_', ' ').title(), value]
+            for key, value in report_data.items()
+            if key not in REPORT_META_KEYS
+        ),
+        striped=True,
+    )
+    report.excel_file.save(f'{file_name}.xlsx', ContentFile(b''.join(response_content(excel.response(file_name)))), save=False)
+    report.save(update_fields=['pdf_file', 'excel_file'])
+
+    return {
+        'report_id': report.pk,
+        'redirect_url': reverse('accounting:view_report', kwargs={'report_id': report.pk}),
+        'message': f"Report '{report.title}' generated successfully.",
+    }
+
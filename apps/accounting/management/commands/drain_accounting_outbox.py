@@ -0,0 +1,38 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from apps.accounting.sync import SYNC_BATCH_SIZE, drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Post the invoices and receipts queued in the accounting sync outbox as transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Drain only for specific user ID')
+        parser.add_argument('--batch-size', type=int, default=SYNC_BATCH_SIZE, help='Outbox entries handled per database transaction')
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep running and drain again after this many seconds (0 drains once and exits)'
+        )
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.get(pk=options['user']) if options['user'] else None
+        batch_size = max(options['batch_size'], 1)
+
+        try:
+            while True:
+                started = time.monotonic()
+                drained, created = drain_outbox(user=user, batch_size=batch_size)
+                if drained or not options['interval']:
+                    self.stdout.write(
+                        self.style.SUCCESS(
+                            f'Drained {drained} outbox entries into {created} transactions '
+                            f'in {time.monotonic() - started:.1f}s'
+                        )
+                    )
+                if not options['interval']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Interrupted')
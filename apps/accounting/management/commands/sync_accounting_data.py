@@ -1,8 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
 from apps.accounting.models import Transaction
-from apps.invoices.models import Invoice
-from apps.receipts.models import Receipt
+from apps.accounting.sync import sync_source
 from apps.job_orders.models import JobOrder
 from apps.waybills.models import Waybill
 # from apps.expenses.models import Expense  # Commented out until Expense model is created
@@ -23,7 +22,8 @@ class Command(BaseCommand):
         parser.add_argument(
             '--force',
             action='store_true',
-            help='Force sync even if transactions already exist',
+            help='Force sync even if transactions already exist (job orders and waybills; '
+                 'invoices and receipts are never synced twice)',
         )
 
     def handle(self, *args, **options):
@@ -34,28 +34,30 @@ class Command(BaseCommand):
         app_to_sync = options.get('app')
         force = options.get('force')
 
-        if app_to_sync:
-            if app_to_sync == 'invoices':
+        # One ledger update per month for the whole sync instead of one per transaction
+        with Transaction.deferred_ledger():
+            if app_to_sync:
+                if app_to_sync == 'invoices':
+                    self.sync_invoices(force)
+                elif app_to_sync == 'receipts':
+                    self.sync_receipts(force)
+                elif app_to_sync == 'job_orders':
+                    self.sync_job_orders(force)
+                elif app_to_sync == 'waybills':
+                    self.sync_waybills(force)
+                elif app_to_sync == 'expenses':
+                    self.sync_expenses(force)
+                else:
+                    self.stdout.write(
+                        self.style.ERROR(f'Unknown app: {app_to_sync}')
+                    )
+            else:
+                # Sync all apps
                 self.sync_invoices(force)
-            elif app_to_sync == 'receipts':
                 self.sync_receipts(force)
-            elif app_to_sync == 'job_orders':
                 self.sync_job_orders(force)
-            elif app_to_sync == 'waybills':
                 self.sync_waybills(force)
-            elif app_to_sync == 'expenses':
-                self.sync_expenses(force)
-            else:
-                self.stdout.write(
-                    self.style.ERROR(f'Unknown app: {app_to_sync}')
-                )
-        else:
-            # Sync all apps
-            self.sync_invoices(force)
-            self.sync_receipts(force)
-            self.sync_job_orders(force)
-            self.sync_waybills(force)
-            # self.sync_expenses(force)  # Commented out until Expense model is created
+                # self.sync_expenses(force)  # Commented out until Expense model is created
 
         self.stdout.write(
             self.style.SUCCESS('Accounting data sync completed!')
@@ -65,42 +67,9 @@ class Command(BaseCommand):
         """Sync paid invoices to accounting transactions"""
         self.stdout.write('Syncing invoices...')
         
-        paid_invoices = Invoice.objects.filter(status='paid')
-        synced_count = 0
-        
-        for invoice in paid_invoices:
-            if not force:
-                # Check if transaction already exists
-                existing = Transaction.objects.filter(
-                    source_app='invoice',
-                    reference_id=str(invoice.id)
-                ).first()
-                
-                if existing:
-                    continue
-            
-            try:
-                Transaction.objects.create(
-                    user=invoice.user,
-                    company=invoice.user.company_profile,
-                    type='income',
-                    title=f"Invoice Payment - {invoice.invoice_number}",
-                    description=f"Payment for invoice {invoice.invoice_number} from {invoice.client_name}",
-                    amount=invoice.grand_total,
-                    currency=invoice.user.company_profile.currency_symbol,
-                    tax=invoice.total_tax,
-                    discount=invoice.total_discount,
-                    source_app='invoice',
-                    reference_id=str(invoice.id),
-                    reference_model='Invoice',
-                    transaction_date=invoice.updated_at.date(),
-                    notes=f"Auto-synced from paid invoice {invoice.invoice_number}"
-                )
-                synced_count += 1
-            except Exception as e:
-                self.stdout.write(
-                    self.style.WARNING(f'Error syncing invoice {invoice.id}: {e}')
-                )
+        # Set-based: one anti-join finds the unsynced invoices, which can never
+        # be synced twice, so --force changes nothing here
+        synced_count, _ = sync_source('invoice')
         
         self.stdout.write(
             self.style.SUCCESS(f'Synced {synced_count} invoices')
@@ -110,40 +79,7 @@ class Command(BaseCommand):
         """Sync receipts to accounting transactions"""
         self.stdout.write('Syncing receipts...')
         
-        receipts = Receipt.objects.all()
-        synced_count = 0
-        
-        for receipt in receipts:
-            if not force:
-                # Check if transaction already exists
-                existing = Transaction.objects.filter(
-                    source_app='receipt',
-                    reference_id=str(receipt.id)
-                ).first()
-                
-                if existing:
-                    continue
-            
-            try:
-                Transaction.objects.create(
-                    user=receipt.created_by,
-                    company=receipt.created_by.company_profile,
-                    type='income',
-                    title=f"Receipt Payment - {receipt.receipt_no}",
-                    description=f"Payment receipt {receipt.receipt_no} from {receipt.client_name}",
-                    amount=receipt.amount_received,
-                    currency=receipt.created_by.company_profile.currency_symbol,
-                    source_app='receipt',
-                    reference_id=str(receipt.id),
-                    reference_model='Receipt',
-                    transaction_date=receipt.date_received,
-                    notes=f"Auto-synced from receipt {receipt.receipt_no}"
-                )
-                synced_count += 1
-            except Exception as e:
-                self.stdout.write(
-                    self.style.WARNING(f'Error syncing receipt {receipt.id}: {e}')
-                )
+        synced_count, _ = sync_source('receipt')
         
         self.stdout.write(
             self.style.SUCCESS(f'Synced {synced_count} receipts')
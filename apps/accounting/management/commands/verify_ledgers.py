@@ -0,0 +1,77 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from apps.accounting.models import Ledger
+
+
+class Command(BaseCommand):
+    help = (
+        'Check the monthly ledgers against a full GROUP BY of the transactions and '
+        'report months that drifted; --fix rewrites them'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, help='Check only for specific company profile ID')
+        parser.add_argument('--fix', action='store_true', help='Rewrite wrong ledgers and create missing ones')
+
+    def handle(self, *args, **options):
+        company_ids = [options['company']] if options['company'] else None
+        expected = Ledger.expected_totals(company_ids=company_ids)
+
+        ledgers = Ledger.objects.all()
+        if company_ids:
+            ledgers = ledgers.filter(company_id__in=company_ids)
+
+        zero = (Decimal('0'), Decimal('0'))
+        wrong = []
+        checked = 0
+        for ledger in ledgers.iterator():
+            checked += 1
+            key = (ledger.company_id, ledger.year, ledger.month)
+            income, expense = expected.pop(key, zero)
+            if (ledger.total_income, ledger.total_expense, ledger.net_profit) != (income, expense, income - expense):
+                self.stdout.write(
+                    f'Company {ledger.company_id} {ledger.year}/{ledger.month:02d}: '
+                    f'income {ledger.total_income} (expected {income}), '
+                    f'expense {ledger.total_expense} (expected {expense})'
+                )
+                ledger.total_income = income
+                ledger.total_expense = expense
+                ledger.net_profit = income - expense
+                ledger.updated_at = timezone.now()
+                wrong.append(ledger)
+
+        # Months with transactions but no ledger row
+        missing = [
+            Ledger(
+                company_id=company_id, year=year, month=month,
+                total_income=income, total_expense=expense, net_profit=income - expense
+            )
+            for (company_id, year, month), (income, expense) in expected.items()
+        ]
+        for ledger in missing:
+            self.stdout.write(f'Company {ledger.company_id} {ledger.year}/{ledger.month:02d}: no ledger')
+
+        if not wrong and not missing:
+            self.stdout.write(self.style.SUCCESS(f'All {checked} ledgers match their transactions'))
+            return
+
+        if not options['fix']:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{len(wrong)} of {checked} ledgers are wrong and {len(missing)} months have no ledger; '
+                    f'run with --fix to rewrite them'
+                )
+            )
+            return
+
+        with transaction.atomic():
+            Ledger.objects.bulk_update(
+                wrong, ['total_income', 'total_expense', 'net_profit', 'updated_at'], batch_size=500
+            )
+            Ledger.objects.bulk_create(missing, batch_size=500)
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully fixed {len(wrong)} ledgers and created {len(missing)}')
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['company', '-transaction_date', '-created_at'], name='accounting__company_6465be_idx'),
+        ),
+    ]
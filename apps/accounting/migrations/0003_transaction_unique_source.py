@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:02
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def remove_duplicate_source_transactions(apps, schema_editor):
+    """Keep the oldest transaction of each source document and rebuild the ledgers of the months that lose one"""
+    Transaction = apps.get_model('accounting', 'Transaction')
+    Ledger = apps.get_model('accounting', 'Ledger')
+
+    sourced = Transaction.objects.filter(reference_id__isnull=False).exclude(source_app='manual')
+    duplicated = (
+        sourced.values('company_id', 'source_app', 'reference_id')
+        .annotate(copies=Count('id'))
+        .filter(copies__gt=1)
+        .order_by()
+    )
+
+    months = set()
+    for group in duplicated.iterator():
+        copies = list(
+            sourced.filter(
+                company_id=group['company_id'], source_app=group['source_app'], reference_id=group['reference_id']
+            ).order_by('created_at', 'pk')
+        )
+        for extra in copies[1:]:
+            months.add((extra.company_id, extra.transaction_date.year, extra.transaction_date.month))
+            extra.delete()
+
+    for company_id, year, month in months:
+        totals = Transaction.objects.filter(
+            company_id=company_id, transaction_date__year=year, transaction_date__month=month, is_void=False
+        ).aggregate(
+            income=Sum('net_amount', filter=Q(type='income')),
+            expense=Sum('net_amount', filter=Q(type='expense')),
+        )
+        income = totals['income'] or Decimal('0')
+        expense = totals['expense'] or Decimal('0')
+        Ledger.objects.filter(company_id=company_id, year=year, month=month).update(
+            total_income=income, total_expense=expense, net_profit=income - expense
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounting', '0002_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_source_transactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('reference_id__isnull', False), models.Q(('source_app', 'manual'), _negated=True)), fields=('company', 'source_app', 'reference_id'), name='accounting_transaction_unique_source'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accounting', '0003_transaction_unique_source'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_app', models.CharField(choices=[('manual', 'Manual Entry'), ('invoice', 'Invoice'), ('receipt', 'Receipt'), ('job_order', 'Job Order'), ('waybill', 'Waybill'), ('inventory', 'Inventory'), ('expense', 'Expense Tracker')], max_length=20)),
+                ('reference_id', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='accounting_outbox', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Sync Outbox Entry',
+                'verbose_name_plural': 'Sync Outbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['user', 'id'], name='accounting__user_id_1c646e_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='syncoutbox',
+            constraint=models.UniqueConstraint(fields=('source_app', 'reference_id'), name='accounting_outbox_unique_source'),
+        ),
+    ]
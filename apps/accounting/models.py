@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth import get_user_model
-from django.db.models import Sum, Q
+from django.db.models import F, Sum, Q
+from django.db.models.functions import ExtractMonth, ExtractYear
 from django.utils import timezone
+from contextlib import contextmanager
 from decimal import Decimal
+import threading
 import uuid
 
 User = get_user_model()
@@ -62,58 +65,138 @@ class Transaction(models.Model):
         indexes = [
             models.Index(fields=['user', 'type']),
             models.Index(fields=['company', 'transaction_date']),
+            models.Index(fields=['company', '-transaction_date', '-created_at']),
             models.Index(fields=['source_app', 'reference_id']),
             models.Index(fields=['type', 'transaction_date']),
         ]
+        constraints = [
+            # One transaction per source document, so syncs can insert blindly
+            models.UniqueConstraint(
+                fields=['company', 'source_app', 'reference_id'],
+                condition=Q(reference_id__isnull=False) & ~Q(source_app='manual'),
+                name='accounting_transaction_unique_source',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.type}) - {self.amount} {self.currency}"
     
-    def save(self, *args, **kwargs):
-        # Calculate net amount
+    # Fields that feed ledger_contribution(); loaded values are snapshotted so
+    # a save or delete can move the ledgers by the difference
+    LEDGER_FIELDS = ('company_id', 'type', 'net_amount', 'transaction_date', 'is_void')
+    
+    # Per-thread ledger deltas collected by deferred_ledger() blocks
+    _ledger_state = threading.local()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not set(cls.LEDGER_FIELDS) & instance.get_deferred_fields():
+            instance._ledger_snapshot = instance.ledger_contribution()
+        return instance
+    
+    def calculate_net_amount(self):
+        """Amount plus tax less discount; bulk writes call it since they skip save()"""
         self.net_amount = self.amount
         if self.tax:
             self.net_amount += self.tax
         if self.discount:
             self.net_amount -= self.discount
+    
+    def save(self, *args, **kwargs):
+        self.calculate_net_amount()
         
-        super().save(*args, **kwargs)
+        # The ledger moves in the same database transaction as the write
+        with transaction.atomic():
+            if self._state.adding:
+                old = None
+            elif hasattr(self, '_ledger_snapshot'):
+                old = self._ledger_snapshot
+            else:
+                # Loaded with ledger fields deferred, or an existing row built by hand
+                old = self.stored_ledger_contribution(self.pk)
+            super().save(*args, **kwargs)
+            new = self.ledger_contribution()
+            self.record_ledger_change(old, new)
+        self._ledger_snapshot = new
+    
+    @staticmethod
+    def cache_namespace(company_id) -> str:
+        """Versioned cache namespace of everything derived from a company's transactions"""
+        return f'accounting:company:{company_id}'
+    
+    def ledger_contribution(self):
+        """
+        What this transaction adds to the monthly ledgers.
         
-        # Update ledger
-        self.update_ledger()
-    
-    def update_ledger(self):
-        """Update the ledger for this transaction's month/year"""
-        if not self.is_void:
-            ledger, created = Ledger.objects.get_or_create(
-                company=self.company,
-                year=self.transaction_date.year,
-                month=self.transaction_date.month,
-                defaults={
-                    'total_income': 0,
-                    'total_expense': 0,
-                    'net_profit': 0
-                }
-            )
-            
-            # Recalculate totals for this month
-            transactions = Transaction.objects.filter(
-                company=self.company,
-                transaction_date__year=self.transaction_date.year,
-                transaction_date__month=self.transaction_date.month,
-                is_void=False
-            )
-            
-            ledger.total_income = transactions.filter(type='income').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            ledger.total_expense = transactions.filter(type='expense').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            ledger.net_profit = ledger.total_income - ledger.total_expense
-            ledger.save()
+        Returns:
+            ((company id, year, month), income, expense), or None when void
+        """
+        if self.is_void or not self.company_id:
+            return None
+        amount = self.net_amount or Decimal('0')
+        month = (self.company_id, self.transaction_date.year, self.transaction_date.month)
+        if self.type == 'income':
+            return month, amount, Decimal('0')
+        return month, Decimal('0'), amount
+    
+    @classmethod
+    def stored_ledger_contribution(cls, pk):
+        """ledger_contribution() of a transaction as currently stored, or None if there is no such row"""
+        row = cls.objects.filter(pk=pk).values(*cls.LEDGER_FIELDS).first()
+        return cls(**row).ledger_contribution() if row else None
+    
+    @staticmethod
+    def add_ledger_delta(deltas, contribution, sign=1) -> None:
+        """Add (sign = 1) or take away (sign = -1) a contribution in a {month: [income, expense]} dict"""
+        if contribution is None:
+            return
+        month, income, expense = contribution
+        totals = deltas.setdefault(month, [Decimal('0'), Decimal('0')])
+        totals[0] += sign * income
+        totals[1] += sign * expense
+    
+    @classmethod
+    def record_ledger_change(cls, old, new) -> None:
+        """Move the ledgers from contribution ``old`` to ``new``; either may be None"""
+        if old == new:
+            return
+        deltas = {}
+        cls.add_ledger_delta(deltas, old, -1)
+        cls.add_ledger_delta(deltas, new, 1)
+        cls.record_ledger_deltas(deltas)
+    
+    @classmethod
+    def record_ledger_deltas(cls, deltas) -> None:
+        """Apply {month: [income, expense]} deltas now, or at the end of the enclosing deferred_ledger() block"""
+        pending = getattr(cls._ledger_state, 'pending', None)
+        if pending is None:
+            Ledger.apply_deltas(deltas)
+            return
+        for month, (income, expense) in deltas.items():
+            totals = pending.setdefault(month, [Decimal('0'), Decimal('0')])
+            totals[0] += income
+            totals[1] += expense
+    
+    @classmethod
+    @contextmanager
+    def deferred_ledger(cls):
+        """
+        Collect the ledger deltas of every save and delete in the block and
+        apply one aggregated delta per month when it ends. Wrap the block in
+        transaction.atomic() to keep the writes and the ledgers together.
+        """
+        if getattr(cls._ledger_state, 'pending', None) is not None:
+            # Nested: the outermost block applies everything
+            yield
+            return
+        cls._ledger_state.pending = {}
+        try:
+            yield
+            deltas = cls._ledger_state.pending
+        finally:
+            cls._ledger_state.pending = None
+        Ledger.apply_deltas(deltas)
 
 
 class Ledger(models.Model):
@@ -145,28 +228,143 @@ class Ledger(models.Model):
     def __str__(self):
         return f"{self.company.company_name} - {self.year}/{self.month:02d}"
     
+    @classmethod
+    def apply_deltas(cls, deltas) -> None:
+        """
+        Add {(company id, year, month): (income, expense)} deltas to the
+        ledgers with atomic F() updates, so concurrent writers never lose
+        each other's amounts. A month without a ledger yet is created from
+        its transactions, which already include the change.
+        """
+        with transaction.atomic():
+            for (company_id, year, month), (income, expense) in sorted(deltas.items()):
+                if not income and not expense:
+                    continue
+                rows = cls.objects.filter(company_id=company_id, year=year, month=month)
+                changes = {
+                    'total_income': F('total_income') + income,
+                    'total_expense': F('total_expense') + expense,
+                    'net_profit': F('net_profit') + (income - expense),
+                    'updated_at': timezone.now(),
+                }
+                if rows.update(**changes):
+                    continue
+                
+                totals = cls.expected_totals(company_ids=[company_id], year=year, month=month)
+                total_income, total_expense = totals.get((company_id, year, month), (Decimal('0'), Decimal('0')))
+                try:
+                    with transaction.atomic():
+                        cls.objects.create(
+                            company_id=company_id, year=year, month=month,
+                            total_income=total_income, total_expense=total_expense,
+                            net_profit=total_income - total_expense
+                        )
+                except IntegrityError:
+                    # Another writer created the month since the update
+                    rows.update(**changes)
+    
+    @classmethod
+    def backfill(cls, company) -> int:
+        """
+        Create the ledgers missing for a company's months, from one GROUP BY
+        over its transactions and one bulk insert. Months that already have a
+        ledger are left to the deltas (and verify_ledgers).
+        
+        Returns:
+            Number of ledgers created
+        """
+        existing = set(cls.objects.filter(company=company).values_list('year', 'month'))
+        missing = [
+            cls(
+                company=company, year=year, month=month,
+                total_income=income, total_expense=expense, net_profit=income - expense
+            )
+            for (_, year, month), (income, expense) in cls.expected_totals(company_ids=[company.pk]).items()
+            if (year, month) not in existing
+        ]
+        # A concurrent delta may create a month first; its row wins
+        cls.objects.bulk_create(missing, ignore_conflicts=True)
+        return len(missing)
+    
+    @staticmethod
+    def recent_months(count=12, today=None):
+        """(year, month) of the last ``count`` calendar months, oldest first, ending with the current one"""
+        today = today or timezone.localdate()
+        last = today.year * 12 + today.month - 1
+        return [(index // 12, index % 12 + 1) for index in range(last - count + 1, last + 1)]
+    
+    @classmethod
+    def for_months(cls, company, months) -> dict:
+        """A company's ledgers for a run of (year, month) pairs, keyed by them, from one ranged read"""
+        (first_year, first_month), (last_year, last_month) = months[0], months[-1]
+        ledgers = cls.objects.filter(company=company).filter(
+            Q(year__gt=first_year) | Q(year=first_year, month__gte=first_month)
+        ).filter(
+            Q(year__lt=last_year) | Q(year=last_year, month__lte=last_month)
+        )
+        return {(ledger.year, ledger.month): ledger for ledger in ledgers}
+    
+    @classmethod
+    def expected_totals(cls, company_ids=None, year=None, month=None) -> dict:
+        """
+        Income and expense of every month straight from the transactions, in one GROUP BY.
+        
+        Returns:
+            Dict of (company id, year, month) to (total income, total expense)
+        """
+        transactions = Transaction.objects.filter(is_void=False)
+        if company_ids is not None:
+            transactions = transactions.filter(company_id__in=company_ids)
+        if year is not None:
+            transactions = transactions.filter(transaction_date__year=year)
+        if month is not None:
+            transactions = transactions.filter(transaction_date__month=month)
+        
+        rows = (
+            transactions
+            .annotate(year=ExtractYear('transaction_date'), month=ExtractMonth('transaction_date'))
+            .values('company_id', 'year', 'month')
+            .annotate(
+                income=Sum('net_amount', filter=Q(type='income')),
+                expense=Sum('net_amount', filter=Q(type='expense')),
+            )
+            .order_by()
+        )
+        return {
+            (row['company_id'], row['year'], row['month']): (row['income'] or Decimal('0'), row['expense'] or Decimal('0'))
+            for row in rows
+        }
+    
     @property
     def month_name(self):
         """Get month name"""
         from datetime import datetime
         return datetime(self.year, self.month, 1).strftime('%B')
     
-    def update_outstanding_amounts(self):
-        """Update outstanding invoices and pending receipts"""
+    def update_outstanding_amounts(self, outstanding=None):
+        """
+        Update outstanding invoices and pending receipts, writing only when
+        they changed. The write is a plain UPDATE: cached dashboards take
+        invoice balances from the invoice cache namespace, so it must not
+        invalidate them the way a ledger save does.
+        """
         from apps.invoices.models import Invoice
-        from apps.receipts.models import Receipt
         
         # Outstanding invoices
-        outstanding = Invoice.objects.filter(
-            user=self.company.user,
-            status__in=['unpaid', 'partial']
-        ).aggregate(total=Sum('balance_due'))['total'] or 0
-        self.outstanding_invoices = outstanding
+        if outstanding is None:
+            outstanding = Invoice.objects.filter(
+                user=self.company.user,
+                status__in=['unpaid', 'partial']
+            ).aggregate(total=Sum('balance_due'))['total'] or 0
         
         # Pending receipts (if any logic needed)
-        self.pending_receipts = 0
-        
-        self.save()
+        if self.outstanding_invoices != outstanding or self.pending_receipts != 0:
+            self.outstanding_invoices = outstanding
+            self.pending_receipts = 0
+            self.updated_at = timezone.now()
+            Ledger.objects.filter(pk=self.pk).update(
+                outstanding_invoices=outstanding, pending_receipts=0, updated_at=self.updated_at
+            )
 
 
 class Account(models.Model):
@@ -253,3 +451,38 @@ class FinancialReport(models.Model):
     
     def __str__(self):
         return f"{self.title} - {self.start_date} to {self.end_date}"
+
+
+class SyncOutbox(models.Model):
+    """
+    A source document (paid invoice, new receipt) waiting to be posted as a
+    Transaction. Saves of those documents only insert a row here, in their
+    own database transaction; sync.drain_outbox() does the accounting work
+    in batches. One pending row per document.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='accounting_outbox')
+    source_app = models.CharField(max_length=20, choices=Transaction.SOURCE_APP_CHOICES)
+    reference_id = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Sync Outbox Entry'
+        verbose_name_plural = 'Sync Outbox'
+        constraints = [
+            models.UniqueConstraint(fields=['source_app', 'reference_id'], name='accounting_outbox_unique_source'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_source_app_display()} {self.reference_id}"
+    
+    @classmethod
+    def record(cls, user_id, source_app, reference_id) -> None:
+        """Queue a document with a single INSERT; one already pending is left as it is"""
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, source_app=source_app, reference_id=str(reference_id))],
+            ignore_conflicts=True,
+        )
@@ -1,11 +1,11 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Transaction
+from apps.core.caching import bump_versions
+from .models import Ledger, SyncOutbox, Transaction
+from .sync import schedule_drain
 from apps.invoices.models import Invoice
 from apps.receipts.models import Receipt
-from apps.job_orders.models import JobOrder
-from apps.waybills.models import Waybill
 # from apps.expenses.models import Expense  # Commented out until Expense model is created
 from decimal import Decimal
 
@@ -13,117 +13,25 @@ User = get_user_model()
 
 
 @receiver(post_save, sender=Invoice)
-def sync_invoice_to_accounting(sender, instance, created, **kwargs):
-    """Sync invoice payments to accounting transactions"""
-    if instance.status == 'paid' and instance.grand_total > 0:
-        # Check if transaction already exists
-        existing_transaction = Transaction.objects.filter(
-            source_app='invoice',
-            reference_id=str(instance.id)
-        ).first()
-        
-        if not existing_transaction:
-            # Create income transaction for paid invoice
-            Transaction.objects.create(
-                user=instance.user,
-                company=instance.user.company_profile,
-                type='income',
-                title=f"Invoice Payment - {instance.invoice_number}",
-                description=f"Payment for invoice {instance.invoice_number} from {instance.client_name}",
-                amount=instance.grand_total,
-                currency=instance.user.company_profile.currency_symbol,
-                tax=instance.total_tax,
-                discount=instance.total_discount,
-                source_app='invoice',
-                reference_id=str(instance.id),
-                reference_model='Invoice',
-                transaction_date=instance.updated_at.date(),
-                notes=f"Auto-synced from paid invoice {instance.invoice_number}"
-            )
+def sync_invoice_to_accounting(sender, instance, created, raw=False, **kwargs):
+    """Queue an invoice for accounting when it becomes paid; it is posted after the save commits"""
+    became_paid = created or getattr(instance, '_loaded_status', None) != 'paid'
+    if not raw and instance.status == 'paid' and instance.grand_total > 0 and became_paid:
+        SyncOutbox.record(instance.user_id, 'invoice', instance.pk)
+        schedule_drain(instance.user_id)
+    instance._loaded_status = instance.status
 
 
 @receiver(post_save, sender=Receipt)
-def sync_receipt_to_accounting(sender, instance, created, **kwargs):
-    """Sync receipt payments to accounting transactions"""
-    if created and instance.amount_received > 0:
-        # Check if transaction already exists
-        existing_transaction = Transaction.objects.filter(
-            source_app='receipt',
-            reference_id=str(instance.id)
-        ).first()
-        
-        if not existing_transaction:
-            # Create income transaction for receipt
-            Transaction.objects.create(
-                user=instance.created_by,
-                company=instance.created_by.company_profile,
-                type='income',
-                title=f"Receipt Payment - {instance.receipt_no}",
-                description=f"Payment receipt {instance.receipt_no} from {instance.client_name}",
-                amount=instance.amount_received,
-                currency=instance.created_by.company_profile.currency_symbol,
-                source_app='receipt',
-                reference_id=str(instance.id),
-                reference_model='Receipt',
-                transaction_date=instance.date_received,
-                notes=f"Auto-synced from receipt {instance.receipt_no}"
-            )
-
-
-@receiver(post_save, sender=JobOrder)
-def sync_job_order_to_accounting(sender, instance, created, **kwargs):
-    """Sync job order costs to accounting transactions"""
-    if instance.status == 'completed' and instance.total_cost > 0:
-        # Check if transaction already exists
-        existing_transaction = Transaction.objects.filter(
-            source_app='job_order',
-            reference_id=str(instance.id)
-        ).first()
-        
-        if not existing_transaction:
-            # Create expense transaction for job order costs
-            Transaction.objects.create(
-                user=instance.created_by,
-                company=instance.created_by.company_profile,
-                type='expense',
-                title=f"Job Order Cost - {instance.job_number}",
-                description=f"Cost for completed job order {instance.job_number}",
-                amount=instance.total_cost,
-                currency=instance.created_by.company_profile.currency_symbol,
-                source_app='job_order',
-                reference_id=str(instance.id),
-                reference_model='JobOrder',
-                transaction_date=instance.completed_date or instance.created_at.date(),
-                notes=f"Auto-synced from completed job order {instance.job_number}"
-            )
-
-
-@receiver(post_save, sender=Waybill)
-def sync_waybill_to_accounting(sender, instance, created, **kwargs):
-    """Sync waybill charges to accounting transactions"""
-    if instance.status == 'delivered' and instance.total_amount > 0:
-        # Check if transaction already exists
-        existing_transaction = Transaction.objects.filter(
-            source_app='waybill',
-            reference_id=str(instance.id)
-        ).first()
-        
-        if not existing_transaction:
-            # Create income transaction for waybill charges
-            Transaction.objects.create(
-                user=instance.created_by,
-                company=instance.created_by.company_profile,
-                type='income',
-                title=f"Waybill Charges - {instance.waybill_number}",
-                description=f"Charges for delivered waybill {instance.waybill_number}",
-                amount=instance.total_amount,
-                currency=instance.created_by.company_profile.currency_symbol,
-                source_app='waybill',
-                reference_id=str(instance.id),
-                reference_model='Waybill',
-                transaction_date=instance.delivery_date or instance.created_at.date(),
-                notes=f"Auto-synced from delivered waybill {instance.waybill_number}"
-            )
+def sync_receipt_to_accounting(sender, instance, created, raw=False, **kwargs):
+    """Queue a new receipt for accounting; it is posted after the save commits"""
+    if not raw and created and instance.amount_received > 0 and instance.created_by_id:
+        SyncOutbox.record(instance.created_by_id, 'receipt', instance.pk)
+        schedule_drain(instance.created_by_id)
+
+
+# Job orders and waybills have no receivers: neither model has an amount to
+# post, and job orders have no completed status.
 
 
 # @receiver(post_save, sender=Expense)
@@ -154,40 +62,37 @@ def sync_waybill_to_accounting(sender, instance, created, **kwargs):
 #             )
 
 
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Ledger)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Ledger)
+def invalidate_transaction_cache(sender, instance, **kwargs):
+    """Bump the company's transaction version so ledger backfills and cached summaries rerun"""
+    bump_versions(Transaction.cache_namespace(instance.company_id))
+
+
+@receiver(post_save, sender=Invoice)
+@receiver(post_delete, sender=Invoice)
+def invalidate_invoice_cache(sender, instance, **kwargs):
+    """Bump the user's invoice version so cached outstanding balances are recomputed"""
+    bump_versions(Invoice.cache_namespace(instance.user_id))
+
+
+@receiver(pre_delete, sender=Transaction)
+def snapshot_transaction_before_deletion(sender, instance, **kwargs):
+    """
+    Load the stored ledger fields of a transaction that has no snapshot, so
+    the post_delete receivers never read deferred fields of a deleted row.
+    """
+    if not hasattr(instance, '_ledger_snapshot'):
+        instance.refresh_from_db(fields=Transaction.LEDGER_FIELDS)
+        instance._ledger_snapshot = instance.ledger_contribution()
+
+
 @receiver(post_delete, sender=Transaction)
 def handle_transaction_deletion(sender, instance, **kwargs):
-    """Handle transaction deletion by updating ledgers"""
-    if not instance.is_void:
-        # Update the ledger for the deleted transaction's month/year
-        from .models import Ledger
-        
-        ledger = Ledger.objects.filter(
-            company=instance.company,
-            year=instance.transaction_date.year,
-            month=instance.transaction_date.month
-        ).first()
-        
-        if ledger:
-            # Recalculate totals for this month
-            transactions = Transaction.objects.filter(
-                company=instance.company,
-                transaction_date__year=instance.transaction_date.year,
-                transaction_date__month=instance.transaction_date.month,
-                is_void=False
-            )
-            
-            from django.db.models import Sum
-            
-            ledger.total_income = transactions.filter(type='income').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            ledger.total_expense = transactions.filter(type='expense').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            ledger.net_profit = ledger.total_income - ledger.total_expense
-            ledger.save()
+    """Take the deleted transaction back out of its month's ledger"""
+    Transaction.record_ledger_change(instance._ledger_snapshot, None)
 
 
 # Import signals when the app is ready
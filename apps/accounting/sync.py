@@ -0,0 +1,223 @@
+"""
+Set-based sync of paid invoices and receipts into accounting transactions.
+
+Source rows without a transaction are found with one anti-join (NOT EXISTS
+on company, source app and reference id, the columns of the unique
+constraint on Transaction). Their transactions are built in memory and
+written in batches with bulk_create(ignore_conflicts=True), so a row that a
+concurrent sync or drain inserted first is skipped rather than duplicated.
+The ledgers move by one delta per affected month, and each touched
+company's cache version is bumped once.
+
+Invoice and receipt saves only queue the document in SyncOutbox;
+drain_outbox() posts the queued documents through the same path, right
+after the saving transaction commits (schedule_drain()) and from the
+drain_accounting_outbox worker.
+"""
+import traceback
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Exists, OuterRef, Q
+from django.db.models.functions import Cast
+
+from apps.core.caching import bump_versions
+
+from .models import SyncOutbox, Transaction
+
+SYNC_BATCH_SIZE = 1000
+
+
+def invoice_transaction(invoice, company):
+    return Transaction(
+        user_id=invoice.user_id,
+        company=company,
+        type='income',
+        title=f"Invoice Payment - {invoice.invoice_number}",
+        description=f"Payment for invoice {invoice.invoice_number} from {invoice.client_name}",
+        amount=invoice.grand_total,
+        currency=company.currency_symbol,
+        tax=invoice.total_tax,
+        discount=invoice.total_discount,
+        source_app='invoice',
+        reference_id=str(invoice.id),
+        reference_model='Invoice',
+        transaction_date=invoice.updated_at.date(),
+        notes=f"Auto-synced from paid invoice {invoice.invoice_number}"
+    )
+
+
+def receipt_transaction(receipt, company):
+    return Transaction(
+        user_id=receipt.created_by_id,
+        company=company,
+        type='income',
+        title=f"Receipt Payment - {receipt.receipt_no}",
+        description=f"Payment receipt {receipt.receipt_no} from {receipt.client_name}",
+        amount=receipt.amount_received,
+        currency=company.currency_symbol,
+        source_app='receipt',
+        reference_id=str(receipt.id),
+        reference_model='Receipt',
+        transaction_date=receipt.date_received,
+        notes=f"Auto-synced from receipt {receipt.receipt_no}"
+    )
+
+
+def paid_invoices():
+    from apps.invoices.models import Invoice
+    return Invoice.objects.filter(status='paid')
+
+
+def all_receipts():
+    from apps.receipts.models import Receipt
+    return Receipt.objects.all()
+
+
+# source_app: (source queryset, field of the owning user, transaction builder)
+SYNC_SOURCES = {
+    'invoice': (paid_invoices, 'user', invoice_transaction),
+    'receipt': (all_receipts, 'created_by', receipt_transaction),
+}
+
+
+def unsynced_rows(source_app, user=None):
+    """Source rows of ``source_app`` whose company has no transaction for them yet"""
+    source, user_field, _ = SYNC_SOURCES[source_app]
+    synced = Transaction.objects.filter(
+        # Repeating the constraint's condition lets SQLite use its partial index
+        Q(reference_id__isnull=False) & ~Q(source_app='manual'),
+        company_id=OuterRef(f'{user_field}__company_profile__id'),
+        source_app=source_app,
+        reference_id=Cast(OuterRef('pk'), CharField()),
+    )
+    rows = source().filter(**{f'{user_field}__company_profile__isnull': False})
+    if user is not None:
+        rows = rows.filter(**{user_field: user})
+    return rows.filter(~Exists(synced)).select_related(f'{user_field}__company_profile').order_by('pk')
+
+
+def sync_rows(source_app, rows, batch_size=SYNC_BATCH_SIZE):
+    """
+    Create the transactions of unsynced source rows.
+
+    Args:
+        source_app: Key of SYNC_SOURCES
+        rows: Queryset from unsynced_rows()
+        batch_size: Transactions written per INSERT
+
+    Returns:
+        Tuple of (transactions created, ids of the companies they belong to)
+    """
+    _, user_field, build = SYNC_SOURCES[source_app]
+    created = 0
+    company_ids = set()
+    
+    def write(batch):
+        nonlocal created
+        Transaction.objects.bulk_create(batch, ignore_conflicts=True)
+        # Rows skipped as conflicts were never inserted, so only the
+        # generated ids that exist now count
+        inserted = set(
+            Transaction.objects.filter(pk__in=[row.pk for row in batch]).values_list('pk', flat=True)
+        )
+        deltas = {}
+        for row in batch:
+            if row.pk in inserted:
+                Transaction.add_ledger_delta(deltas, row.ledger_contribution())
+                company_ids.add(row.company_id)
+        Transaction.record_ledger_deltas(deltas)
+        created += len(inserted)
+    
+    # The ledgers get one delta per month once every batch is in
+    with transaction.atomic(), Transaction.deferred_ledger():
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            company = getattr(row, user_field).company_profile
+            new = build(row, company)
+            new.calculate_net_amount()
+            batch.append(new)
+            if len(batch) >= batch_size:
+                write(batch)
+                batch = []
+        if batch:
+            write(batch)
+    
+    # bulk_create skips the post_save receivers that normally bump these
+    if company_ids:
+        bump_versions(*(Transaction.cache_namespace(company_id) for company_id in company_ids))
+    return created, company_ids
+
+
+def sync_source(source_app, user=None, batch_size=SYNC_BATCH_SIZE):
+    """Create every missing transaction of one source app; see sync_rows() for the return value"""
+    return sync_rows(source_app, unsynced_rows(source_app, user), batch_size)
+
+
+def sync_sources(source_apps=tuple(SYNC_SOURCES), user=None, batch_size=SYNC_BATCH_SIZE):
+    """Sync several source apps; returns {source app: transactions created}"""
+    return {
+        source_app: sync_source(source_app, user=user, batch_size=batch_size)[0]
+        for source_app in source_apps
+    }
+
+
+def drain_outbox(user=None, batch_size=SYNC_BATCH_SIZE):
+    """
+    Post the documents queued in SyncOutbox, one batch of entries at a time.
+    Entries are removed in the same database transaction as the postings
+    they produce, and documents that were already posted (or are no longer
+    paid) produce nothing.
+
+    Args:
+        user: Only drain this user's entries
+        batch_size: Entries handled per database transaction
+
+    Returns:
+        Tuple of (entries drained, transactions created)
+    """
+    entries = SyncOutbox.objects.order_by('pk')
+    if user is not None:
+        entries = entries.filter(user=user)
+    
+    drained = created = 0
+    while True:
+        with transaction.atomic():
+            batch = list(entries.select_for_update(skip_locked=True).values_list('pk', 'source_app', 'reference_id')[:batch_size])
+            if not batch:
+                break
+            references = defaultdict(list)
+            for _, source_app, reference_id in batch:
+                references[source_app].append(reference_id)
+            for source_app, reference_ids in references.items():
+                if source_app in SYNC_SOURCES:
+                    rows = unsynced_rows(source_app).filter(pk__in=reference_ids)
+                    created += sync_rows(source_app, rows, batch_size)[0]
+            SyncOutbox.objects.filter(pk__in=[pk for pk, _, _ in batch]).delete()
+        drained += len(batch)
+    return drained, created
+
+
+def schedule_drain(user_id) -> None:
+    """
+    Drain a user's outbox once the current database transaction commits, so
+    documents saved together are posted in one batch after their own write
+    is durable. Failures are left in the outbox for the next drain.
+    """
+    if not getattr(settings, 'ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS', True):
+        return
+    # Pending hooks are dropped on rollback, so this never outlives the transaction
+    hooks = transaction.get_connection().run_on_commit
+    if any(getattr(func, 'drains_user', None) == user_id for _, func, _ in hooks):
+        return
+    
+    def drain():
+        try:
+            drain_outbox(user=user_id)
+        except Exception:
+            print(f"❌ Accounting outbox drain for user {user_id} failed")
+            traceback.print_exc()
+    
+    drain.drains_user = user_id
+    transaction.on_commit(drain)
@@ -0,0 +1,246 @@
+import datetime
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from apps.core.models import CompanyProfile
+from apps.invoices.models import Invoice, InvoiceItem
+
+from .models import Ledger, SyncOutbox, Transaction
+from .sync import drain_outbox, sync_rows, sync_source, unsynced_rows
+
+User = get_user_model()
+
+
+class AccountingTestMixin:
+    def create_company(self, email='books@example.com'):
+        self.user = User.objects.create_user(
+            email=email, password='testpass123', first_name='Books', last_name='User'
+        )
+        self.company = CompanyProfile.objects.create(
+            user=self.user, company_name='Test Company', email=email,
+            phone='+1234567890', address='123 Test Street'
+        )
+
+    def create_paid_invoice(self, quantity=2, unit_price='50'):
+        invoice = Invoice.objects.create(user=self.user, client_name='Test Client')
+        InvoiceItem.objects.create(invoice=invoice, quantity=quantity, unit_price=Decimal(unit_price))
+        invoice.amount_paid = Decimal(quantity) * Decimal(unit_price)
+        invoice.save()
+        return invoice
+
+    def invoice_transactions(self, invoice):
+        return Transaction.objects.filter(company=self.company, source_app='invoice', reference_id=str(invoice.pk))
+
+
+class LedgerDeltaTest(AccountingTestMixin, TestCase):
+    """The monthly ledgers must match their transactions after every kind of edit"""
+
+    def setUp(self):
+        self.create_company()
+        self.march = datetime.date(2024, 3, 10)
+        self.april = datetime.date(2024, 4, 2)
+
+    def create_transaction(self, amount, type='income', transaction_date=None, **extra):
+        return Transaction.objects.create(
+            user=self.user, company=self.company, type=type, title=f'{type} {amount}',
+            amount=Decimal(amount), transaction_date=transaction_date or self.march, **extra
+        )
+
+    def ledger_totals(self, date):
+        ledger = Ledger.objects.get(company=self.company, year=date.year, month=date.month)
+        return ledger.total_income, ledger.total_expense, ledger.net_profit
+
+    def assertLedgersMatchBackfill(self):
+        maintained = {
+            (ledger.year, ledger.month): (ledger.total_income, ledger.total_expense, ledger.net_profit)
+            for ledger in Ledger.objects.filter(company=self.company)
+            if ledger.total_income or ledger.total_expense
+        }
+        Ledger.objects.filter(company=self.company).delete()
+        Ledger.backfill(self.company)
+        rebuilt = {
+            (ledger.year, ledger.month): (ledger.total_income, ledger.total_expense, ledger.net_profit)
+            for ledger in Ledger.objects.filter(company=self.company)
+        }
+        self.assertEqual(maintained, rebuilt)
+
+    def test_create_and_edit_amount(self):
+        """Test ledger after creating transactions and changing an amount"""
+        income = self.create_transaction('100', tax=Decimal('10'))
+        self.create_transaction('30', type='expense')
+        self.assertEqual(self.ledger_totals(self.march), (Decimal('110'), Decimal('30'), Decimal('80')))
+
+        income.amount = Decimal('250')
+        income.save()
+        self.assertEqual(self.ledger_totals(self.march), (Decimal('260'), Decimal('30'), Decimal('230')))
+        self.assertLedgersMatchBackfill()
+
+    def test_change_type(self):
+        """Test ledger after turning an income into an expense"""
+        transaction = self.create_transaction('100')
+        transaction.type = 'expense'
+        transaction.save()
+        self.assertEqual(self.ledger_totals(self.march), (Decimal('0'), Decimal('100'), Decimal('-100')))
+        self.assertLedgersMatchBackfill()
+
+    def test_change_month(self):
+        """Test that moving a transaction to another month moves its amount between ledgers"""
+        transaction = self.create_transaction('100')
+        transaction.transaction_date = self.april
+        transaction.save()
+        self.assertEqual(self.ledger_totals(self.march), (Decimal('0'), Decimal('0'), Decimal('0')))
+        self.assertEqual(self.ledger_totals(self.april), (Decimal('100'), Decimal('0'), Decimal('100')))
+        self.assertLedgersMatchBackfill()
+
+    def test_void_and_unvoid(self):
+        """Test ledger after voiding and restoring a transaction"""
+        transaction = self.create_transaction('100')
+        transaction.is_void = True
+        transaction.save()
+        self.assertEqual(self.ledger_totals(self.march)[0], Decimal('0'))
+
+        transaction.is_void = False
+        transaction.save()
+        self.assertEqual(self.ledger_totals(self.march)[0], Decimal('100'))
+        self.assertLedgersMatchBackfill()
+
+    def test_delete(self):
+        """Test ledger after deleting transactions one by one and through a queryset"""
+        first = self.create_transaction('100')
+        self.create_transaction('40', type='expense')
+        self.create_transaction('5', transaction_date=self.april)
+
+        Transaction.objects.get(pk=first.pk).delete()
+        self.assertEqual(self.ledger_totals(self.march), (Decimal('0'), Decimal('40'), Decimal('-40')))
+
+        Transaction.objects.filter(company=self.company, type='expense').delete()
+        self.assertEqual(self.ledger_totals(self.march), (Decimal('0'), Decimal('0'), Decimal('0')))
+        self.assertLedgersMatchBackfill()
+
+    def test_save_with_deferred_fields(self):
+        """Test that saving a transaction loaded without its ledger fields does not count it twice"""
+        transaction = self.create_transaction('100')
+
+        loaded = Transaction.objects.only('id', 'title', 'user', 'company').get(pk=transaction.pk)
+        loaded.title = 'renamed'
+        loaded.save()
+        self.assertEqual(self.ledger_totals(self.march)[0], Decimal('100'))
+
+        loaded = Transaction.objects.only('id', 'user', 'company').get(pk=transaction.pk)
+        loaded.amount = Decimal('60')
+        loaded.save()
+        self.assertEqual(self.ledger_totals(self.march)[0], Decimal('60'))
+        self.assertLedgersMatchBackfill()
+
+    def test_delete_with_deferred_fields(self):
+        """Test that deleting a transaction loaded without its ledger fields takes out its stored amount"""
+        transaction = self.create_transaction('100')
+        self.create_transaction('25')
+
+        Transaction.objects.only('id').get(pk=transaction.pk).delete()
+        self.assertEqual(self.ledger_totals(self.march)[0], Decimal('25'))
+        self.assertLedgersMatchBackfill()
+
+    def test_verify_ledgers_reports_no_drift(self):
+        """Test that verify_ledgers finds nothing to fix after a mix of edits"""
+        transaction = self.create_transaction('100')
+        self.create_transaction('30', type='expense', transaction_date=self.april)
+        transaction.transaction_date = self.april
+        transaction.amount = Decimal('75')
+        transaction.save()
+
+        out = StringIO()
+        call_command('verify_ledgers', company=self.company.pk, stdout=out)
+        self.assertIn('match their transactions', out.getvalue())
+
+
+@override_settings(ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS=False)
+class SyncRowsTest(AccountingTestMixin, TestCase):
+    """Syncing the same documents again must never post them twice"""
+
+    def setUp(self):
+        self.create_company()
+        self.invoices = [self.create_paid_invoice(), self.create_paid_invoice(3, '20')]
+
+    def test_sync_source_twice(self):
+        """Test that a second sync finds nothing left to post"""
+        self.assertEqual(sync_source('invoice')[0], 2)
+        self.assertEqual(sync_source('invoice')[0], 0)
+        for invoice in self.invoices:
+            self.assertEqual(self.invoice_transactions(invoice).count(), 1)
+        self.assertFalse(unsynced_rows('invoice').exists())
+
+    def test_sync_rows_twice_with_stale_rows(self):
+        """Test that rows already posted by another sync are skipped, not duplicated"""
+        rows = Invoice.objects.filter(pk__in=[invoice.pk for invoice in self.invoices]).order_by('pk')
+        created, company_ids = sync_rows('invoice', rows)
+        self.assertEqual((created, company_ids), (2, {self.company.pk}))
+
+        # The same rows again, as a concurrent sync that read them before the first committed
+        self.assertEqual(sync_rows('invoice', rows)[0], 0)
+        for invoice in self.invoices:
+            self.assertEqual(self.invoice_transactions(invoice).count(), 1)
+        posted = self.invoice_transactions(self.invoices[0]).get().transaction_date
+        ledger = Ledger.objects.get(company=self.company, year=posted.year, month=posted.month)
+        self.assertEqual(ledger.total_income, Decimal('160'))
+
+
+class DrainOutboxTest(AccountingTestMixin, TestCase):
+    """A paid invoice is queued once and posted exactly once"""
+
+    def setUp(self):
+        self.create_company()
+
+    @override_settings(ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS=False)
+    def test_drain_posts_queued_invoice_once(self):
+        """Test that draining twice posts a queued invoice once and empties the outbox"""
+        invoice = self.create_paid_invoice()
+        self.assertEqual(SyncOutbox.objects.filter(reference_id=str(invoice.pk)).count(), 1)
+        self.assertFalse(self.invoice_transactions(invoice).exists())
+
+        self.assertEqual(drain_outbox(), (1, 1))
+        self.assertEqual(drain_outbox(), (0, 0))
+        self.assertEqual(self.invoice_transactions(invoice).get().amount, Decimal('100'))
+        self.assertFalse(SyncOutbox.objects.exists())
+
+    @override_settings(ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS=False)
+    def test_requeued_invoice_is_not_posted_again(self):
+        """Test that saving a paid invoice again, or queueing it again, adds no transaction"""
+        invoice = self.create_paid_invoice()
+        drain_outbox()
+
+        invoice.notes = 'Saved again'
+        invoice.save()
+        self.assertFalse(SyncOutbox.objects.exists())
+
+        SyncOutbox.record(self.user.pk, 'invoice', invoice.pk)
+        self.assertEqual(drain_outbox(), (1, 0))
+        self.assertEqual(self.invoice_transactions(invoice).count(), 1)
+
+    def test_drain_runs_after_commit(self):
+        """Test that paying an invoice posts it once the saving transaction commits"""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                invoice = self.create_paid_invoice()
+                self.assertFalse(self.invoice_transactions(invoice).exists())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.invoice_transactions(invoice).count(), 1)
+        self.assertFalse(SyncOutbox.objects.exists())
+
+    def test_drain_is_scheduled_again_after_rollback(self):
+        """Test that a rolled-back save does not stop later saves from being drained"""
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.create_paid_invoice()
+                    raise RuntimeError('roll back')
+            except RuntimeError:
+                pass
+            invoice = self.create_paid_invoice()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.invoice_transactions(invoice).count(), 1)
@@ -1,27 +1,35 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.http import JsonResponse, HttpResponse
-from django.core.paginator import Paginator
-from django.db.models import Sum, Q, Count, Min, Max
+from django.db.models import Sum, Q, Count
 from django.utils import timezone
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_http_methods, require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.template.loader import render_to_string
 from django.urls import reverse
-from datetime import datetime, timedelta
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from datetime import date, datetime
+import hashlib
 import json
-import csv
 from decimal import Decimal
 import re
 
 from .models import Transaction, Ledger, Account, FinancialReport
+from .sync import drain_outbox, sync_sources
 from .forms import (
     TransactionForm, TransactionFilterForm, AccountForm, 
     FinancialReportForm, BulkTransactionForm, ReconciliationForm,
     ImportTransactionForm
 )
+from django.core.cache import cache
+from apps.core.caching import cache_get_or_set, versioned_key
 from apps.core.models import CompanyProfile
+from apps.core.exports import ExcelExport, iter_values, streaming_csv_response
+from apps.core.jobs import enqueue
+from apps.core.pagination import paginate
 
 def get_currency_display(currency_symbol):
     """Convert currency symbol to display text for better compatibility"""
@@ -146,176 +154,86 @@ def get_pdf_currency_symbol(currency_symbol, use_symbol=True):
 
 
 def sync_ledgers_from_transactions(company):
-    """Sync ledgers from existing transactions for all months"""
-    
-    # Get date range of transactions
-    date_range = Transaction.objects.filter(
-        company=company,
-        is_void=False
-    ).aggregate(
-        min_date=Min('transaction_date'),
-        max_date=Max('transaction_date')
-    )
-    
-    if not date_range['min_date'] or not date_range['max_date']:
-        return
-    
-    # Create ledgers for each month in the range
-    current_date = date_range['min_date'].replace(day=1)
-    end_date = date_range['max_date'].replace(day=1)
-    
-    while current_date <= end_date:
-        # Check if ledger exists for this month
-        existing_ledger = Ledger.objects.filter(
-            company=company,
-            year=current_date.year,
-            month=current_date.month
-        ).first()
-        
-        if not existing_ledger:
-            # Calculate totals from transactions
-            month_transactions = Transaction.objects.filter(
-                company=company,
-                transaction_date__year=current_date.year,
-                transaction_date__month=current_date.month,
-                is_void=False
-            )
-            
-            total_income = month_transactions.filter(type='income').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            total_expense = month_transactions.filter(type='expense').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            net_profit = total_income - total_expense
-            
-            # Create ledger
-            Ledger.objects.create(
-                company=company,
-                year=current_date.year,
-                month=current_date.month,
-                total_income=total_income,
-                total_expense=total_expense,
-                net_profit=net_profit
-            )
-        
-        # Move to next month
-        if current_date.month == 12:
-            current_date = current_date.replace(year=current_date.year + 1, month=1)
-        else:
-            current_date = current_date.replace(month=current_date.month + 1)
+    """
+    Create any ledgers missing for the company's months. Runs only when the
+    company's transactions changed since the last run; delta maintenance
+    keeps existing ledgers current between runs.
+    """
+    key = versioned_key('ledger_backfill', [Transaction.cache_namespace(company.pk)], company.pk)
+    if cache.get(key) is None:
+        Ledger.backfill(company)
+        cache.set(key, True, None)
 
 
-@login_required
-def accounting_dashboard(request):
-    """Main accounting dashboard with charts and summary"""
-    user = request.user
-    company = getattr(user, 'company_profile', None)
-    
-    if not company:
-        messages.error(request, "Company profile not found. Please set up your company profile first.")
-        return redirect('core:company_profile')
-    
-    # Sync ledgers from existing transactions
-    sync_ledgers_from_transactions(company)
-    
-    # Get current month/year
-    current_date = timezone.now()
-    current_month = current_date.month
-    current_year = current_date.year
-    
-    # Get current month ledger
-    current_ledger = Ledger.objects.filter(
-        company=company,
-        year=current_year,
-        month=current_month
-    ).first()
-    
-    # Create a default ledger if none exists
-    if not current_ledger:
-        current_ledger = type('obj', (object,), {
-            'total_income': 0,
-            'total_expense': 0,
-            'net_profit': 0
-        })()
-    
-    # Get recent transactions
-    recent_transactions = Transaction.objects.filter(
-        company=company,
-        is_void=False
-    ).order_by('-created_at')[:10]
-    
-    # Get monthly data for charts (last 12 months) - improved with real transaction data
+def monthly_ledger_data(company, months=12):
+    """Income, expense and profit of the last ``months`` calendar months, oldest first, from one ledger read"""
+    month_keys = Ledger.recent_months(months)
+    ledgers = Ledger.for_months(company, month_keys)
     monthly_data = []
-    for i in range(12):
-        date = current_date - timedelta(days=30*i)
-        
-        # Get or create ledger for this month
-        month_ledger = Ledger.objects.filter(
-            company=company,
-            year=date.year,
-            month=date.month
-        ).first()
-        
-        # If no ledger exists, calculate from actual transactions
-        if not month_ledger:
-            month_transactions = Transaction.objects.filter(
-                company=company,
-                transaction_date__year=date.year,
-                transaction_date__month=date.month,
-                is_void=False
-            )
-            
-            month_income = month_transactions.filter(type='income').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            month_expense = month_transactions.filter(type='expense').aggregate(
-                total=Sum('net_amount')
-            )['total'] or 0
-            
-            month_profit = month_income - month_expense
-        else:
-            month_income = float(month_ledger.total_income)
-            month_expense = float(month_ledger.total_expense)
-            month_profit = float(month_ledger.net_profit)
-        
+    for year, month in month_keys:
+        ledger = ledgers.get((year, month))
         monthly_data.append({
-            'month': date.strftime('%b %Y'),
-            'year': date.year,
-            'month_num': date.month,
-            'income': month_income,
-            'expense': month_expense,
-            'profit': month_profit,
+            'month': date(year, month, 1).strftime('%b %Y'),
+            'year': year,
+            'month_num': month,
+            'income': float(ledger.total_income) if ledger else 0.0,
+            'expense': float(ledger.total_expense) if ledger else 0.0,
+            'profit': float(ledger.net_profit) if ledger else 0.0,
         })
-    
-    # Get outstanding invoices
+    return monthly_data
+
+
+# Payload keys that update_ledger_ajax returns only with include_charts
+DASHBOARD_CHART_KEYS = ('monthly_data', 'today_data', 'source_data', 'recent_transactions')
+
+
+def dashboard_cache_key(company, year, month):
+    """
+    Cache key of a dashboard payload, valid until the company's transactions,
+    ledgers or invoices change. The versions come from the shared
+    CacheVersion table, so postings made by the outbox drain worker or
+    another web process change the key, and the ETag built from it, here too.
+    """
     from apps.invoices.models import Invoice
+    namespaces = [Transaction.cache_namespace(company.pk), Invoice.cache_namespace(company.user_id)]
+    return versioned_key('accounting_dashboard', namespaces, company.pk, year, month, timezone.now().date())
+
+
+def dashboard_payload(company, year, month):
+    """
+    Everything the accounting dashboard shows for one month, as plain JSON
+    values: the month's ledger totals, outstanding invoices, today's figures,
+    12 months of chart data, the source breakdown and recent transactions.
+    """
+    from apps.invoices.models import Invoice
+    
+    sync_ledgers_from_transactions(company)
+    
     outstanding_invoices = Invoice.objects.filter(
-        user=user,
+        user_id=company.user_id,
         status__in=['unpaid', 'partial']
     ).aggregate(total=Sum('balance_due'))['total'] or 0
     
-    # Get today's transactions
-    today_transactions = Transaction.objects.filter(
+    ledger = Ledger.objects.filter(company=company, year=year, month=month).first()
+    if ledger:
+        ledger.update_outstanding_amounts(outstanding_invoices)
+    
+    # Today's income and expense in one query
+    today = Transaction.objects.filter(
         company=company,
-        transaction_date=current_date.date(),
+        transaction_date=timezone.now().date(),
         is_void=False
+    ).aggregate(
+        income=Sum('net_amount', filter=Q(type='income')),
+        expense=Sum('net_amount', filter=Q(type='expense')),
     )
+    today_income = float(today['income'] or 0)
+    today_expense = float(today['expense'] or 0)
     
-    today_income = today_transactions.filter(type='income').aggregate(
-        total=Sum('net_amount')
-    )['total'] or 0
-    
-    today_expense = today_transactions.filter(type='expense').aggregate(
-        total=Sum('net_amount')
-    )['total'] or 0
-    
-    # If no transactions today, use recent transactions for demonstration
+    # Latest three transactions of each type, which the dashboard page shows
+    # in place of an empty today
+    recent_income = recent_expense = 0
     if today_income == 0 and today_expense == 0:
-        # Get recent transactions for demonstration
         recent_income = Transaction.objects.filter(
             company=company,
             type='income',
@@ -331,31 +249,99 @@ def accounting_dashboard(request):
         ).order_by('-transaction_date')[:3].aggregate(
             total=Sum('net_amount')
         )['total'] or 0
-        
-        today_income = recent_income
-        today_expense = recent_expense
     
-    # Get source app breakdown - optimized
-    source_breakdown = list(Transaction.objects.filter(
+    source_breakdown = Transaction.objects.filter(
         company=company,
         is_void=False
     ).values('source_app').annotate(
         total=Sum('net_amount'),
         count=Count('id')
-    ).order_by('-total'))
+    ).order_by('-total')
+    
+    recent_transactions = Transaction.objects.filter(
+        company=company,
+        is_void=False
+    ).order_by('-created_at')[:10]
+    
+    return {
+        'total_income': float(ledger.total_income) if ledger else 0,
+        'total_expense': float(ledger.total_expense) if ledger else 0,
+        'net_profit': float(ledger.net_profit) if ledger else 0,
+        'outstanding_invoices': float(outstanding_invoices),
+        'today_income': today_income,
+        'today_expense': today_expense,
+        'recent_income': float(recent_income),
+        'recent_expense': float(recent_expense),
+        'currency_symbol': company.currency_symbol,
+        'currency_code': company.currency_code,
+        'monthly_data': monthly_ledger_data(company),
+        'today_data': {
+            'income': today_income,
+            'expense': today_expense
+        },
+        'source_data': [
+            {'source_app': item['source_app'], 'total': float(item['total']), 'count': item['count']}
+            for item in source_breakdown
+        ],
+        'recent_transactions': [
+            {
+                'title': t.title,
+                'type': t.type,
+                'type_display': t.get_type_display(),
+                'net_amount': float(t.net_amount),
+                'date': t.transaction_date.strftime('%b %d, %Y'),
+                'source_app': t.get_source_app_display()
+            }
+            for t in recent_transactions
+        ],
+    }
+
+
+@login_required
+def accounting_dashboard(request):
+    """Main accounting dashboard with charts and summary"""
+    user = request.user
+    company = getattr(user, 'company_profile', None)
+    
+    if not company:
+        messages.error(request, "Company profile not found. Please set up your company profile first.")
+        return redirect('core:company_profile')
+    
+    # Get current month/year
+    current_date = timezone.now()
+    current_month = current_date.month
+    current_year = current_date.year
+    
+    # Post anything an after-commit drain left behind first
+    if getattr(settings, 'ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS', True):
+        drain_outbox(user=user)
+    
+    # Summary, charts and recent transactions are cached until the company's
+    # transactions, ledgers or invoices change
+    payload = cache_get_or_set(
+        dashboard_cache_key(company, current_year, current_month),
+        lambda: dashboard_payload(company, current_year, current_month)
+    )
+    monthly_data = payload['monthly_data']
     
-    # Convert Decimal values to float for JSON serialization
-    for item in source_breakdown:
-        item['total'] = float(item['total'])
+    # If no transactions today, use recent transactions for demonstration
+    if payload['today_income'] == 0 and payload['today_expense'] == 0:
+        today_income, today_expense = payload['recent_income'], payload['recent_expense']
+    else:
+        today_income, today_expense = payload['today_income'], payload['today_expense']
     
     context = {
-        'current_ledger': current_ledger,
-        'recent_transactions': recent_transactions,
-        'monthly_data': list(reversed(monthly_data)),  # Reverse for chronological order
-        'outstanding_invoices': float(outstanding_invoices),
-        'today_income': float(today_income),
-        'today_expense': float(today_expense),
-        'source_breakdown': source_breakdown,
+        'current_ledger': {
+            'total_income': payload['total_income'],
+            'total_expense': payload['total_expense'],
+            'net_profit': payload['net_profit'],
+        },
+        'recent_transactions': payload['recent_transactions'],
+        'monthly_data': monthly_data,
+        'outstanding_invoices': payload['outstanding_invoices'],
+        'today_income': today_income,
+        'today_expense': today_expense,
+        'source_breakdown': payload['source_data'],
         'current_month': current_month,
         'current_year': current_year,
         'has_real_data': any(item['income'] > 0 or item['expense'] > 0 for item in monthly_data),
@@ -422,24 +408,22 @@ def transaction_list(request):
         # Order by date
         transactions = transactions.order_by('-transaction_date', '-created_at')
         
-        # Pagination
-        paginator = Paginator(transactions, 25)
-        page_number = request.GET.get('page')
-        page_obj = paginator.get_page(page_number)
-        
-        # Summary totals - calculate on filtered data
-        total_income = transactions.filter(type='income').aggregate(
-            total=Sum('net_amount')
-        )['total'] or 0
-        
-        total_expense = transactions.filter(type='expense').aggregate(
-            total=Sum('net_amount')
-        )['total'] or 0
-        
+        # Summary totals - calculate on filtered data in one pass
+        summary = transactions.aggregate(
+            total_income=Sum('net_amount', filter=Q(type='income')),
+            total_expense=Sum('net_amount', filter=Q(type='expense')),
+            total_count=Count('id'),
+        )
+        total_income = summary['total_income'] or 0
+        total_expense = summary['total_expense'] or 0
         net_total = total_income - total_expense
+        total_count = summary['total_count']
         
-        # Get total count for pagination info
-        total_count = transactions.count()
+        # Pagination: keyset pages on (transaction_date, created_at, id) for long histories
+        page_obj = paginate(
+            request, transactions, 25,
+            ordering=['-transaction_date', '-created_at', '-id'], count=total_count,
+        )
         
         context = {
             'page_obj': page_obj,
@@ -637,6 +621,63 @@ def ledger_summary(request):
     return render(request, 'accounting/ledger_summary.html', context)
 
 
+TRANSACTION_EXPORT_HEADERS = [
+    'S/N', 'Date', 'Type', 'Title', 'Amount', 'Currency', 'Tax', 'Discount',
+    'Net Amount', 'Source', 'Reference', 'Notes', 'Reconciled'
+]
+
+LEDGER_EXPORT_HEADERS = ['S/N', 'Month', 'Income', 'Expense', 'Net Profit', 'Outstanding Invoices', 'Profit Margin']
+
+
+def transaction_export_rows(transactions):
+    """Export rows for a transaction queryset, read in chunks from a values_list projection"""
+    type_labels = dict(Transaction.TRANSACTION_TYPE)
+    source_labels = dict(Transaction.SOURCE_APP_CHOICES)
+    currency_labels = {}
+    fields = [
+        'transaction_date', 'type', 'title', 'amount', 'currency', 'tax', 'discount',
+        'net_amount', 'source_app', 'reference_id', 'notes', 'is_reconciled',
+    ]
+    for index, (transaction_date, transaction_type, title, amount, currency, tax, discount,
+                net_amount, source_app, reference_id, notes, is_reconciled) in enumerate(
+                    iter_values(transactions, fields), 1):
+        if currency not in currency_labels:
+            currency_labels[currency] = get_currency_display(currency)
+        yield [
+            index,  # Serial number
+            transaction_date,
+            type_labels.get(transaction_type, transaction_type),
+            clean_transaction_text(title),
+            amount,
+            currency_labels[currency],
+            tax or 0,
+            discount or 0,
+            net_amount,
+            clean_transaction_text(source_labels.get(source_app, source_app)),
+            clean_transaction_text(reference_id or ''),
+            clean_transaction_text(notes or ''),
+            'Yes' if is_reconciled else 'No',
+        ]
+
+
+def ledger_export_rows(ledgers, currency_code):
+    """Export rows for monthly ledgers, with amounts shown in the company currency"""
+    for index, ledger in enumerate(ledgers, 1):
+        profit_margin = 0
+        if ledger.total_income > 0:
+            profit_margin = (ledger.net_profit / ledger.total_income) * 100
+        
+        yield [
+            index,  # Serial number
+            ledger.month_name,
+            f"{currency_code} {ledger.total_income:,.2f}",
+            f"{currency_code} {ledger.total_expense:,.2f}",
+            f"{currency_code} {ledger.net_profit:,.2f}",
+            f"{currency_code} {ledger.outstanding_invoices:,.2f}",
+            f"{profit_margin:.1f}%",
+        ]
+
+
 @login_required
 def export_accounting_data(request):
     """Export accounting data to CSV/Excel/PDF"""
@@ -658,105 +699,20 @@ def export_accounting_data(request):
         ).order_by('-transaction_date')
         
         if format_type == 'csv':
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="transactions_{timezone.now().strftime("%Y%m%d")}.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow([
-                'S/N', 'Date', 'Type', 'Title', 'Amount', 'Currency', 'Tax', 'Discount', 
-                'Net Amount', 'Source', 'Reference', 'Notes', 'Reconciled'
-            ])
-            
-            # Use the utility function for currency conversion
-            
-            for index, transaction in enumerate(transactions, 1):
-                currency_display = get_currency_display(transaction.currency)
-                writer.writerow([
-                    index,  # Serial number
-                    transaction.transaction_date,
-                    transaction.get_type_display(),
-                    clean_transaction_text(transaction.title),
-                    transaction.amount,
-                    currency_display,
-                    transaction.tax or 0,
-                    transaction.discount or 0,
-                    transaction.net_amount,
-                    clean_transaction_text(transaction.get_source_app_display()),
-                    clean_transaction_text(transaction.reference_id or ''),
-                    clean_transaction_text(transaction.notes or ''),
-                    'Yes' if transaction.is_reconciled else 'No',
-                ])
-            
-            return response
+            # Streamed from a values_list projection, so memory stays flat for any number of rows
+            return streaming_csv_response(
+                f'transactions_{timezone.now().strftime("%Y%m%d")}.csv',
+                TRANSACTION_EXPORT_HEADERS,
+                transaction_export_rows(transactions)
+            )
         
         elif format_type == 'excel':
             try:
-                import openpyxl
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                # Create workbook and worksheet
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "Transactions"
-                
-                # Use the utility function for currency conversion
-                
-                # Define headers
-                headers = [
-                    'S/N', 'Date', 'Type', 'Title', 'Amount', 'Currency', 'Tax', 'Discount', 
-                    'Net Amount', 'Source', 'Reference', 'Notes', 'Reconciled'
-                ]
-                
-                # Style for headers
-                header_font = Font(bold=True, color="FFFFFF")
-                header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                header_alignment = Alignment(horizontal="center", vertical="center")
-                
-                # Write headers
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col, value=header)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                
-                # Write data
-                for row, transaction in enumerate(transactions, 2):
-                    currency_display = get_currency_display(transaction.currency)
-                    ws.cell(row=row, column=1, value=row-1)  # Serial number
-                    ws.cell(row=row, column=2, value=transaction.transaction_date)
-                    ws.cell(row=row, column=3, value=transaction.get_type_display())
-                    ws.cell(row=row, column=4, value=clean_transaction_text(transaction.title))
-                    ws.cell(row=row, column=5, value=float(transaction.amount))
-                    ws.cell(row=row, column=6, value=currency_display)
-                    ws.cell(row=row, column=7, value=float(transaction.tax or 0))
-                    ws.cell(row=row, column=8, value=float(transaction.discount or 0))
-                    ws.cell(row=row, column=9, value=float(transaction.net_amount))
-                    ws.cell(row=row, column=10, value=clean_transaction_text(transaction.get_source_app_display()))
-                    ws.cell(row=row, column=11, value=clean_transaction_text(transaction.reference_id or ''))
-                    ws.cell(row=row, column=12, value=clean_transaction_text(transaction.notes or ''))
-                    ws.cell(row=row, column=13, value='Yes' if transaction.is_reconciled else 'No')
-                
-                # Auto-adjust column widths
-                for column in ws.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column_letter].width = adjusted_width
-                
-                # Create response
-                response = HttpResponse(
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = f'attachment; filename="transactions_{timezone.now().strftime("%Y%m%d")}.xlsx"'
-                
-                wb.save(response)
-                return response
+                export = ExcelExport("Transactions", header_color="366092")
+                export.set_widths([8, 12, 10, 40, 14, 10, 12, 12, 14, 20, 20, 40, 12])
+                export.add_header(TRANSACTION_EXPORT_HEADERS)
+                export.add_rows(transaction_export_rows(transactions))
+                return export.response(f'transactions_{timezone.now().strftime("%Y%m%d")}.xlsx')
                 
             except ImportError:
                 messages.error(request, "Excel export requires openpyxl package. Please install it.")
@@ -998,97 +954,25 @@ def export_accounting_data(request):
         ).order_by('month')
         
         if format_type == 'csv':
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="ledger_{year}.csv"'
-            
-            writer = csv.writer(response)
-            writer.writerow(['S/N', 'Month', 'Income', 'Expense', 'Net Profit', 'Outstanding Invoices', 'Profit Margin'])
-            
             # Get company currency code instead of symbol
             company_currency_symbol = getattr(company, 'currency_symbol', '₦')
             company_currency_code = get_currency_display(company_currency_symbol)
             
-            for index, ledger in enumerate(ledgers, 1):
-                profit_margin = 0
-                if ledger.total_income > 0:
-                    profit_margin = (ledger.net_profit / ledger.total_income) * 100
-                
-                writer.writerow([
-                    index,  # Serial number
-                    ledger.month_name,
-                    f"{company_currency_code} {ledger.total_income:,.2f}",
-                    f"{company_currency_code} {ledger.total_expense:,.2f}",
-                    f"{company_currency_code} {ledger.net_profit:,.2f}",
-                    f"{company_currency_code} {ledger.outstanding_invoices:,.2f}",
-                    f"{profit_margin:.1f}%",
-                ])
-            
-            return response
+            return streaming_csv_response(
+                f'ledger_{year}.csv', LEDGER_EXPORT_HEADERS, ledger_export_rows(ledgers, company_currency_code)
+            )
         
         elif format_type == 'excel':
             try:
-                import openpyxl
-                from openpyxl.styles import Font, PatternFill, Alignment
-                
-                # Create workbook and worksheet
-                wb = openpyxl.Workbook()
-                ws = wb.active
-                ws.title = "Ledger Summary"
-                
                 # Get company currency code instead of symbol
                 company_currency_symbol = getattr(company, 'currency_symbol', '₦')
                 company_currency_code = get_currency_display(company_currency_symbol)
                 
-                # Define headers
-                headers = ['S/N', 'Month', 'Income', 'Expense', 'Net Profit', 'Outstanding Invoices', 'Profit Margin']
-                
-                # Style for headers
-                header_font = Font(bold=True, color="FFFFFF")
-                header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-                header_alignment = Alignment(horizontal="center", vertical="center")
-                
-                # Write headers
-                for col, header in enumerate(headers, 1):
-                    cell = ws.cell(row=1, column=col, value=header)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                
-                # Write data
-                for row, ledger in enumerate(ledgers, 2):
-                    profit_margin = 0
-                    if ledger.total_income > 0:
-                        profit_margin = (ledger.net_profit / ledger.total_income) * 100
-                    
-                    ws.cell(row=row, column=1, value=row-1)  # Serial number
-                    ws.cell(row=row, column=2, value=ledger.month_name)
-                    ws.cell(row=row, column=3, value=f"{company_currency_code} {float(ledger.total_income):,.2f}")
-                    ws.cell(row=row, column=4, value=f"{company_currency_code} {float(ledger.total_expense):,.2f}")
-                    ws.cell(row=row, column=5, value=f"{company_currency_code} {float(ledger.net_profit):,.2f}")
-                    ws.cell(row=row, column=6, value=f"{company_currency_code} {float(ledger.outstanding_invoices):,.2f}")
-                    ws.cell(row=row, column=7, value=f"{profit_margin:.1f}%")
-                
-                # Auto-adjust column widths
-                for column in ws.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    ws.column_dimensions[column_letter].width = adjusted_width
-                
-                # Create response
-                response = HttpResponse(
-                    content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-                )
-                response['Content-Disposition'] = f'attachment; filename="ledger_{year}.xlsx"'
-                
-                wb.save(response)
-                return response
+                export = ExcelExport("Ledger Summary", header_color="366092")
+                export.set_widths([8, 14, 22, 22, 22, 22, 16])
+                export.add_header(LEDGER_EXPORT_HEADERS)
+                export.add_rows(ledger_export_rows(ledgers, company_currency_code))
+                return export.response(f'ledger_{year}.xlsx')
                 
             except ImportError:
                 messages.error(request, "Excel export requires openpyxl package. Please install it.")
@@ -1232,157 +1116,55 @@ def export_accounting_data(request):
 
 
 @login_required
-@require_POST
+@require_http_methods(['GET', 'POST'])
 @csrf_exempt
 def update_ledger_ajax(request):
-    """AJAX endpoint to update ledger data with comprehensive chart data"""
+    """
+    AJAX endpoint with the dashboard figures of a month, and the chart data
+    when include_charts is set. Served from the cached dashboard payload;
+    GETs carry an ETag, so a refresh with nothing new answers 304.
+    """
     try:
-        # Log the request for debugging
-        print(f"AJAX request received: {request.body}")
+        if request.method == 'GET':
+            data = request.GET
+            include_charts = data.get('include_charts', '').lower() in ('1', 'true', 'yes')
+        else:
+            data = json.loads(request.body)
+            include_charts = bool(data.get('include_charts', False))
+        month = int(data['month']) if data.get('month') else None
+        year = int(data['year']) if data.get('year') else None
         
-        data = json.loads(request.body)
-        month = data.get('month')
-        year = data.get('year')
-        include_charts = data.get('include_charts', False)
-        
-        user = request.user
-        company = getattr(user, 'company_profile', None)
+        company = getattr(request.user, 'company_profile', None)
         
         if not company:
             return JsonResponse({'error': 'Company profile not found'}, status=400)
         
-        # Update ledger for the specified month
-        ledger = Ledger.objects.filter(
-            company=company,
-            year=year,
-            month=month
-        ).first()
-        
-        if ledger:
-            ledger.update_outstanding_amounts()
-        
-        # Get outstanding invoices
-        from apps.invoices.models import Invoice
-        outstanding_invoices = Invoice.objects.filter(
-            user=user,
-            status__in=['unpaid', 'partial']
-        ).aggregate(total=Sum('balance_due'))['total'] or 0
-        
-        # Get today's transactions
-        current_date = timezone.now()
-        today_transactions = Transaction.objects.filter(
-            company=company,
-            transaction_date=current_date.date(),
-            is_void=False
-        )
+        if getattr(settings, 'ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS', True):
+            drain_outbox(user=request.user)
         
-        today_income = today_transactions.filter(type='income').aggregate(
-            total=Sum('net_amount')
-        )['total'] or 0
-        
-        today_expense = today_transactions.filter(type='expense').aggregate(
-            total=Sum('net_amount')
-        )['total'] or 0
+        key = dashboard_cache_key(company, year, month)
+        etag = quote_etag(hashlib.md5(f'{key}:{include_charts}'.encode()).hexdigest())
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            not_modified['ETag'] = etag
+            return not_modified
         
+        payload = cache_get_or_set(key, lambda: dashboard_payload(company, year, month))
         response_data = {
             'success': True,
-            'total_income': float(ledger.total_income) if ledger else 0,
-            'total_expense': float(ledger.total_expense) if ledger else 0,
-            'net_profit': float(ledger.net_profit) if ledger else 0,
-            'outstanding_invoices': float(outstanding_invoices),
-            'today_income': float(today_income),
-            'today_expense': float(today_expense),
-            'currency_symbol': company.currency_symbol if company else '₦',
-            'currency_code': company.currency_code if company else 'NGN',
+            **{name: value for name, value in payload.items() if include_charts or name not in DASHBOARD_CHART_KEYS},
         }
         
-        # Include chart data if requested
-        if include_charts:
-            # Monthly data for charts (last 12 months) - improved with real transaction data
-            monthly_data = []
-            for i in range(12):
-                date = current_date - timedelta(days=30*i)
-                
-                # Get or create ledger for this month
-                month_ledger = Ledger.objects.filter(
-                    company=company,
-                    year=date.year,
-                    month=date.month
-                ).first()
-                
-                # If no ledger exists, calculate from actual transactions
-                if not month_ledger:
-                    month_transactions = Transaction.objects.filter(
-                        company=company,
-                        transaction_date__year=date.year,
-                        transaction_date__month=date.month,
-                        is_void=False
-                    )
-                    
-                    month_income = month_transactions.filter(type='income').aggregate(
-                        total=Sum('net_amount')
-                    )['total'] or 0
-                    
-                    month_expense = month_transactions.filter(type='expense').aggregate(
-                        total=Sum('net_amount')
-                    )['total'] or 0
-                    
-                    month_profit = month_income - month_expense
-                else:
-                    month_income = float(month_ledger.total_income)
-                    month_expense = float(month_ledger.total_expense)
-                    month_profit = float(month_ledger.net_profit)
-                
-                monthly_data.append({
-                    'month': date.strftime('%b %Y'),
-                    'income': month_income,
-                    'expense': month_expense,
-                    'profit': month_profit,
-                })
-            
-            # Source breakdown data
-            source_breakdown = Transaction.objects.filter(
-                company=company,
-                is_void=False
-            ).values('source_app').annotate(
-                total=Sum('net_amount'),
-                count=Count('id')
-            ).order_by('-total')
-            
-            # Recent transactions
-            recent_transactions = Transaction.objects.filter(
-                company=company,
-                is_void=False
-            ).order_by('-created_at')[:10]
-            
-            response_data.update({
-                'monthly_data': list(reversed(monthly_data)),
-                'today_data': {
-                    'income': float(today_income),
-                    'expense': float(today_expense)
-                },
-                'source_data': list(source_breakdown),
-                'recent_transactions': [
-                    {
-                        'title': t.title,
-                        'type': t.type,
-                        'type_display': t.get_type_display(),
-                        'net_amount': float(t.net_amount),
-                        'date': t.transaction_date.strftime('%b %d, %Y'),
-                        'source_app': t.get_source_app_display()
-                    }
-                    for t in recent_transactions
-                ]
-            })
-        
-        # Log the response for debugging
-        print(f"AJAX response: {response_data}")
-        
-        return JsonResponse(response_data)
+        response = JsonResponse(response_data)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
         
     except json.JSONDecodeError as e:
         print(f"JSON decode error: {e}")
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid month or year'}, status=400)
     except Exception as e:
         print(f"Unexpected error: {e}")
         return JsonResponse({'error': str(e)}, status=500)
@@ -1399,72 +1181,8 @@ def sync_from_other_apps(request):
         return redirect('core:company_profile')
     
     if request.method == 'POST':
-        # Sync from invoices
-        from apps.invoices.models import Invoice
-        from apps.receipts.models import Receipt
-        
-        # Sync paid invoices
-        paid_invoices = Invoice.objects.filter(
-            user=user,
-            status='paid'
-        )
-        
-        synced_count = 0
-        for invoice in paid_invoices:
-            # Check if transaction already exists
-            existing_transaction = Transaction.objects.filter(
-                company=company,
-                source_app='invoice',
-                reference_id=str(invoice.id)
-            ).first()
-            
-            if not existing_transaction:
-                Transaction.objects.create(
-                    user=user,
-                    company=company,
-                    type='income',
-                    title=f"Invoice Payment - {invoice.invoice_number}",
-                    description=f"Payment for invoice {invoice.invoice_number} from {invoice.client_name}",
-                    amount=invoice.grand_total,
-                    currency=company.currency_symbol,
-                    tax=invoice.total_tax,
-                    discount=invoice.total_discount,
-                    source_app='invoice',
-                    reference_id=str(invoice.id),
-                    reference_model='Invoice',
-                    transaction_date=invoice.updated_at.date(),
-                    notes=f"Auto-synced from invoice {invoice.invoice_number}"
-                )
-                synced_count += 1
-        
-        # Sync from receipts
-        receipts = Receipt.objects.filter(
-            created_by=user
-        )
-        
-        for receipt in receipts:
-            existing_transaction = Transaction.objects.filter(
-                company=company,
-                source_app='receipt',
-                reference_id=str(receipt.id)
-            ).first()
-            
-            if not existing_transaction:
-                Transaction.objects.create(
-                    user=user,
-                    company=company,
-                    type='income',
-                    title=f"Receipt Payment - {receipt.receipt_no}",
-                    description=f"Payment receipt {receipt.receipt_no} from {receipt.client_name}",
-                    amount=receipt.amount_received,
-                    currency=company.currency_symbol,
-                    source_app='receipt',
-                    reference_id=str(receipt.id),
-                    reference_model='Receipt',
-                    transaction_date=receipt.date_received,
-                    notes=f"Auto-synced from receipt {receipt.receipt_no}"
-                )
-                synced_count += 1
+        # Paid invoices and receipts without a transaction, found and inserted in bulk
+        synced_count = sum(sync_sources(('invoice', 'receipt'), user=user).values())
         
         messages.success(request, f"Successfully synced {synced_count} transactions from other apps.")
         return redirect('accounting:transaction_list')
@@ -1489,16 +1207,11 @@ def generate_report(request):
             report.company = company
             report.created_by = user
             
-            # Generate report data based on type
-            if report.report_type == 'income_statement':
-                report.report_data = generate_income_statement(company, report.start_date, report.end_date)
-            elif report.report_type == 'balance_sheet':
-                report.report_data = generate_balance_sheet(company, report.end_date)
-            
             report.save()
             
-            messages.success(request, f"Report '{report.title}' generated successfully.")
-            return redirect('accounting:view_report', report_id=report.id)
+            # Report data and its PDF/Excel files are built by a background job
+            job = enqueue(user, 'accounting.financial_report', {'report_id': report.id}, title=f"Report {report.title}")
+            return redirect(job)
     else:
         form = FinancialReportForm()
     
@@ -1522,6 +1235,28 @@ def export_report_pdf(request, report_id):
     report = get_object_or_404(FinancialReport, id=report_id, company=company)
     
     # Calculate fresh report data dynamically (same logic as view_report)
+    fresh_report_data = build_report_data(report, company)
+    
+    try:
+        pdf = render_report_pdf(report, company, fresh_report_data)
+        
+        # Create the HttpResponse object with PDF headers
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{report.title}_{timezone.now().strftime("%Y%m%d")}.pdf"'
+        return response
+        
+    except Exception as e:
+        messages.error(request, f"Error generating PDF: {str(e)}")
+        return redirect('accounting:view_report', report_id=report.id)
+
+
+def build_report_data(report, company):
+    """
+    Report data recalculated from the current transactions.
+    
+    When the report period has no transactions, the range is widened to
+    include the latest transaction and the data notes the adjustment.
+    """
     original_transactions_count = Transaction.objects.filter(
         company=company,
         transaction_date__range=[report.start_date, report.end_date],
@@ -1566,194 +1301,189 @@ def export_report_pdf(request, report_id):
             fresh_report_data = report.report_data
         fresh_report_data['date_adjusted'] = False
     
+    return fresh_report_data
+
+
+def render_report_pdf(report, company, fresh_report_data):
+    """Render a financial report as PDF bytes"""
+    from reportlab.lib.pagesizes import letter, A4
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from io import BytesIO
+    import os
+    
+    # Register fonts for better Unicode support
     try:
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        from io import BytesIO
-        import os
-        
-        # Create the HttpResponse object with PDF headers
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{report.title}_{timezone.now().strftime("%Y%m%d")}.pdf"'
-        
-        # Register fonts for better Unicode support
-        try:
-            # Try to register a Unicode-compatible font if available
-            font_path = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'fonts')
-            
-            # Try to find a Unicode-compatible font
-            unicode_fonts = [
-                'DejaVuSans.ttf',
-                'Arial.ttf',
-                'arial.ttf',
-                'LiberationSans-Regular.ttf',
-                'FreeSans.ttf'
+        # Try to register a Unicode-compatible font if available
+        font_path = os.path.join(os.path.dirname(__file__), '..', '..', 'static', 'fonts')
+        
+        # Try to find a Unicode-compatible font
+        unicode_fonts = [
+            'DejaVuSans.ttf',
+            'Arial.ttf',
+            'arial.ttf',
+            'LiberationSans-Regular.ttf',
+            'FreeSans.ttf'
+        ]
+        
+        default_font = 'Helvetica'  # Default fallback
+        font_registered = False
+        
+        for font_file in unicode_fonts:
+            font_path_full = os.path.join(font_path, font_file)
+            if os.path.exists(font_path_full):
+                try:
+                    font_name = font_file.replace('.ttf', '')
+                    pdfmetrics.registerFont(TTFont(font_name, font_path_full))
+                    default_font = font_name
+                    font_registered = True
+                    break
+                except:
+                    continue
+        
+        # If no font found in static directory, try system fonts
+        if not font_registered:
+            # Try to use a system font that supports Unicode
+            system_fonts = [
+                '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+                '/System/Library/Fonts/Arial.ttf',
+                'C:/Windows/Fonts/arial.ttf',
+                'C:/Windows/Fonts/calibri.ttf'
             ]
             
-            default_font = 'Helvetica'  # Default fallback
-            font_registered = False
-            
-            for font_file in unicode_fonts:
-                font_path_full = os.path.join(font_path, font_file)
-                if os.path.exists(font_path_full):
+            for system_font in system_fonts:
+                if os.path.exists(system_font):
                     try:
-                        font_name = font_file.replace('.ttf', '')
-                        pdfmetrics.registerFont(TTFont(font_name, font_path_full))
+                        font_name = os.path.basename(system_font).replace('.ttf', '')
+                        pdfmetrics.registerFont(TTFont(font_name, system_font))
                         default_font = font_name
                         font_registered = True
                         break
                     except:
                         continue
-            
-            # If no font found in static directory, try system fonts
-            if not font_registered:
-                # Try to use a system font that supports Unicode
-                system_fonts = [
-                    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
-                    '/System/Library/Fonts/Arial.ttf',
-                    'C:/Windows/Fonts/arial.ttf',
-                    'C:/Windows/Fonts/calibri.ttf'
-                ]
-                
-                for system_font in system_fonts:
-                    if os.path.exists(system_font):
-                        try:
-                            font_name = os.path.basename(system_font).replace('.ttf', '')
-                            pdfmetrics.registerFont(TTFont(font_name, system_font))
-                            default_font = font_name
-                            font_registered = True
-                            break
-                        except:
-                            continue
-            
-            # If we registered a custom font, we need to be careful about bold variants
-            # Most TTF fonts don't automatically have bold variants in ReportLab
-            # So we'll use the regular font for everything and rely on font weight
-            if font_registered:
-                # Use the registered font name without bold suffix
-                default_font = default_font
-            else:
-                # Use Helvetica which has built-in bold variants
-                default_font = 'Helvetica'
-                            
-        except Exception as e:
-            print(f"Font registration error: {e}")
-            default_font = 'Helvetica'
-        
-        # Create the PDF object using BytesIO as its "file."
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
         
-        # Container for the 'Flowable' objects
-        elements = []
-        
-        # Get styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=TA_CENTER,
-            textColor=colors.darkblue
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'Subtitle',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=20,
-            alignment=TA_CENTER,
-            textColor=colors.darkgreen
-        )
-        
-        # Add title
-        title = Paragraph(f"{report.title}", title_style)
-        elements.append(title)
-        
-        # Add subtitle
-        subtitle = Paragraph(f"{report.get_report_type_display()} - {company.company_name}", subtitle_style)
-        elements.append(subtitle)
-        
-        # Add report info with currency
-        currency_symbol = getattr(company, 'currency_symbol', '₦')
-        if report.report_type == 'balance_sheet':
-            report_info = Paragraph(f"As of: {fresh_report_data.get('as_of_date', report.end_date)}<br/>Generated on: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal'])
+        # If we registered a custom font, we need to be careful about bold variants
+        # Most TTF fonts don't automatically have bold variants in ReportLab
+        # So we'll use the regular font for everything and rely on font weight
+        if font_registered:
+            # Use the registered font name without bold suffix
+            default_font = default_font
         else:
-            report_info = Paragraph(f"Period: {fresh_report_data.get('period', f'{report.start_date} to {report.end_date}')}<br/>Generated on: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal'])
-        elements.append(report_info)
-        
-        # Add date adjustment notice if applicable
-        if fresh_report_data.get('date_adjusted'):
-            adjustment_notice = Paragraph(f"<b>Note:</b> Date range adjusted to include actual data. Original: {fresh_report_data['original_period']} → Adjusted: {fresh_report_data['adjusted_period']}", styles['Normal'])
-            elements.append(adjustment_notice)
-        
-        elements.append(Spacer(1, 30))
+            # Use Helvetica which has built-in bold variants
+            default_font = 'Helvetica'
+                        
+    except Exception as e:
+        print(f"Font registration error: {e}")
+        default_font = 'Helvetica'
+    
+    # Create the PDF object using BytesIO as its "file."
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    
+    # Container for the 'Flowable' objects
+    elements = []
+    
+    # Get styles
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=TA_CENTER,
+        textColor=colors.darkblue
+    )
+    
+    subtitle_style = ParagraphStyle(
+        'Subtitle',
+        parent=styles['Heading2'],
+        fontSize=14,
+        spaceAfter=20,
+        alignment=TA_CENTER,
+        textColor=colors.darkgreen
+    )
+    
+    # Add title
+    title = Paragraph(f"{report.title}", title_style)
+    elements.append(title)
+    
+    # Add subtitle
+    subtitle = Paragraph(f"{report.get_report_type_display()} - {company.company_name}", subtitle_style)
+    elements.append(subtitle)
+    
+    # Add report info with currency
+    currency_symbol = getattr(company, 'currency_symbol', '₦')
+    if report.report_type == 'balance_sheet':
+        report_info = Paragraph(f"As of: {fresh_report_data.get('as_of_date', report.end_date)}<br/>Generated on: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal'])
+    else:
+        report_info = Paragraph(f"Period: {fresh_report_data.get('period', f'{report.start_date} to {report.end_date}')}<br/>Generated on: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}", styles['Normal'])
+    elements.append(report_info)
+    
+    # Add date adjustment notice if applicable
+    if fresh_report_data.get('date_adjusted'):
+        adjustment_notice = Paragraph(f"<b>Note:</b> Date range adjusted to include actual data. Original: {fresh_report_data['original_period']} → Adjusted: {fresh_report_data['adjusted_period']}", styles['Normal'])
+        elements.append(adjustment_notice)
+    
+    elements.append(Spacer(1, 30))
+    
+    # Generate report content based on type with fresh data
+    if report.report_type == 'income_statement':
+        elements.extend(generate_income_statement_pdf_content(fresh_report_data, currency_symbol, default_font))
+    elif report.report_type == 'balance_sheet':
+        elements.extend(generate_balance_sheet_pdf_content(fresh_report_data, currency_symbol, default_font))
+    else:
+        # Generic report display
+        elements.append(Paragraph("Report Data:", styles['Heading3']))
+        elements.append(Spacer(1, 10))
         
-        # Generate report content based on type with fresh data
-        if report.report_type == 'income_statement':
-            elements.extend(generate_income_statement_pdf_content(fresh_report_data, currency_symbol, default_font))
-        elif report.report_type == 'balance_sheet':
-            elements.extend(generate_balance_sheet_pdf_content(fresh_report_data, currency_symbol, default_font))
-        else:
-            # Generic report display
-            elements.append(Paragraph("Report Data:", styles['Heading3']))
-            elements.append(Spacer(1, 10))
+        # Display report data as table
+        if fresh_report_data:
+            # Handle currency symbol for PDF compatibility - try symbol first, fallback to text
+            pdf_currency = get_pdf_currency_symbol(currency_symbol, use_symbol=False)
             
-            # Display report data as table
-            if fresh_report_data:
-                # Handle currency symbol for PDF compatibility - try symbol first, fallback to text
-                pdf_currency = get_pdf_currency_symbol(currency_symbol, use_symbol=False)
-                
-                table_data = [['Item', 'Value']]
-                for key, value in fresh_report_data.items():
-                    if key not in ['date_adjusted', 'original_period', 'adjusted_period', 'debug_info']:
-                        if isinstance(value, (int, float)):
-                            table_data.append([key.replace('_', ' ').title(), f"{pdf_currency} {value:,.2f}"])
-                        else:
-                            table_data.append([key.replace('_', ' ').title(), str(value)])
-                
-                # Determine font names based on whether we're using a custom font or built-in Helvetica
-                if default_font == 'Helvetica':
-                    header_font = 'Helvetica-Bold'
-                    bold_font = 'Helvetica-Bold'
-                else:
-                    # For custom fonts, use the regular font name (no bold variant available)
-                    header_font = default_font
-                    bold_font = default_font
-                
-                table = Table(table_data, colWidths=[3*inch, 2*inch])
-                style = TableStyle([
-                    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                    ('FONTNAME', (0, 0), (-1, 0), header_font),
-                    ('FONTSIZE', (0, 0), (-1, -1), 10),
-                    ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                    ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
-                ])
-                table.setStyle(style)
-                elements.append(table)
-        
-        # Build PDF
-        doc.build(elements)
-        
-        # Get the value of the BytesIO buffer and write it to the response
-        pdf = buffer.getvalue()
-        buffer.close()
-        response.write(pdf)
-        
-        return response
-        
-    except Exception as e:
-        messages.error(request, f"Error generating PDF: {str(e)}")
-        return redirect('accounting:view_report', report_id=report.id)
+            table_data = [['Item', 'Value']]
+            for key, value in fresh_report_data.items():
+                if key not in ['date_adjusted', 'original_period', 'adjusted_period', 'debug_info']:
+                    if isinstance(value, (int, float)):
+                        table_data.append([key.replace('_', ' ').title(), f"{pdf_currency} {value:,.2f}"])
+                    else:
+                        table_data.append([key.replace('_', ' ').title(), str(value)])
+            
+            # Determine font names based on whether we're using a custom font or built-in Helvetica
+            if default_font == 'Helvetica':
+                header_font = 'Helvetica-Bold'
+                bold_font = 'Helvetica-Bold'
+            else:
+                # For custom fonts, use the regular font name (no bold variant available)
+                header_font = default_font
+                bold_font = default_font
+            
+            table = Table(table_data, colWidths=[3*inch, 2*inch])
+            style = TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                ('FONTNAME', (0, 0), (-1, 0), header_font),
+                ('FONTSIZE', (0, 0), (-1, -1), 10),
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('ALIGN', (1, 1), (1, -1), 'RIGHT'),
+            ])
+            table.setStyle(style)
+            elements.append(table)
+    
+    # Build PDF
+    doc.build(elements)
+    
+    # Get the value of the BytesIO buffer
+    pdf = buffer.getvalue()
+    buffer.close()
+    
+    return pdf
 
 
 def generate_income_statement_pdf_content(report_data, currency_symbol, default_font='Helvetica'):
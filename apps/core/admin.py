@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import CompanyProfile, BankAccount
+from .models import CompanyProfile, BankAccount, CacheVersion, Job
 
 
 @admin.register(CompanyProfile)
@@ -110,6 +110,26 @@ class BankAccountAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('company', 'company__user')
 
 
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'title', 'user', 'status', 'progress', 'attempts', 'worker', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['title', 'kind', 'user__email', 'message']
+    readonly_fields = ['created_at', 'started_at', 'heartbeat_at', 'finished_at']
+    actions = ['requeue_jobs']
+
+    def requeue_jobs(self, request, queryset):
+        updated = queryset.exclude(status='running').update(status='queued', progress=0, error='', finished_at=None)
+        self.message_user(request, f"{updated} jobs queued again.")
+    requeue_jobs.short_description = "Queue selected jobs again"
+
+
+@admin.register(CacheVersion)
+class CacheVersionAdmin(admin.ModelAdmin):
+    list_display = ['namespace', 'version']
+    search_fields = ['namespace']
+
+
 # Update CompanyProfile admin to include bank accounts inline
 CompanyProfileAdmin.inlines = [BankAccountInline]
 
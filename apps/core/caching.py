@@ -0,0 +1,87 @@
+"""
+Versioned cache namespaces.
+
+Each namespace (for example one user's inventory) has a version counter,
+and every key cached under the namespace includes the current version.
+Invalidating the namespace is one counter increment: entries made under the
+old version are never read again and expire on their own, so writers no
+longer need to know which keys readers have set.
+
+    key = versioned_key('inventory_header', [f'inventory:user:{user.pk}'], filters)
+    stats = cache_get_or_set(key, lambda: compute_stats(...))
+
+    bump_versions(f'inventory:user:{user.pk}')
+
+The counters are CacheVersion rows rather than cache entries: the default
+cache is per process, and a bump made by the runjobs worker, a management
+command or another web worker has to reach every process. A bump inside a
+database transaction also only becomes visible when the write it
+invalidates for is committed.
+
+Template fragments use the same versions through ``{% cache %}``, with
+``namespace_token()`` as one of the vary-on values.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+DEFAULT_FRAGMENT_CACHE_TIMEOUT = 900
+
+
+def _initial_version() -> int:
+    # Counters start from the clock, so a counter that was deleted never comes
+    # back at a version that old entries were cached under
+    return int(time.time() * 1000)
+
+
+def get_versions(*namespaces: str) -> dict:
+    """Current version of each namespace, creating missing counters"""
+    from .models import CacheVersion
+
+    versions = dict(CacheVersion.objects.filter(namespace__in=namespaces).values_list('namespace', 'version'))
+    missing = [namespace for namespace in namespaces if namespace not in versions]
+    if missing:
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(namespace=namespace, version=_initial_version()) for namespace in missing],
+            ignore_conflicts=True,
+        )
+        # Another process may have created some of them first
+        versions.update(CacheVersion.objects.filter(namespace__in=missing).values_list('namespace', 'version'))
+    return versions
+
+
+def namespace_token(*namespaces: str) -> str:
+    """One string that changes whenever any of the namespaces is bumped"""
+    versions = get_versions(*namespaces)
+    return '.'.join(str(versions[namespace]) for namespace in namespaces)
+
+
+def bump_versions(*namespaces: str) -> None:
+    """Invalidate everything cached under the namespaces"""
+    from .models import CacheVersion
+
+    # A namespace without a counter has nothing cached under it yet
+    CacheVersion.objects.filter(namespace__in=namespaces).update(version=F('version') + 1)
+
+
+def versioned_key(prefix: str, namespaces, *parts) -> str:
+    """Cache key for a value that is valid until one of the namespaces is bumped"""
+    raw = ':'.join(str(part) for part in parts)
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'{prefix}:{namespace_token(*namespaces)}:{digest}'
+
+
+def fragment_cache_timeout() -> int:
+    return getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', DEFAULT_FRAGMENT_CACHE_TIMEOUT)
+
+
+def cache_get_or_set(key: str, compute, timeout=None):
+    """Cached value for key, computing and storing it on a miss"""
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, fragment_cache_timeout() if timeout is None else timeout)
+    return value
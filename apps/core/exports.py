@@ -0,0 +1,314 @@
+"""
+Streaming exports.
+
+Rows are read with queryset.iterator() in chunks, formatted one at a time
+and written while the response is being sent, so an export uses the same
+memory for fifty rows as for half a million and the first bytes go out
+before the last row has been read.
+
+Excel files are written with openpyxl's write-only mode: rows go straight
+to a temporary file as they are appended and cell styles are named styles
+registered once per workbook, so a sheet never exists in memory as a whole.
+"""
+import csv
+import io
+import os
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Bytes of CSV collected before a chunk is handed to the server
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def export_chunk_size() -> int:
+    """Rows fetched from the database per round trip"""
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def iter_values(queryset, fields, chunk_size=None):
+    """
+    Iterate tuples of the given fields without building model instances.
+
+    The results are not cached on the queryset, and PostgreSQL reads them
+    through a server-side cursor.
+    """
+    return queryset.values_list(*fields).iterator(chunk_size=chunk_size or export_chunk_size())
+
+
+def iter_instances(queryset, chunk_size=None):
+    """Iterate model instances in chunks without caching them on the queryset"""
+    return queryset.iterator(chunk_size=chunk_size or export_chunk_size())
+
+
+def iter_csv(headers, rows):
+    """
+    Format rows as CSV text, yielding it in buffered pieces.
+
+    Args:
+        headers: The header row
+        rows: Iterable of row sequences, consumed lazily
+
+    Yields:
+        CSV text, the header row first and then about STREAM_BUFFER_SIZE at a time
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= STREAM_BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def streaming_csv_response(filename, headers, rows):
+    """
+    CSV download that is generated while it is sent.
+
+    Args:
+        filename: Download name, including the .csv extension
+        headers: The header row
+        rows: Iterable of row sequences; usually a generator over iter_values()
+
+    Returns:
+        StreamingHttpResponse
+    """
+    response = StreamingHttpResponse(iter_csv(headers, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+BRAND_COLOR = '2E86AB'
+
+_THIN = Side(style='thin')
+_LIGHT = Side(style='thin', color='CCCCCC')
+
+
+def _excel_styles(header_color):
+    """Named styles shared by every cell of an export workbook"""
+    return [
+        NamedStyle(name='export_title', font=Font(size=18, bold=True, color=BRAND_COLOR),
+                   alignment=Alignment(horizontal='left', vertical='center')),
+        NamedStyle(name='export_details', font=Font(size=10, color='666666'),
+                   alignment=Alignment(horizontal='left', vertical='center')),
+        NamedStyle(name='export_caption', font=Font(size=12, bold=True, italic=True, color=BRAND_COLOR),
+                   alignment=Alignment(horizontal='left', vertical='center')),
+        NamedStyle(name='export_header', font=Font(bold=True, color='FFFFFF', size=11),
+                   fill=PatternFill(start_color=header_color, end_color=header_color, fill_type='solid'),
+                   alignment=Alignment(horizontal='center', vertical='center'),
+                   border=Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)),
+        NamedStyle(name='export_cell', border=Border(left=_LIGHT, right=_LIGHT, top=_LIGHT, bottom=_LIGHT)),
+        NamedStyle(name='export_cell_alt', border=Border(left=_LIGHT, right=_LIGHT, top=_LIGHT, bottom=_LIGHT),
+                   fill=PatternFill(start_color='F8F9FA', end_color='F8F9FA', fill_type='solid')),
+        NamedStyle(name='export_total', font=Font(bold=True, size=11),
+                   fill=PatternFill(start_color='E9ECEF', end_color='E9ECEF', fill_type='solid'),
+                   border=Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)),
+        NamedStyle(name='export_label', font=Font(bold=True)),
+        NamedStyle(name='export_section', font=Font(bold=True, size=12, color=BRAND_COLOR)),
+    ]
+
+
+class ExcelExport:
+    """
+    A one-sheet workbook written row by row.
+
+    Rows must be added top to bottom: branding first, then the header row,
+    the data rows and any totals. Column widths have to be known before the
+    first row, so they come from the headers unless given explicitly.
+
+    Usage:
+        export = ExcelExport('Invoices')
+        export.add_header(headers)
+        export.add_rows(row_generator)
+        return export.response('invoices.xlsx')
+    """
+
+    def __init__(self, title, header_color=BRAND_COLOR):
+        self.workbook = Workbook(write_only=True)
+        for style in _excel_styles(header_color):
+            self.workbook.add_named_style(style)
+        self._formats = {}
+        self.sheet = self.workbook.create_sheet(title)
+        self.row_count = 0
+        self._widths_set = False
+
+    def style(self, base, number_format=None):
+        """Name of a style, registering a variant with the number format the first time it is used"""
+        if not number_format:
+            return base
+        key = (base, number_format)
+        if key not in self._formats:
+            parent = next(style for style in self.workbook._named_styles if style.name == base)
+            name = f'{base}_{len(self._formats) + 1}'
+            self.workbook.add_named_style(NamedStyle(
+                name=name, font=parent.font, fill=parent.fill, border=parent.border,
+                alignment=parent.alignment, number_format=number_format
+            ))
+            self._formats[key] = name
+        return self._formats[key]
+
+    def set_widths(self, widths):
+        """Set column widths; only possible before the first row is written"""
+        if self.row_count:
+            return
+        for index, width in enumerate(widths, 1):
+            self.sheet.column_dimensions[get_column_letter(index)].width = width
+        self._widths_set = True
+
+    def cell(self, value, style=None):
+        cell = WriteOnlyCell(self.sheet, value=value)
+        if style:
+            cell.style = style
+        return cell
+
+    def add_row(self, values, style=None, styles=None):
+        """
+        Append one row.
+
+        Args:
+            values: Cell values
+            style: Style name for every cell
+            styles: Per-column style names, overriding style
+        """
+        if style or styles:
+            styles = styles or [style] * len(values)
+            values = [self.cell(value, cell_style) for value, cell_style in zip(values, styles)]
+        self.sheet.append(values)
+        self.row_count += 1
+
+    def add_blank(self, count=1):
+        for _ in range(count):
+            self.add_row([])
+
+    def add_branding(self, company_profile, caption):
+        """
+        Company logo, name and contact details, and a caption line.
+
+        Args:
+            company_profile: CompanyProfile, or None for no branding
+            caption: Report title shown under the company details
+        """
+        if not company_profile:
+            return
+        column = []
+        logo = company_profile.logo
+        if logo and hasattr(logo, 'path') and os.path.exists(logo.path):
+            try:
+                image = XLImage(logo.path)
+                image.width = 100
+                image.height = 60
+                self.sheet.add_image(image, f'A{self.row_count + 1}')
+                self.sheet.row_dimensions[self.row_count + 1].height = 50
+                column = [None]
+            except Exception:
+                column = []
+
+        self.add_row(column + [self.cell(company_profile.company_name, 'export_title')])
+
+        details = []
+        if company_profile.address:
+            details.append(company_profile.address)
+        if company_profile.phone:
+            details.append(f"Phone: {company_profile.phone}")
+        if company_profile.email:
+            details.append(f"Email: {company_profile.email}")
+        if company_profile.website:
+            details.append(f"Website: {company_profile.website}")
+        if details:
+            self.add_row(column + [self.cell(" | ".join(details), 'export_details')])
+
+        self.add_blank()
+        self.add_row(column + [self.cell(caption, 'export_caption')])
+        self.add_blank()
+
+    def add_header(self, headers):
+        """Header row; also sizes the columns from it unless set_widths() was called"""
+        if not self._widths_set and not self.row_count:
+            self.set_widths([min(max(len(str(header)) + 4, 12), 50) for header in headers])
+        self.add_row(headers, style='export_header')
+
+    def add_rows(self, rows, formats=None, striped=False):
+        """
+        Append rows from an iterable, usually a generator over a chunked queryset.
+
+        Args:
+            rows: Iterable of row sequences
+            formats: Per-column number formats (None for general); when omitted
+                and not striped, plain unstyled values are written
+            striped: Use the alternate fill on every second row
+
+        Returns:
+            Number of rows written
+        """
+        written = 0
+        if formats is None and not striped:
+            for row in rows:
+                self.sheet.append(row)
+                written += 1
+        else:
+            formats = formats or []
+            plain = [self.style('export_cell', number_format) for number_format in formats]
+            alternate = [self.style('export_cell_alt', number_format) for number_format in formats]
+            for row in rows:
+                written += 1
+                row_styles = alternate if striped and written % 2 == 0 else plain
+                if len(row_styles) < len(row):
+                    default = 'export_cell_alt' if row_styles is alternate else 'export_cell'
+                    row_styles = row_styles + [default] * (len(row) - len(row_styles))
+                self.sheet.append([self.cell(value, style) for value, style in zip(row, row_styles)])
+        self.row_count += written
+        return written
+
+    def response(self, filename):
+        """
+        Save the workbook to a temporary file and send it.
+
+        Args:
+            filename: Download name, including the .xlsx extension
+
+        Returns:
+            FileResponse that reads the file in blocks and closes it when done
+        """
+        handle = tempfile.TemporaryFile()
+        self.workbook.save(handle)
+        handle.seek(0)
+        return FileResponse(handle, as_attachment=True, filename=filename, content_type=EXCEL_CONTENT_TYPE)
+
+
+def excel_export_response(title, filename, headers, rows, **kwargs):
+    """
+    One-sheet Excel download with a styled header row and plain data rows.
+
+    Args:
+        title: Sheet title
+        filename: Download name, including the .xlsx extension
+        headers: The header row
+        rows: Iterable of row sequences; usually a generator over iter_values()
+        **kwargs: Passed to ExcelExport
+
+    Returns:
+        FileResponse
+    """
+    export = ExcelExport(title, **kwargs)
+    export.add_header(headers)
+    export.add_rows(rows)
+    return export.response(filename)
+
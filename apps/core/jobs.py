@@ -0,0 +1,187 @@
+"""
+Background jobs.
+
+Work that can outlast a web request (imports, large exports, reports) is
+stored as a Job row and run by ``manage.py runjobs``. Apps register a
+handler per job kind in their jobs.py, imported from AppConfig.ready():
+
+    @job_handler('inventory.export')
+    def export_inventory(job):
+        job.set_progress(50, 'Writing rows')
+        ...
+        return {'file_path': path, 'file_name': name}
+
+The handler's return value is stored on job.result. Results may carry
+``file_path`` (a default_storage path offered for download) and
+``redirect_url`` (where the progress page sends the user when done).
+
+JOBS_ASYNC is off by default: enqueue() then runs the job in the request,
+which keeps single-process deployments (runserver launchers, serverless)
+working without a worker. Deployments that start runjobs turn it on.
+
+This module avoids importing models at import time so it can be loaded by
+freshly spawned worker processes before Django is set up.
+"""
+import tempfile
+import traceback
+
+from django.conf import settings
+
+_handlers = {}
+
+
+def job_handler(kind):
+    """Register the function that runs jobs of a kind"""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def get_handler(kind):
+    return _handlers.get(kind)
+
+
+def enqueue(user, kind, payload=None, title=''):
+    """
+    Queue a job for the runjobs worker.
+
+    Args:
+        user: Owner of the job; only they can see its status and result
+        kind: Registered handler name
+        payload: JSON-serializable arguments for the handler
+        title: Shown on the progress page
+
+    Returns:
+        The Job
+    """
+    from .models import Job
+
+    if kind not in _handlers:
+        raise ValueError(f'No handler registered for job kind {kind!r}')
+    job = Job.objects.create(user=user, kind=kind, payload=payload or {}, title=title)
+    if not getattr(settings, 'JOBS_ASYNC', False):
+        claimed = Job.objects.filter(pk=job.pk, status='queued').update(status='running', attempts=1)
+        if claimed:
+            run_job(job.pk, worker='inline')
+        job.refresh_from_db()
+    return job
+
+
+def run_job(job_id, worker=''):
+    """
+    Run a claimed job and record its outcome.
+
+    Exceptions raised by the handler fail the job with their traceback;
+    they are not propagated.
+
+    Returns:
+        The job's final status
+    """
+    from django.db import close_old_connections
+    from django.utils import timezone
+    from .models import Job
+
+    close_old_connections()
+    job = Job.objects.select_related('user').get(pk=job_id)
+    handler = _handlers.get(job.kind)
+    # Handlers may go a long time between set_progress() calls (one large
+    # workbook write), so a worker keeps the heartbeat fresh on its own
+    stop_heartbeat = _start_heartbeat(job.pk) if worker != 'inline' else None
+    try:
+        if handler is None:
+            raise LookupError(f'No handler registered for job kind {job.kind!r}')
+        if not job.started_at:
+            job.started_at = timezone.now()
+            job.save(update_fields=['started_at'])
+        result = handler(job) or {}
+        job.mark_completed(result, result.get('message', ''))
+    except Exception:
+        print(f"❌ Job {job.pk} ({job.kind}) failed")
+        job.mark_failed(traceback.format_exc())
+    finally:
+        if stop_heartbeat:
+            stop_heartbeat()
+        close_old_connections()
+    return job.status
+
+
+def _start_heartbeat(job_id):
+    """
+    Refresh a running job's heartbeat_at every JOBS_HEARTBEAT_INTERVAL
+    seconds from a background thread, so requeue_stale() leaves jobs alone
+    while their process is alive.
+
+    Returns:
+        Function that stops the thread
+    """
+    import threading
+
+    from django.db import connection
+    from django.utils import timezone
+    from .models import Job
+
+    interval = getattr(settings, 'JOBS_HEARTBEAT_INTERVAL', 60)
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(interval):
+                try:
+                    Job.objects.filter(pk=job_id, status='running').update(heartbeat_at=timezone.now())
+                except Exception:
+                    # A busy database skips one beat; the next one retries
+                    pass
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, name=f'job-{job_id}-heartbeat', daemon=True)
+    thread.start()
+
+    def stop():
+        stopped.set()
+        thread.join()
+    return stop
+
+
+def init_worker():
+    """Process pool initializer: set up Django in a freshly spawned process"""
+    import django
+    django.setup()
+
+
+def save_result_file(path, content):
+    """
+    Store a job's output file.
+
+    Args:
+        path: default_storage path; a suffix is added if it is taken
+        content: bytes, or an iterable of bytes/str chunks such as a
+            response's streaming_content
+
+    Returns:
+        Tuple of (stored path, size in bytes)
+    """
+    from django.core.files import File
+    from django.core.files.storage import default_storage
+
+    if isinstance(content, (bytes, bytearray)):
+        content = [content]
+    with tempfile.TemporaryFile() as handle:
+        for chunk in content:
+            handle.write(chunk.encode() if isinstance(chunk, str) else chunk)
+        size = handle.tell()
+        handle.seek(0)
+        stored = default_storage.save(path, File(handle))
+    return stored, size
+
+
+def response_content(response):
+    """Iterate the body of an HttpResponse, StreamingHttpResponse or FileResponse"""
+    if response.streaming:
+        try:
+            yield from response.streaming_content
+        finally:
+            response.close()
+    else:
+        yield response.content
@@ -0,0 +1,112 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.core.jobs import init_worker, run_job
+from apps.core.models import Job
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (imports, exports, reports)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOBS_CONCURRENCY,
+            help='Jobs run at the same time, each in its own process (1 runs them in this process)'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds to wait before checking an empty queue again'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty')
+        parser.add_argument('--max-jobs', type=int, default=0, help='Exit after starting this many jobs')
+
+    def handle(self, *args, **options):
+        self.worker = f'{socket.gethostname()}:{os.getpid()}'
+        self.poll_interval = max(options['poll_interval'], 0.1)
+        self.once = options['once']
+        self.max_jobs = options['max_jobs']
+        self.started = 0
+        self.stopping = False
+        concurrency = max(options['concurrency'], 1)
+
+        signal.signal(signal.SIGTERM, self.stop)
+        self.stdout.write(f'Worker {self.worker} started with concurrency {concurrency}')
+        try:
+            if concurrency == 1:
+                self.run_inline()
+            else:
+                self.run_pool(concurrency)
+        except KeyboardInterrupt:
+            self.stdout.write('Interrupted; running jobs were allowed to finish')
+
+        self.stdout.write(self.style.SUCCESS(f'Worker {self.worker} stopped after {self.started} jobs'))
+
+    def stop(self, signum, frame):
+        """Stop claiming jobs; the running ones finish first"""
+        self.stopping = True
+
+    def can_claim(self):
+        return not self.stopping and not (self.max_jobs and self.started >= self.max_jobs)
+
+    def claim(self):
+        requeued, failed = Job.requeue_stale(settings.JOBS_STALE_TIMEOUT, settings.JOBS_MAX_ATTEMPTS)
+        if requeued or failed:
+            self.stdout.write(f'Recovered stale jobs: {requeued} re-queued, {failed} failed')
+        job = Job.claim_next(self.worker)
+        if job:
+            self.started += 1
+            self.stdout.write(f'Started job {job.pk} ({job.kind}) for user {job.user_id}')
+        return job
+
+    def report(self, job_id, status):
+        style = self.style.SUCCESS if status == 'completed' else self.style.ERROR
+        self.stdout.write(style(f'Job {job_id} {status}'))
+
+    def run_inline(self):
+        while self.can_claim():
+            job = self.claim()
+            if job is None:
+                if self.once:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.report(job.pk, run_job(job.pk, self.worker))
+
+    def run_pool(self, concurrency):
+        # Spawned workers set Django up themselves instead of inheriting this
+        # process's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        running = {}
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=context, initializer=init_worker) as pool:
+            while True:
+                while len(running) < concurrency and self.can_claim():
+                    job = self.claim()
+                    if job is None:
+                        break
+                    running[pool.submit(run_job, job.pk, self.worker)] = job.pk
+
+                if not running:
+                    if self.once or not self.can_claim():
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        status = future.result()
+                    except Exception as e:
+                        # The worker process died; the job cannot have recorded this itself
+                        Job.objects.get(pk=job_id).mark_failed(f'Worker process error: {e}')
+                        status = 'failed'
+                    self.report(job_id, status)
@@ -1,5 +1,8 @@
 import os
+from datetime import timedelta
 from django.db import models
+from django.db.models import F
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
 from django.urls import reverse
@@ -177,3 +180,135 @@ class BankAccount(models.Model):
         if self.is_default:
             BankAccount.objects.filter(company=self.company, is_default=True).update(is_default=False)
         super().save(*args, **kwargs)
+
+
+class Job(models.Model):
+    """
+    A unit of background work, run by the runjobs management command.
+
+    Workers claim queued jobs with a conditional UPDATE, so several worker
+    processes (or machines) can share the table without a broker. Running
+    jobs refresh heartbeat_at as they report progress and from a heartbeat
+    thread in run_job(); jobs whose worker went away are re-queued by
+    requeue_stale().
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='jobs')
+    kind = models.CharField(max_length=50, help_text="Registered handler name, e.g. inventory.export")
+    title = models.CharField(max_length=255, blank=True)
+    payload = models.JSONField(default=dict, blank=True)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    progress = models.PositiveSmallIntegerField(default=0, help_text="Percent complete")
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    
+    attempts = models.PositiveSmallIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Background Job'
+        verbose_name_plural = 'Background Jobs'
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.title or self.kind} ({self.get_status_display()})"
+    
+    def get_absolute_url(self):
+        return reverse('core:job_detail', kwargs={'pk': self.pk})
+    
+    @property
+    def is_finished(self):
+        return self.status in ('completed', 'failed')
+    
+    @classmethod
+    def claim_next(cls, worker):
+        """
+        Take the oldest queued job for this worker.
+        
+        Returns:
+            The claimed Job, or None when the queue is empty
+        """
+        candidates = cls.objects.filter(status='queued').order_by('created_at', 'id').values_list('id', flat=True)[:10]
+        for job_id in candidates:
+            now = timezone.now()
+            claimed = cls.objects.filter(pk=job_id, status='queued').update(
+                status='running', worker=worker[:100], started_at=now, heartbeat_at=now,
+                attempts=F('attempts') + 1
+            )
+            if claimed:
+                return cls.objects.get(pk=job_id)
+        return None
+    
+    @classmethod
+    def requeue_stale(cls, timeout, max_attempts):
+        """
+        Recover jobs whose worker stopped sending heartbeats.
+        
+        Jobs with attempts left go back to the queue; the others fail.
+        
+        Returns:
+            Tuple of (requeued count, failed count)
+        """
+        now = timezone.now()
+        stale = cls.objects.filter(status='running', heartbeat_at__lt=now - timedelta(seconds=timeout))
+        requeued = stale.filter(attempts__lt=max_attempts).update(status='queued', worker='', message='Re-queued after the worker stopped')
+        failed = stale.update(status='failed', finished_at=now, error='The worker stopped responding')
+        return requeued, failed
+    
+    def set_progress(self, progress, message=''):
+        """Record progress; also serves as the heartbeat of a running job"""
+        self.progress = max(0, min(int(progress), 100))
+        self.message = str(message)[:255]
+        self.heartbeat_at = timezone.now()
+        Job.objects.filter(pk=self.pk).update(
+            progress=self.progress, message=self.message, heartbeat_at=self.heartbeat_at
+        )
+    
+    def mark_completed(self, result=None, message=''):
+        self.status = 'completed'
+        self.progress = 100
+        self.result = result or {}
+        self.message = str(message or self.message)[:255]
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'progress', 'result', 'message', 'finished_at'])
+    
+    def mark_failed(self, error):
+        self.status = 'failed'
+        self.error = str(error)
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'finished_at'])
+
+
+class CacheVersion(models.Model):
+    """
+    Version counter of a cache namespace (see apps.core.caching). Kept in the
+    database so every process (web workers, runjobs, management commands)
+    sees the same versions even though cached values live in a per-process
+    cache.
+    """
+    namespace = models.CharField(max_length=200, primary_key=True)
+    version = models.BigIntegerField()
+    
+    class Meta:
+        verbose_name = 'Cache Version'
+        verbose_name_plural = 'Cache Versions'
+    
+    def __str__(self):
+        return f"{self.namespace} v{self.version}"
@@ -0,0 +1,367 @@
+"""
+Pagination for long lists.
+
+Page-number pagination runs a COUNT(*) and an OFFSET scan that gets slower
+the deeper the user pages. Keyset pagination remembers the sort key of the
+row at the edge of the current page and asks for the rows after (or before)
+it, so page 400 costs the same index range scan as page 1.
+
+``paginate()`` keeps the page-number mode for small result sets and switches
+to keyset mode once a list is larger than ``PAGINATION_KEYSET_THRESHOLD``
+rows. Totals are cached for a short while, or estimated from the query plan
+on PostgreSQL when ``PAGINATION_COUNT_MODE`` is 'estimate'.
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+DEFAULT_KEYSET_THRESHOLD = 1000
+DEFAULT_COUNT_CACHE_TIMEOUT = 60
+
+
+def _key_value(value):
+    """JSON form of a sort key value; datetimes keep their microseconds"""
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'as_tuple'):  # Decimal
+        return str(value)
+    return value
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the paginated list"""
+
+
+def encode_cursor(values, reverse=False, offset=0) -> str:
+    """
+    Encode a sort key position as an opaque URL-safe cursor.
+
+    Args:
+        values: Sort key values of the boundary row
+        reverse: True for a cursor pointing at the rows before the boundary
+        offset: Position of the boundary in the full list, used for row numbering
+
+    Returns:
+        Base64 cursor string
+    """
+    payload = json.dumps({'v': [_key_value(value) for value in values], 'r': int(reverse), 'o': offset})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    """Decode a cursor into (values, reverse, offset)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return list(payload['v']), bool(payload.get('r')), max(int(payload.get('o', 0)), 0)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+def count_cache_key(queryset) -> str:
+    """Cache key for the row count of a queryset, derived from its SQL"""
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.md5(f'{queryset.db}:{sql}:{params!r}'.encode()).hexdigest()
+    return f'pagination_count_{digest}'
+
+
+def estimate_count(queryset):
+    """Planner row estimate for a queryset, or None where the database has none"""
+    if queryset.db and settings.DATABASES[queryset.db]['ENGINE'].endswith('postgresql'):
+        try:
+            plan = json.loads(queryset.order_by().explain(format='json'))
+            return int(plan[0]['Plan']['Plan Rows'])
+        except Exception:
+            return None
+    return None
+
+
+def get_total(queryset, mode=None):
+    """
+    Total rows for a paginated list.
+
+    Args:
+        queryset: The filtered list queryset
+        mode: 'exact', 'cached' or 'estimate'; defaults to PAGINATION_COUNT_MODE
+
+    Returns:
+        Row count; estimates fall back to a cached exact count
+    """
+    mode = mode or getattr(settings, 'PAGINATION_COUNT_MODE', 'cached')
+    if mode == 'exact':
+        return queryset.count()
+
+    if mode == 'estimate':
+        estimate = estimate_count(queryset)
+        if estimate is not None:
+            return estimate
+
+    key = count_cache_key(queryset)
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, getattr(settings, 'PAGINATION_COUNT_CACHE_TIMEOUT', DEFAULT_COUNT_CACHE_TIMEOUT))
+    return total
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by sort key instead of offset.
+
+    The ordering must end in a unique field; the primary key is appended when
+    it does not. Only concrete fields of the model can be used as keys.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None, count=None):
+        ordering = list(ordering or queryset.query.order_by or queryset.model._meta.ordering or ['-pk'])
+        names = [name.lstrip('-') for name in ordering]
+        if 'pk' not in names and 'id' not in names:
+            ordering.append('-pk' if ordering[-1].startswith('-') else 'pk')
+
+        self.model = queryset.model
+        self.per_page = int(per_page)
+        self.ordering = ordering
+        self.keys = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.queryset = queryset.order_by(*ordering)
+        self.count = count
+
+    @property
+    def num_pages(self):
+        if self.count is None:
+            return None
+        return max((self.count + self.per_page - 1) // self.per_page, 1)
+
+    def _field(self, name):
+        if name == 'pk':
+            return self.model._meta.pk
+        return self.model._meta.get_field(name)
+
+    def key_values(self, obj):
+        """Sort key values of a row"""
+        return [getattr(obj, name) for name, _ in self.keys]
+
+    def _boundary_filter(self, values, reverse):
+        """Q matching the rows after the boundary, or before it when reverse"""
+        if len(values) != len(self.keys):
+            raise InvalidCursor('Cursor does not match the list ordering')
+        values = [self._field(name).to_python(value) for (name, _), value in zip(self.keys, values)]
+
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self.keys, values):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page(self, cursor=None):
+        """
+        Return the page at a cursor, or the first page for a missing or invalid one.
+
+        Args:
+            cursor: Cursor string from a previous page's next/previous cursor
+
+        Returns:
+            KeysetPage
+        """
+        values, reverse, offset = None, False, 0
+        if cursor:
+            try:
+                values, reverse, offset = decode_cursor(cursor)
+                condition = self._boundary_filter(values, reverse)
+            except (InvalidCursor, ValidationError, ValueError, TypeError):
+                values, reverse, offset = None, False, 0
+
+        if values is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            has_previous, has_next = False, len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            start = 0
+        elif not reverse:
+            rows = list(self.queryset.filter(condition)[:self.per_page + 1])
+            has_previous, has_next = True, len(rows) > self.per_page
+            rows = rows[:self.per_page]
+            start = offset
+        else:
+            backwards = [name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering]
+            rows = list(self.queryset.filter(condition).order_by(*backwards)[:self.per_page + 1])
+            has_previous, has_next = len(rows) > self.per_page, True
+            rows = rows[:self.per_page][::-1]
+            start = max(offset - len(rows), 0)
+            if not has_previous:
+                start = 0
+
+        return KeysetPage(rows, self, start, has_previous, has_next)
+
+
+class KeysetPage:
+    """A page of a KeysetPaginator, usable where templates expect a Django Page"""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, start, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.start = start
+        self._has_previous = has_previous
+        self._has_next = has_next
+        self.number = start // paginator.per_page + 1
+        self.first_query = self.next_query = self.previous_query = ''
+
+    def __repr__(self):
+        return f'<Keyset page {self.number}>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def start_index(self):
+        return self.start + 1 if self.object_list else 0
+
+    def end_index(self):
+        return self.start + len(self.object_list)
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key_values(self.object_list[-1]), False, self.end_index())
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(self.paginator.key_values(self.object_list[0]), True, self.start)
+
+
+def _query_string(params, **updates):
+    query = params.copy()
+    for name in ('page', 'cursor'):
+        query.pop(name, None)
+    for name, value in updates.items():
+        if value is not None:
+            query[name] = value
+    return query.urlencode()
+
+
+def paginate(request, queryset, per_page, ordering=None, count=None, keyset=True):
+    """
+    Paginate a list view, switching to keyset mode for large result sets.
+
+    Keyset pages are requested with ?cursor=; page-number pages with ?page=
+    as before. Keyset pages carry first_query, next_query and previous_query
+    (the request's query string with the cursor replaced) for the
+    core/keyset_pagination.html include.
+
+    Args:
+        request: The current request
+        queryset: The filtered list queryset
+        per_page: Rows per page
+        ordering: Sort keys, defaulting to the queryset's ordering
+        count: Total rows if the view already knows it
+        keyset: False to always use page numbers, e.g. for relevance-ranked results
+
+    Returns:
+        A Django Page or a KeysetPage
+    """
+    cursor = request.GET.get('cursor') if keyset else None
+    total = count if count is not None else get_total(queryset)
+    if not cursor:
+        threshold = getattr(settings, 'PAGINATION_KEYSET_THRESHOLD', DEFAULT_KEYSET_THRESHOLD)
+        if not keyset or total <= threshold:
+            paginator = Paginator(queryset, per_page)
+            paginator.count = total
+            return paginator.get_page(request.GET.get('page'))
+
+    page = KeysetPaginator(queryset, per_page, ordering, count=total).get_page(cursor)
+    page.first_query = _query_string(request.GET)
+    page.next_query = _query_string(request.GET, cursor=page.next_cursor)
+    page.previous_query = _query_string(request.GET, cursor=page.previous_cursor)
+    return page
+
+
+class KeysetAPIPagination(BasePagination):
+    """
+    DRF pagination on KeysetPaginator.
+
+    Responses keep the shape of PageNumberPagination ({count, next, previous,
+    results}); next and previous are cursor links.
+    """
+
+    page_size = None
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    ordering = None
+
+    def get_page_size(self, request):
+        page_size = self.page_size or settings.REST_FRAMEWORK.get('PAGE_SIZE', 50)
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except (TypeError, ValueError):
+            requested = page_size
+        return min(max(requested, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'keyset_ordering', None) or self.ordering
+        self.request = request
+        self.paginator = KeysetPaginator(queryset, self.get_page_size(request), ordering)
+        # Views that already counted the list (e.g. for an ETag) leave it on list_count
+        count = getattr(view, 'list_count', None)
+        self.paginator.count = count if count is not None else get_total(queryset)
+        self.page = self.paginator.get_page(request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(remove_query_param(url, 'page'), self.cursor_query_param, cursor)
+
+    def get_next_link(self):
+        return self._link(self.page.next_cursor)
+
+    def get_previous_link(self):
+        return self._link(self.page.previous_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer'},
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
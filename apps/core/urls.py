@@ -12,4 +12,7 @@ urlpatterns = [
     path('bank-accounts/<int:pk>/delete/', views.delete_bank_account, name='delete_bank_account'),
     path('bank-accounts/<int:pk>/set-default/', views.set_default_bank_account, name='set_default_bank_account'),
     path('update-currency/', views.update_currency, name='update_currency'),
+    path('jobs/<int:pk>/', views.job_detail, name='job_detail'),
+    path('jobs/<int:pk>/status/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
 ]
@@ -303,3 +303,46 @@ def apply_custom_charges(base_amount, custom_charges):
         'total_charges': total_charges,
         'final_amount': float(base_amount) + total_charges
     }
+
+
+def bulk_update_rows(objs, fields, using=None):
+    """
+    Write the given fields of many saved instances in one executemany() call.
+    
+    Django's bulk_update() builds a CASE WHEN expression for every field of
+    every row, which costs around a millisecond per row for wide updates.
+    This sends a single parameterized UPDATE ... WHERE pk = %s per row
+    instead. Like bulk_update(), it skips save() and signals, and auto_now
+    fields must be set by the caller.
+    
+    Args:
+        objs: Saved model instances, all of the same model
+        fields: Names of the concrete fields to write
+        using: Database alias, the model's write database if not given
+    
+    Returns:
+        int: Number of rows sent
+    """
+    from django.db import connections, router
+    
+    objs = list(objs)
+    if not objs:
+        return 0
+    
+    model = type(objs[0])
+    meta = model._meta
+    connection = connections[using or router.db_for_write(model)]
+    concrete_fields = [meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        quote(meta.db_table),
+        ', '.join(f'{quote(field.column)} = %s' for field in concrete_fields),
+        quote(meta.pk.column),
+    )
+    params = [
+        [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in concrete_fields] + [obj.pk]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(params)
@@ -1,12 +1,13 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.http import JsonResponse
+from django.http import FileResponse, Http404, JsonResponse
+from django.urls import reverse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_GET, require_http_methods
 import json
 
-from .models import CompanyProfile, BankAccount
+from .models import CompanyProfile, BankAccount, Job
 from .forms import CompanyProfileForm, BankAccountForm
 from .utils import get_currency_info
 
@@ -243,3 +244,57 @@ def update_currency(request):
         print(f"Currency update error: {str(e)}")
         print(f"Traceback: {traceback.format_exc()}")
         return JsonResponse({'success': False, 'error': f'Failed to update currency: {str(e)}'})
+
+
+def job_status_data(job):
+    """Status of a background job as returned to the progress page"""
+    data = {
+        'success': True,
+        'id': job.pk,
+        'title': job.title,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'message': job.message,
+        'is_finished': job.is_finished,
+        'download_url': None,
+        'redirect_url': job.result.get('redirect_url') if job.status == 'completed' else None,
+    }
+    if job.status == 'completed' and job.result.get('file_path'):
+        data['download_url'] = reverse('core:job_download', kwargs={'pk': job.pk})
+    if job.status == 'failed':
+        # Tracebacks stay in the admin; users get the last line
+        data['error'] = job.error.strip().splitlines()[-1] if job.error.strip() else 'The job failed.'
+    return data
+
+
+@login_required
+def job_detail(request, pk):
+    """Progress page for a background job"""
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    context = {
+        'job': job,
+        'status': job_status_data(job),
+    }
+    return render(request, 'core/job_detail.html', context)
+
+
+@require_GET
+@login_required
+def job_status(request, pk):
+    """Poll the status of a background job via AJAX"""
+    job = get_object_or_404(Job, pk=pk, user=request.user)
+    return JsonResponse(job_status_data(job))
+
+
+@login_required
+def job_download(request, pk):
+    """Download the file produced by a background job"""
+    from django.core.files.storage import default_storage
+    
+    job = get_object_or_404(Job, pk=pk, user=request.user, status='completed')
+    file_path = job.result.get('file_path')
+    if not file_path or not default_storage.exists(file_path):
+        raise Http404("The file for this job is no longer available.")
+    file_name = job.result.get('file_name') or file_path.rsplit('/', 1)[-1]
+    return FileResponse(default_storage.open(file_path, 'rb'), as_attachment=True, filename=file_name)
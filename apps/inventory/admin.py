@@ -5,7 +5,7 @@ from django.utils.safestring import mark_safe
 from .models import (
     InventoryLayout, InventoryItem, InventoryStatus, InventoryCustomField,
     InventoryTransaction, InventoryLog, ImportedInventoryFile, InventoryExport,
-    InventoryTemplate,
+    InventoryTemplate, InventoryStats, InventoryValuationSnapshot, InventoryForecast,
     # Legacy models
     InventoryProduct, InventoryCategory
 )
@@ -72,7 +72,7 @@ class InventoryItemAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Basic Information', {
-            'fields': ('user', 'layout', 'product_name', 'sku_code', 'status', 'is_active')
+            'fields': ('user', 'layout', 'product_name', 'sku_code', 'status', 'category', 'is_active')
         }),
         ('Dynamic Data', {
             'fields': ('data', 'calculated_data'),
@@ -232,8 +232,8 @@ class ImportedInventoryFileAdmin(admin.ModelAdmin):
 
 @admin.register(InventoryExport)
 class InventoryExportAdmin(admin.ModelAdmin):
-    list_display = ['layout', 'format', 'user', 'total_items', 'file_size', 'include_calculations', 'include_branding', 'created_at']
-    list_filter = ['format', 'include_calculations', 'include_branding', 'created_at']
+    list_display = ['layout', 'format', 'user', 'total_items', 'file_size', 'include_calculations', 'include_branding', 'needs_refresh', 'created_at']
+    list_filter = ['format', 'include_calculations', 'include_branding', 'needs_refresh', 'created_at']
     search_fields = ['layout__name', 'user__email']
     readonly_fields = ['created_at', 'file_size']
     ordering = ['-created_at']
@@ -246,7 +246,7 @@ class InventoryExportAdmin(admin.ModelAdmin):
             'fields': ('include_calculations', 'include_branding', 'filters', 'export_settings')
         }),
         ('Statistics', {
-            'fields': ('total_items', 'created_at')
+            'fields': ('total_items', 'needs_refresh', 'created_at')
         }),
     )
     
@@ -282,6 +282,38 @@ class InventoryTemplateAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user')
 
 
+@admin.register(InventoryStats)
+class InventoryStatsAdmin(admin.ModelAdmin):
+    list_display = ['user', 'layout', 'total_items', 'active_items', 'low_stock_items', 'total_value', 'updated_at']
+    search_fields = ['user__email', 'layout__name']
+    readonly_fields = ['total_items', 'active_items', 'low_stock_items', 'total_value', 'status_counts', 'updated_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'layout')
+
+
+@admin.register(InventoryValuationSnapshot)
+class InventoryValuationSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['snapshot_date', 'user', 'layout', 'category', 'status', 'item_count', 'total_quantity', 'total_value']
+    list_filter = ['snapshot_date', 'status']
+    search_fields = ['user__email', 'layout__name', 'category']
+    date_hierarchy = 'snapshot_date'
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'layout', 'status')
+
+
+@admin.register(InventoryForecast)
+class InventoryForecastAdmin(admin.ModelAdmin):
+    list_display = ['item', 'user', 'daily_velocity', 'days_of_cover', 'reorder_point', 'suggested_order', 'needs_reorder', 'computed_at']
+    list_filter = ['needs_reorder']
+    search_fields = ['item__product_name', 'item__sku_code', 'user__email']
+    readonly_fields = ['computed_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('item', 'user')
+
+
 # Legacy models for backward compatibility
 @admin.register(InventoryProduct)
 class InventoryProductAdmin(admin.ModelAdmin):
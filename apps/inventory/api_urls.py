@@ -1,16 +1,18 @@
-from django.urls import path
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
 from . import views
+from . import api_views
 
 app_name = 'inventory_api'
 
+router = DefaultRouter()
+router.register(r'items', api_views.InventoryItemViewSet, basename='item')
+router.register(r'layouts', api_views.InventoryLayoutViewSet, basename='layout')
+router.register(r'transactions', api_views.InventoryTransactionViewSet, basename='transaction')
+
 urlpatterns = [
-    # Basic inventory endpoints
-    path('items/', views.inventory_list, name='item_list'),
-    path('items/<int:pk>/', views.inventory_detail, name='item_detail'),
-    
-    # Layout endpoints
-    path('layouts/', views.layout_list, name='layout_list'),
-    path('layouts/<int:pk>/', views.layout_detail, name='layout_detail'),
+    # Items, layouts and transactions
+    path('', include(router.urls)),
     
     # AJAX endpoints
     path('ajax/update-field/', views.ajax_update_field, name='ajax_update_field'),
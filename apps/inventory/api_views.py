@@ -0,0 +1,207 @@
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.core.pagination import KeysetAPIPagination
+from .importers import InventoryUpserter
+from .models import InventoryItem, InventoryLayout, InventoryLog, InventoryTransaction
+from .search import search_items
+from .serializers import (
+    InventoryItemSerializer, InventoryItemUpsertSerializer, InventoryLayoutSerializer,
+    InventoryTransactionSerializer
+)
+
+
+class ConditionalGetMixin:
+    """
+    ETag and Last-Modified for list and detail GETs.
+
+    Lists are validated with one aggregate (latest modified_field and row
+    count) over the filtered queryset, so a client polling an unchanged list
+    gets a 304 without any rows being loaded or serialized.
+    """
+
+    modified_field = 'updated_at'
+
+    def _conditional_headers(self, request, last_modified, *parts):
+        key = ':'.join(str(part) for part in (request.user.pk, request.get_full_path(), last_modified, *parts))
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def _finish(self, response, etag, timestamp):
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        state = queryset.order_by().aggregate(last_modified=Max(self.modified_field), count=Count('pk'))
+        self.list_count = state['count']
+        etag, timestamp = self._conditional_headers(request, state['last_modified'], state['count'])
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            return self._finish(not_modified, etag, timestamp)
+        return self._finish(super().list(request, *args, **kwargs), etag, timestamp)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, timestamp = self._conditional_headers(request, getattr(instance, self.modified_field), instance.pk)
+        not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if not_modified is not None:
+            return self._finish(not_modified, etag, timestamp)
+        serializer = self.get_serializer(instance)
+        return self._finish(Response(serializer.data), etag, timestamp)
+
+
+class InventoryItemViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    """
+    Inventory items of the current user.
+
+    Filters: layout, status (name), is_active, q (full-text search) and
+    updated_since (ISO datetime; pages in updated_at order for syncs).
+    Pass fields=a,b,c to receive only those fields.
+    """
+    serializer_class = InventoryItemSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetAPIPagination
+
+    @property
+    def keyset_ordering(self):
+        if self.request.query_params.get('updated_since'):
+            return ['updated_at', 'id']
+        return ['-created_at', '-id']
+
+    def get_queryset(self):
+        return InventoryItem.objects.filter(user=self.request.user).select_related('status', 'layout')
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('layout'):
+            queryset = queryset.filter(layout_id=params['layout'])
+        if params.get('status'):
+            queryset = queryset.filter(status__name=params['status'])
+        if params.get('is_active') in ('true', 'false'):
+            queryset = queryset.filter(is_active=params['is_active'] == 'true')
+        if params.get('updated_since'):
+            updated_since = parse_datetime(params['updated_since'])
+            if updated_since is None:
+                raise ValidationError({'updated_since': 'Use an ISO 8601 datetime.'})
+            queryset = queryset.filter(updated_at__gt=updated_since)
+        if params.get('q'):
+            queryset = search_items(queryset, params['q'])
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=['post'], url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        """
+        Create or update items by SKU with bulk writes.
+
+        Body: {"layout": <id, optional>, "items": [{"sku_code": ..., "product_name": ...,
+        "quantity": ..., "unit_price": ..., "status": ..., "data": {...}}, ...]}.
+        The whole call is applied in one transaction.
+        """
+        payload = request.data if isinstance(request.data, dict) else {'items': request.data}
+        rows = payload.get('items')
+        if not isinstance(rows, list) or not rows:
+            return Response({'success': False, 'error': 'items must be a non-empty list'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_rows = settings.INVENTORY_API_BULK_MAX_ROWS
+        if len(rows) > max_rows:
+            return Response({'success': False, 'error': f'At most {max_rows} items per call'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        layouts = InventoryLayout.objects.filter(user=request.user)
+        if payload.get('layout'):
+            layout = layouts.filter(pk=payload['layout']).first() if str(payload['layout']).isdigit() else None
+        else:
+            layout = layouts.filter(is_default=True).first() or layouts.first()
+        if layout is None:
+            return Response({'success': False, 'error': 'Layout not found'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = InventoryItemUpsertSerializer(data=rows, many=True)
+        if not serializer.is_valid():
+            errors = {index: row_errors for index, row_errors in enumerate(serializer.errors) if row_errors}
+            return Response({'success': False, 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Later rows for the same SKU win, as with spreadsheet imports
+        rows_by_sku = {row['sku_code']: row for row in serializer.validated_data}
+        new_skus = set(rows_by_sku) - set(
+            InventoryItem.objects.filter(user=request.user, sku_code__in=list(rows_by_sku))
+            .values_list('sku_code', flat=True)
+        )
+        missing_names = sorted(sku for sku in new_skus if not rows_by_sku[sku].get('product_name'))
+        if missing_names:
+            return Response({'success': False, 'errors': {'product_name': missing_names[:100]},
+                             'error': 'New items need a product_name'}, status=status.HTTP_400_BAD_REQUEST)
+
+        upserter = InventoryUpserter(request.user, layout)
+        skus = list(rows_by_sku)
+        chunk_size = settings.INVENTORY_IMPORT_CHUNK_SIZE
+        created = updated = 0
+        with transaction.atomic():
+            for start in range(0, len(skus), chunk_size):
+                chunk = {sku: rows_by_sku[sku] for sku in skus[start:start + chunk_size]}
+                chunk_created, chunk_updated = upserter.apply_rows(chunk)
+                created += chunk_created
+                updated += chunk_updated
+            InventoryLog.objects.create(
+                user=request.user,
+                layout=layout,
+                log_type='import',
+                description=f'API bulk upsert: {created} created, {updated} updated',
+                details={'source': 'api', 'created_count': created, 'updated_count': updated}
+            )
+        upserter.refresh_dependents()
+
+        return Response({'success': True, 'created': created, 'updated': updated})
+
+
+class InventoryLayoutViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    serializer_class = InventoryLayoutSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetAPIPagination
+    keyset_ordering = ['-created_at', '-id']
+
+    def get_queryset(self):
+        return InventoryLayout.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
+
+
+class InventoryTransactionViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Stock movement history; rows are written by item changes, never edited"""
+    serializer_class = InventoryTransactionSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = KeysetAPIPagination
+    keyset_ordering = ['-transaction_date', '-id']
+    modified_field = 'transaction_date'
+
+    def get_queryset(self):
+        return InventoryTransaction.objects.filter(user=self.request.user).select_related(
+            'item', 'status_before', 'status_after'
+        )
+
+    def filter_queryset(self, queryset):
+        params = self.request.query_params
+        if params.get('item'):
+            queryset = queryset.filter(item_id=params['item'])
+        if params.get('transaction_type'):
+            queryset = queryset.filter(transaction_type=params['transaction_type'])
+        return queryset
@@ -8,3 +8,14 @@ class InventoryConfig(AppConfig):
     
     def ready(self):
         import apps.inventory.signals
+        import apps.inventory.jobs
+        
+        from django.db.models.signals import post_migrate
+        post_migrate.connect(ensure_search_index_after_migrate, sender=self)
+
+
+def ensure_search_index_after_migrate(sender, using, **kwargs):
+    """Recreate the full-text search index if a migration dropped it"""
+    from django.db import connections
+    from .search import ensure_search_index
+    ensure_search_index(connections[using])
@@ -0,0 +1,131 @@
+"""
+Stock velocity and reorder points from InventoryTransaction history.
+
+Demand is every decrease in quantity (sales, stock-outs, downward
+adjustments). For each layout, one query sums the decreases per item and
+day in a subquery and reduces the days to per-item totals (sum, sum of
+squares), so only one row per item reaches Python whatever the length of
+the history:
+
+    velocity      = total demand / window days
+    demand std    = sqrt(sum of squares / window days - velocity ** 2)
+    reorder point = velocity * lead days + safety factor * std * sqrt(lead days)
+
+The reorder point is never below the item's own minimum_threshold. Items
+at or under it need reordering, and the suggested order brings them back
+up to the reorder point plus ``cover_days`` of demand.
+"""
+import math
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import DateField, F, Func, Sum
+from django.utils import timezone
+
+from .models import InventoryForecast, InventoryItem, InventoryTransaction
+
+DEFAULT_WINDOW_DAYS = 90
+DEFAULT_LEAD_DAYS = 7
+DEFAULT_SAFETY_FACTOR = 1.65  # about a 95% service level
+DEFAULT_COVER_DAYS = 30
+
+# Days of cover stored for items that are barely used
+MAX_DAYS_OF_COVER = Decimal('99999.9')
+
+
+def demand_history(layout, start):
+    """
+    Per-item demand totals for a layout since ``start``.
+
+    Returns:
+        Dict of item id to (total demand, sum of squared daily demand)
+    """
+    daily = (
+        InventoryTransaction.objects
+        .filter(item__layout=layout, transaction_date__gte=start, quantity_change__lt=0)
+        # Plain DATE() runs natively on every backend (UTC days); TruncDate is a
+        # Python function per row on SQLite
+        .annotate(day=Func('transaction_date', function='DATE', output_field=DateField()))
+        .values('item_id', 'day')
+        .annotate(demand=Sum(-F('quantity_change')))
+        .order_by()
+    )
+    sql, params = daily.query.sql_with_params()
+    with connections[daily.db].cursor() as cursor:
+        cursor.execute(
+            f'SELECT daily.item_id, SUM(daily.demand), SUM(daily.demand * daily.demand) '
+            f'FROM ({sql}) daily GROUP BY daily.item_id',
+            params,
+        )
+        return {item_id: (float(total), float(squares)) for item_id, total, squares in cursor.fetchall()}
+
+
+def forecast_item(quantity, minimum_threshold, total, squares, window_days, lead_days, safety_factor, cover_days):
+    """Forecast figures for one item from its demand totals"""
+    velocity = total / window_days
+    std = math.sqrt(max(squares / window_days - velocity ** 2, 0.0))
+    reorder_point = max(velocity * lead_days + safety_factor * std * math.sqrt(lead_days), float(minimum_threshold))
+    quantity = float(quantity)
+
+    if velocity > 0:
+        days_of_cover = min(Decimal(str(round(quantity / velocity, 1))), MAX_DAYS_OF_COVER)
+    else:
+        days_of_cover = None
+    needs_reorder = reorder_point > 0 and quantity <= reorder_point
+    suggested = math.ceil(reorder_point + velocity * cover_days - quantity) if needs_reorder else 0
+
+    return {
+        'daily_velocity': Decimal(str(round(velocity, 4))),
+        'demand_std': Decimal(str(round(std, 4))),
+        'days_of_cover': days_of_cover,
+        'reorder_point': Decimal(str(round(reorder_point, 2))),
+        'suggested_order': Decimal(max(suggested, 0)),
+        'needs_reorder': needs_reorder,
+    }
+
+
+def forecast_layout(layout, window_days=None, lead_days=None, safety_factor=None, cover_days=None):
+    """
+    Recompute and store the forecasts of every item in a layout.
+
+    Returns:
+        Tuple of (items forecast, items that need reordering)
+    """
+    window_days = window_days or getattr(settings, 'INVENTORY_FORECAST_WINDOW_DAYS', DEFAULT_WINDOW_DAYS)
+    lead_days = lead_days or getattr(settings, 'INVENTORY_REORDER_LEAD_DAYS', DEFAULT_LEAD_DAYS)
+    safety_factor = safety_factor if safety_factor is not None else getattr(
+        settings, 'INVENTORY_REORDER_SAFETY_FACTOR', DEFAULT_SAFETY_FACTOR
+    )
+    cover_days = cover_days if cover_days is not None else getattr(
+        settings, 'INVENTORY_REORDER_COVER_DAYS', DEFAULT_COVER_DAYS
+    )
+
+    now = timezone.now()
+    history = demand_history(layout, now - timedelta(days=window_days))
+    items = InventoryItem.objects.filter(layout=layout).values_list('id', 'quantity', 'minimum_threshold')
+
+    forecasts = []
+    for item_id, quantity, minimum_threshold in items.iterator(chunk_size=5000):
+        total, squares = history.get(item_id, (0.0, 0.0))
+        figures = forecast_item(
+            quantity, minimum_threshold, total, squares, window_days, lead_days, safety_factor, cover_days
+        )
+        forecasts.append(InventoryForecast(
+            item_id=item_id, user_id=layout.user_id, layout_id=layout.pk,
+            window_days=window_days, computed_at=now, **figures
+        ))
+
+    with transaction.atomic():
+        InventoryForecast.objects.bulk_create(
+            forecasts,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['item'],
+            update_fields=[
+                'daily_velocity', 'demand_std', 'days_of_cover', 'reorder_point',
+                'suggested_order', 'needs_reorder', 'window_days', 'computed_at',
+            ],
+        )
+    return len(forecasts), sum(1 for forecast in forecasts if forecast.needs_reorder)
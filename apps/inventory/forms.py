@@ -1,7 +1,10 @@
+from functools import lru_cache
+
 from django import forms
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import F, Q
 from django.forms import inlineformset_factory
 from django.utils.safestring import mark_safe
 from .models import (
@@ -12,6 +15,8 @@ from .models import (
     InventoryProduct, InventoryCategory
 )
 from apps.accounts.models import User
+from apps.core.caching import namespace_token
+from .utils import extract_number
 import json
 import re
 from decimal import Decimal
@@ -182,6 +187,23 @@ class InventoryItemForm(forms.ModelForm):
         })
     )
     
+    # Form fields stored in data, and the data key each is stored under
+    DATA_FIELD_MAP = {
+        'quantity_in_stock': 'quantity',
+        'unit_price': 'unit_price',
+        'supplier': 'supplier',
+        'location': 'location',
+        'description': 'description',
+        'notes': 'notes',
+        'category': 'category',
+        'minimum_threshold': 'minimum_threshold',
+        'expiry_date': 'expiry_date',
+    }
+    
+    # Extra data fields from the layout's columns and custom fields; set on
+    # the per-layout subclasses built by item_form_class()
+    layout_field_names = ()
+    
     def __init__(self, *args, **kwargs):
         self.layout = kwargs.pop('layout', None)
         self.user = kwargs.pop('user', None)
@@ -228,6 +250,34 @@ class InventoryItemForm(forms.ModelForm):
                         else:
                             self.fields[form_field_name].initial = value
     
+    @property
+    def layout_fields(self):
+        """Bound fields for the layout's extra columns and custom fields, in display order"""
+        return [self[name] for name in self.layout_field_names]
+    
+    @classmethod
+    def validate_value(cls, field_name, value):
+        """
+        Error messages for a single field value, checked by the same form field
+        the create and edit pages use. Returns None for fields the form does
+        not validate on its own (unknown names and per-user choice fields).
+        """
+        data_fields = {data_name: form_name for form_name, data_name in cls.DATA_FIELD_MAP.items()}
+        field = cls.base_fields.get(data_fields.get(field_name, field_name))
+        if field is None or isinstance(field, forms.ModelChoiceField):
+            return None
+        if isinstance(field, forms.DecimalField) and value not in (None, ''):
+            # Accept the formatted numbers ("₦1,200.50") that item data is parsed from;
+            # numeric columns keep two decimal places
+            number = extract_number(value)
+            if number is not None:
+                value = round(number, 2)
+        try:
+            field.clean(value)
+        except ValidationError as e:
+            return e.messages
+        return []
+    
     def clean_sku_code(self):
         sku_code = self.cleaned_data.get('sku_code')
         if self.user:
@@ -265,17 +315,8 @@ class InventoryItemForm(forms.ModelForm):
         dynamic_data = {}
         
         # Define all possible dynamic fields with their mappings
-        field_mappings = {
-            'quantity_in_stock': 'quantity',
-            'unit_price': 'unit_price',
-            'supplier': 'supplier',
-            'location': 'location',
-            'description': 'description',
-            'notes': 'notes',
-            'category': 'category',
-            'minimum_threshold': 'minimum_threshold',
-            'expiry_date': 'expiry_date',
-        }
+        field_mappings = dict(self.DATA_FIELD_MAP)
+        field_mappings.update((name, name) for name in self.layout_field_names)
         
         # Process all dynamic fields, including empty ones
         for form_field, layout_field in field_mappings.items():
@@ -320,6 +361,108 @@ class InventoryItemForm(forms.ModelForm):
         return instance
 
 
+def layout_form_field(field_type, label, required=False, help_text='', choices=None,
+                      min_value=None, max_value=None, min_length=None, max_length=None):
+    """Form field for a layout column or custom field type; None for types the item form cannot edit"""
+    options = {'label': label, 'required': required, 'help_text': help_text}
+    attrs = {'class': 'form-control', 'placeholder': label}
+    
+    if field_type in ('number', 'decimal'):
+        step = '1' if field_type == 'number' else '0.01'
+        return forms.DecimalField(
+            min_value=min_value, max_value=max_value, decimal_places=2,
+            widget=forms.NumberInput(attrs={**attrs, 'step': step}), **options
+        )
+    if field_type == 'date':
+        return forms.DateField(widget=forms.DateInput(attrs={**attrs, 'type': 'date'}), **options)
+    if field_type == 'datetime':
+        return forms.DateTimeField(widget=forms.DateTimeInput(attrs={**attrs, 'type': 'datetime-local'}), **options)
+    if field_type == 'select':
+        field_choices = [('', f'Select {label.lower()}')] + [(choice, choice) for choice in choices or []]
+        return forms.ChoiceField(choices=field_choices, widget=forms.Select(attrs={'class': 'form-control'}), **options)
+    if field_type == 'multiselect':
+        return forms.MultipleChoiceField(
+            choices=[(choice, choice) for choice in choices or []],
+            widget=forms.SelectMultiple(attrs={'class': 'form-control'}), **options
+        )
+    if field_type == 'boolean':
+        options['required'] = False
+        return forms.BooleanField(widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}), **options)
+    if field_type == 'email':
+        return forms.EmailField(widget=forms.EmailInput(attrs=attrs), **options)
+    if field_type == 'url':
+        return forms.URLField(widget=forms.URLInput(attrs=attrs), **options)
+    if field_type == 'textarea':
+        return forms.CharField(
+            min_length=min_length, max_length=max_length,
+            widget=forms.Textarea(attrs={**attrs, 'rows': 3}), **options
+        )
+    if field_type in ('text', 'phone'):
+        return forms.CharField(
+            min_length=min_length, max_length=max_length,
+            widget=forms.TextInput(attrs=attrs), **options
+        )
+    return None
+
+
+def item_form_class(layout):
+    """
+    InventoryItemForm subclass for a layout, with a field for each of its
+    extra editable columns and the user's custom fields.
+    
+    Classes are built once per layout schema and kept in a bounded LRU cache.
+    The key holds the layout's calculation_version, which changes with its
+    columns, and the version of the user's custom-field cache namespace, which
+    the custom field signals bump.
+    """
+    token = namespace_token(InventoryCustomField.cache_namespace(layout.user_id))
+    return _build_item_form_class(layout.pk, layout.calculation_version, token)
+
+
+@lru_cache(maxsize=getattr(settings, 'INVENTORY_FORM_CACHE_SIZE', 256))
+def _build_item_form_class(layout_id, calculation_version, custom_fields_token):
+    layout = InventoryLayout.objects.get(pk=layout_id)
+    # Columns that already have a form field, are derived, or are table furniture
+    taken = set(InventoryItemForm.base_fields) | set(InventoryItemForm.DATA_FIELD_MAP.values()) | {'total', 'Total'}
+    
+    fields = {}
+    for column in layout.columns or []:
+        name = column.get('name', '')
+        if not name or name in taken or not column.get('is_editable', True):
+            continue
+        field = layout_form_field(
+            column.get('field_type', 'text'),
+            column.get('display_name') or name,
+            required=column.get('is_required', False),
+        )
+        if field is not None:
+            fields[name] = field
+    
+    # Layout-specific custom fields come last, so they win over user-wide ones of the same name
+    custom_fields = InventoryCustomField.objects.filter(
+        Q(layout_id=layout_id) | Q(layout__isnull=True), user_id=layout.user_id, is_visible=True
+    ).order_by(F('layout_id').asc(nulls_first=True), 'sort_order', 'name')
+    for custom_field in custom_fields:
+        if custom_field.name in taken:
+            continue
+        field = layout_form_field(
+            custom_field.field_type,
+            custom_field.display_name,
+            required=custom_field.is_required,
+            help_text=custom_field.help_text,
+            choices=custom_field.choices,
+            min_value=custom_field.min_value,
+            max_value=custom_field.max_value,
+            min_length=custom_field.min_length,
+            max_length=custom_field.max_length,
+        )
+        if field is not None:
+            fields[custom_field.name] = field
+    
+    attrs = {'layout_field_names': tuple(fields), **fields}
+    return type(f'InventoryItemForm{layout_id}', (InventoryItemForm,), attrs)
+
+
 class InventoryCustomFieldForm(forms.ModelForm):
     """Form for creating and editing custom fields"""
     
@@ -0,0 +1,148 @@
+import ast
+import json
+import operator
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PLACEHOLDER_RE = re.compile(r'\{([^{}]+)\}')
+MAX_FORMULA_LENGTH = 1000
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+}
+
+UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+
+class FormulaError(ValueError):
+    """Raised when a calculation formula uses anything but numbers, fields and basic arithmetic"""
+
+
+class CompiledFormula:
+    """
+    A calculation formula parsed once into an expression tree.
+
+    Formulas reference fields as {field_name} and may only use numbers,
+    parentheses and the + - * / // operators. Evaluation works on whole
+    columns at a time: every field maps to a list with one value per row,
+    and the result is a list with one value (or None) per row.
+    """
+
+    def __init__(self, formula: str, allowed_fields: Optional[Sequence[str]] = None):
+        self.formula = formula
+        self.fields: List[str] = []
+
+        def substitute(match):
+            name = match.group(1)
+            if allowed_fields is not None and name not in allowed_fields:
+                raise FormulaError(f'Field "{name}" is not one of the rule inputs')
+            if name not in self.fields:
+                self.fields.append(name)
+            return f'_f{self.fields.index(name)}'
+
+        expression = PLACEHOLDER_RE.sub(substitute, formula).strip()
+        if not expression:
+            raise FormulaError('Formula is empty')
+        if len(expression) > MAX_FORMULA_LENGTH:
+            raise FormulaError('Formula is too long')
+
+        try:
+            self._evaluate = self._compile(ast.parse(expression, mode='eval').body)
+        except (SyntaxError, ValueError, RecursionError) as e:
+            if isinstance(e, FormulaError):
+                raise
+            raise FormulaError(f'Invalid formula: {formula}')
+
+    def _compile(self, node):
+        """Turn an AST node into a function of (columns, size) returning a column"""
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            value = node.value
+            return lambda columns, size: [value] * size
+
+        if isinstance(node, ast.Name) and re.fullmatch(r'_f\d+', node.id):
+            index = int(node.id[2:])
+            if index >= len(self.fields):
+                raise FormulaError(f'Invalid formula: {self.formula}')
+            name = self.fields[index]
+            return lambda columns, size: columns[name]
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+            op = UNARY_OPERATORS[type(node.op)]
+            operand = self._compile(node.operand)
+            return lambda columns, size: [
+                None if value is None else op(value) for value in operand(columns, size)
+            ]
+
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+            op = BINARY_OPERATORS[type(node.op)]
+            left = self._compile(node.left)
+            right = self._compile(node.right)
+
+            def apply(a, b):
+                if a is None or b is None:
+                    return None
+                try:
+                    return op(a, b)
+                except ZeroDivisionError:
+                    return None
+
+            return lambda columns, size: list(map(apply, left(columns, size), right(columns, size)))
+
+        raise FormulaError(f'Unsupported expression in formula: {self.formula}')
+
+    def evaluate(self, columns: Dict[str, List[Optional[float]]], size: int) -> List[Optional[float]]:
+        """
+        Evaluate the formula over column arrays.
+
+        Args:
+            columns: Field name -> list of numeric values, one per row
+            size: Number of rows
+
+        Returns:
+            List with the result for each row, None where it could not be computed
+        """
+        return self._evaluate(columns, size)
+
+    def evaluate_one(self, values: Dict[str, float]) -> Optional[float]:
+        """Evaluate the formula for a single set of field values"""
+        return self.evaluate({name: [values.get(name, 0)] for name in self.fields}, 1)[0]
+
+
+@lru_cache(maxsize=256)
+def _compile_rules(rules_json: str) -> Tuple[Tuple[str, CompiledFormula], ...]:
+    compiled = []
+    for rule in json.loads(rules_json):
+        if not rule.get('enabled', False) or not rule.get('formula') or not rule.get('output_field'):
+            continue
+        try:
+            formula = CompiledFormula(rule['formula'], rule.get('input_fields', []))
+        except FormulaError:
+            continue
+        compiled.append((rule['output_field'], formula))
+    return tuple(compiled)
+
+
+def compile_rules(calculation_rules: dict) -> Tuple[Tuple[str, CompiledFormula], ...]:
+    """
+    Compile the enabled rules of a layout's calculation_rules.
+
+    The result is cached on the serialized rules, so every layout (and every
+    version of a layout) with the same rules shares one compiled copy. Rules
+    with invalid formulas are skipped, as they never produced a value before.
+
+    Args:
+        calculation_rules: The layout's calculation_rules JSON
+
+    Returns:
+        Tuple of (output_field, CompiledFormula) pairs in rule order
+    """
+    rules = (calculation_rules or {}).get('rules', []) if isinstance(calculation_rules, dict) else []
+    return _compile_rules(json.dumps(rules, sort_keys=True, default=str))
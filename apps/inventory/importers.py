@@ -0,0 +1,353 @@
+import codecs
+import csv
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.utils import bulk_update_rows
+from .forms import item_form_class
+from .models import InventoryItem, InventoryLayout, InventoryStatus, InventoryLog, InventoryCategory
+
+# Header keywords used to detect which file column feeds which item field
+IMPORT_FIELD_KEYWORDS = [
+    ('product_name', ['product', 'name', 'item']),
+    ('sku_code', ['sku', 'code', 'id']),
+    ('quantity', ['quantity', 'qty', 'stock']),
+    ('unit_price', ['price', 'cost', 'unit']),
+    ('status', ['status']),
+]
+
+
+def detect_column_mapping(headers):
+    """
+    Auto-detect which file columns map to which item fields.
+
+    Args:
+        headers: Header row of the file
+
+    Returns:
+        Dict of header -> item field name
+    """
+    column_mapping = {}
+    for col in headers:
+        if not col:
+            continue
+        col_lower = str(col).lower().strip()
+        for field_name, keywords in IMPORT_FIELD_KEYWORDS:
+            if any(keyword in col_lower for keyword in keywords):
+                column_mapping[col] = field_name
+                break
+    return column_mapping
+
+
+def read_rows(uploaded_file, file_type):
+    """
+    Open an uploaded Excel or CSV file for streaming.
+
+    Args:
+        uploaded_file: The uploaded file object
+        file_type: 'excel' or 'csv'
+
+    Returns:
+        Tuple of (headers, row iterator, estimated row count or 0 if unknown)
+    """
+    if file_type == 'excel':
+        from openpyxl import load_workbook
+        wb = load_workbook(uploaded_file, read_only=True, data_only=True)
+        ws = wb.active
+
+        def excel_rows():
+            try:
+                for row in ws.iter_rows(min_row=2, values_only=True):
+                    yield [value if value else '' for value in row]
+            finally:
+                wb.close()
+
+        header_row = next(ws.iter_rows(max_row=1, values_only=True), ())
+        headers = [value if value else '' for value in header_row]
+        total_rows = max((ws.max_row or 1) - 1, 0)
+        return headers, excel_rows(), total_rows
+
+    reader = csv.reader(codecs.iterdecode(uploaded_file, 'utf-8-sig'))
+    headers = next(reader, [])
+    return headers, reader, 0
+
+
+def _json_value(value):
+    """Convert a spreadsheet cell value to something JSONField can store"""
+    if hasattr(value, 'as_tuple'):  # Check if it's a Decimal
+        return float(value)
+    if hasattr(value, 'isoformat'):  # Check if it's a date/datetime
+        return value.isoformat()
+    return value
+
+
+class InventoryUpserter:
+    """
+    Create or update a user's items keyed by SKU with bulk writes.
+
+    apply_rows() prefetches the existing SKUs and statuses of a batch, then
+    writes updates with one executemany() and inserts with one bulk_create. bulk writes skip the item
+    signals, so callers run refresh_dependents() once when they are done.
+    Used by spreadsheet imports and the API bulk upsert.
+    """
+
+    ITEM_UPDATE_FIELDS = [
+        'product_name', 'status', 'category', 'data', 'calculated_data', 'calculation_hash', 'search_text',
+        *InventoryItem.NUMERIC_FIELDS, 'updated_at',
+    ]
+
+    def __init__(self, user, layout):
+        self.user = user
+        self.layout = layout
+        self.statuses = {}
+        self.category_names = list(
+            InventoryCategory.objects.filter(user=self.user).values_list('name', flat=True)
+        )
+        self.touched_layouts = {self.layout.pk: self.layout}
+
+    def get_statuses(self, names):
+        """Look up statuses by name, fetching only those not seen in earlier batches"""
+        missing = set(names) - set(self.statuses)
+        if missing:
+            for status in InventoryStatus.objects.filter(name__in=missing):
+                self.statuses[status.name] = status
+            for name in missing - set(self.statuses):
+                self.statuses[name], _ = InventoryStatus.objects.get_or_create(
+                    name=name,
+                    defaults={'display_name': name.replace('_', ' ').title()}
+                )
+        return self.statuses
+
+    def apply_rows(self, rows_by_sku):
+        """
+        Create or update the items for one batch.
+
+        Args:
+            rows_by_sku: SKU -> dict with any of product_name, quantity,
+                unit_price, status (name) and data (other dynamic fields).
+                New items need a product_name and default to 'in_stock'.
+
+        Returns:
+            Tuple of (created, updated) counts
+        """
+        statuses = self.get_statuses(
+            values.get('status') or 'in_stock' for values in rows_by_sku.values()
+        )
+        existing = {
+            item.sku_code: item
+            for item in InventoryItem.objects.filter(
+                user=self.user, sku_code__in=list(rows_by_sku)
+            ).select_related('status')
+        }
+        # Share one layout instance per layout rather than joining a copy onto every row
+        missing_layouts = {item.layout_id for item in existing.values()} - set(self.touched_layouts)
+        if missing_layouts:
+            self.touched_layouts.update(InventoryLayout.objects.in_bulk(missing_layouts))
+        for item in existing.values():
+            item.layout = self.touched_layouts[item.layout_id]
+        now = timezone.now()
+
+        to_create = []
+        to_update = {}
+        for sku_code, values in rows_by_sku.items():
+            item = existing.get(sku_code)
+            if item:
+                changes = dict(values.get('data') or {})
+                for field_name in ('product_name', 'quantity', 'unit_price'):
+                    if field_name in values:
+                        changes[field_name] = values[field_name]
+                if values.get('status'):
+                    changes['status'] = statuses[values['status']]
+                # Same in-memory mutation path as InventoryItem.apply_changes; totals follow in bulk
+                item.stage_changes(changes, derive_status=False, compute=False)
+                item.updated_at = now
+                to_update.setdefault(item.layout_id, []).append(item)
+            else:
+                data = dict(values.get('data') or {})
+                data['quantity'] = values.get('quantity', 0)
+                data['unit_price'] = values.get('unit_price', 0)
+                item = InventoryItem(
+                    user=self.user,
+                    layout=self.layout,
+                    product_name=values['product_name'],
+                    sku_code=sku_code,
+                    status=statuses[values.get('status') or 'in_stock'],
+                    data=data
+                )
+                category = InventoryItem.suggest_category(item.product_name, self.category_names)
+                if category and not data.get('category'):
+                    item.data['category'] = category
+                to_create.append(item)
+
+        # One category lookup for the whole chunk instead of one per saved item
+        InventoryItem.resolve_categories(
+            self.user.pk, [*to_create, *(item for items in to_update.values() for item in items)]
+        )
+
+        updated = []
+        for items in to_update.values():
+            layout = items[0].layout
+            InventoryItem.compute_totals_bulk(items, layout)
+            search_columns = layout.get_search_columns()
+            for item in items:
+                item.sync_search_text(search_columns)
+            updated.extend(items)
+        if updated:
+            bulk_update_rows(updated, self.ITEM_UPDATE_FIELDS)
+
+        if to_create:
+            InventoryItem.compute_totals_bulk(to_create, self.layout)
+            search_columns = self.layout.get_search_columns()
+            for item in to_create:
+                item.sync_search_text(search_columns)
+            InventoryItem.objects.bulk_create(to_create)
+
+        return len(to_create), len(updated)
+
+    def refresh_dependents(self):
+        """Refresh stats, exports and caches once for every layout written to"""
+        InventoryItem.refresh_batch_dependents(self.user, self.touched_layouts)
+
+
+class InventoryImporter(InventoryUpserter):
+    """
+    Import spreadsheet rows into InventoryItem in chunks.
+
+    Each chunk is applied with InventoryUpserter.apply_rows() inside a
+    transaction and writes a single InventoryLog. The ImportedInventoryFile
+    counters are saved after every chunk, so progress can be polled while
+    the import runs; on_chunk, if given, is called with the record after
+    each chunk as well.
+    """
+
+    # Parsed row fields checked with the layout's item form fields
+    VALIDATED_FIELDS = ('product_name', 'sku_code', 'quantity', 'unit_price')
+
+    def __init__(self, import_record, chunk_size=None, on_chunk=None):
+        super().__init__(import_record.user, import_record.layout)
+        self.form_class = item_form_class(self.layout)
+        self.record = import_record
+        self.on_chunk = on_chunk
+        self.chunk_size = (
+            chunk_size
+            or import_record.import_settings.get('chunk_size')
+            or settings.INVENTORY_IMPORT_CHUNK_SIZE
+        )
+
+    def run(self, headers, rows):
+        """Import every row and mark the import record completed"""
+        # First header mapped to each field wins
+        self.columns = {}
+        for index, header in enumerate(headers):
+            field_name = self.record.column_mapping.get(header)
+            if field_name and field_name not in self.columns:
+                self.columns[field_name] = index
+
+        rows = iter(rows)
+        chunk_number = 0
+        row_index = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            chunk_number += 1
+            self.import_chunk(chunk_number, row_index, chunk)
+            row_index += len(chunk)
+            if self.on_chunk:
+                self.on_chunk(self.record)
+
+        self.refresh_dependents()
+
+        self.record.total_rows = row_index
+        self.record.status = 'completed'
+        self.record.completed_at = timezone.now()
+        self.record.save(update_fields=['total_rows', 'status', 'completed_at'])
+        return self.record
+
+    def parse_row(self, row_data):
+        """Extract the mapped item fields from a raw row"""
+        def cell(field_name, default):
+            index = self.columns.get(field_name)
+            if index is None:
+                return default
+            return row_data[index] if index < len(row_data) else ''
+
+        return {
+            'product_name': str(cell('product_name', '')),
+            'sku_code': str(cell('sku_code', '')),
+            'quantity': _json_value(cell('quantity', 0)),
+            'unit_price': _json_value(cell('unit_price', 0)),
+            'status': str(cell('status', 'in_stock')),
+        }
+
+    def validate_row(self, values):
+        """Messages for parsed values the item form would reject"""
+        messages = []
+        for field_name in self.VALIDATED_FIELDS:
+            value = values.get(field_name)
+            if value in (None, ''):
+                continue
+            for message in self.form_class.validate_value(field_name, value) or []:
+                messages.append(f'{field_name}: {message}')
+        return messages
+
+    def import_chunk(self, chunk_number, start_index, chunk):
+        """Validate, upsert and log one chunk of rows"""
+        errors = []
+        rows_by_sku = {}
+        failed_count = 0
+        valid_count = 0
+
+        for offset, row_data in enumerate(chunk):
+            values = self.parse_row(row_data)
+            if not values['product_name'] or not values['sku_code']:
+                failed_count += 1
+                errors.append(f"Row {start_index + offset + 1}: Missing product name or SKU")
+                continue
+            row_errors = self.validate_row(values)
+            if row_errors:
+                failed_count += 1
+                errors.append(f"Row {start_index + offset + 1}: {'; '.join(row_errors)}")
+                continue
+            # Later rows for the same SKU overwrite earlier ones, as sequential updates did
+            rows_by_sku[str(values['sku_code'])] = values
+            valid_count += 1
+
+        created_count = updated_count = 0
+        if rows_by_sku:
+            try:
+                with transaction.atomic():
+                    created_count, updated_count = self.apply_rows(rows_by_sku)
+                    InventoryLog.objects.create(
+                        user=self.user,
+                        layout=self.layout,
+                        log_type='import',
+                        description=f'Imported chunk {chunk_number} of {self.record.file_name}: '
+                                    f'{created_count} created, {updated_count} updated',
+                        details={
+                            'file_name': self.record.file_name,
+                            'import_id': self.record.pk,
+                            'chunk': chunk_number,
+                            'first_row': start_index + 1,
+                            'last_row': start_index + len(chunk),
+                            'created_count': created_count,
+                            'updated_count': updated_count,
+                            'failed_count': failed_count,
+                        }
+                    )
+            except Exception as e:
+                # Statuses created inside the rolled-back transaction are gone too
+                self.statuses = {}
+                failed_count += valid_count
+                valid_count = 0
+                errors.append(f"Rows {start_index + 1}-{start_index + len(chunk)}: {str(e)}")
+
+        self.record.total_rows = max(self.record.total_rows, start_index + len(chunk))
+        self.record.imported_rows += valid_count
+        self.record.failed_rows += failed_count
+        if errors:
+            self.record.error_log = '\n'.join(filter(None, [self.record.error_log, *errors]))
+        self.record.save(update_fields=['total_rows', 'imported_rows', 'failed_rows', 'error_log'])
@@ -0,0 +1,126 @@
+"""
+Background job handlers for inventory imports and exports.
+
+Registered from InventoryConfig.ready(); see apps.core.jobs.
+"""
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.core.jobs import job_handler, response_content, save_result_file
+from .importers import InventoryImporter, detect_column_mapping, read_rows
+from .models import ImportedInventoryFile, InventoryExport, InventoryItem, InventoryLayout, InventoryLog
+
+EXPORT_EXTENSIONS = {'excel': 'xlsx', 'csv': 'csv', 'pdf': 'pdf'}
+
+
+@job_handler('inventory.import')
+def import_inventory(job):
+    """Import the uploaded file of an ImportedInventoryFile record"""
+    record = ImportedInventoryFile.objects.select_related('user', 'layout').get(
+        pk=job.payload['import_id'], user=job.user
+    )
+
+    try:
+        with default_storage.open(record.file_path, 'rb') as uploaded_file:
+            # Stream the file; rows are read and imported one chunk at a time
+            headers, rows, estimated_rows = read_rows(uploaded_file, record.file_type)
+            record.column_mapping = detect_column_mapping(headers)
+            record.total_rows = estimated_rows
+            record.status = 'processing'
+            record.save(update_fields=['column_mapping', 'total_rows', 'status'])
+
+            def on_chunk(record):
+                processed = record.imported_rows + record.failed_rows
+                if estimated_rows:
+                    percent = processed * 100 // estimated_rows
+                else:
+                    # CSV row counts are unknown up front; use the read position instead
+                    percent = uploaded_file.tell() * 100 // max(record.file_size, 1)
+                job.set_progress(min(percent, 99), f'{processed} rows processed')
+
+            InventoryImporter(record, on_chunk=on_chunk).run(headers, rows)
+    except Exception as e:
+        record.status = 'failed'
+        record.error_log = '\n'.join(filter(None, [record.error_log, str(e)]))
+        record.completed_at = timezone.now()
+        record.save(update_fields=['status', 'error_log', 'completed_at'])
+        raise
+
+    imported_count = record.imported_rows
+    failed_count = record.failed_rows
+
+    # Log the import
+    InventoryLog.objects.create(
+        user=record.user,
+        layout=record.layout,
+        log_type='import',
+        description=f'Imported {imported_count} items from {record.file_name}',
+        details={
+            'file_name': record.file_name,
+            'imported_count': imported_count,
+            'failed_count': failed_count,
+            'total_rows': record.total_rows
+        }
+    )
+
+    message = f'Successfully imported {imported_count} items.'
+    if failed_count:
+        message += f' {failed_count} rows failed to import. Check the import log for details.'
+    return {
+        'import_id': record.pk,
+        'redirect_url': reverse('inventory:list'),
+        'message': message,
+    }
+
+
+@job_handler('inventory.export')
+def export_inventory(job):
+    """Write an inventory export file and record it as an InventoryExport"""
+    from .views import export_to_csv, export_to_excel, export_to_pdf, filter_export_items
+
+    payload = job.payload
+    layout = InventoryLayout.objects.get(pk=payload['layout_id'], user=job.user)
+    filters = payload.get('filters', {})
+    export_format = payload['format']
+    include_calculations = payload.get('include_calculations', True)
+    include_branding = payload.get('include_branding', True)
+
+    items = filter_export_items(InventoryItem.objects.filter(user=job.user, layout=layout), filters)
+    total_items = items.count()
+    job.set_progress(10, f'Writing {total_items} items')
+
+    filename = payload['filename']
+    if export_format == 'excel':
+        response = export_to_excel(items, layout, filename, include_calculations, include_branding)
+    elif export_format == 'csv':
+        response = export_to_csv(items, layout, filename, include_calculations)
+    elif export_format == 'pdf':
+        response = export_to_pdf(items, layout, filename, include_calculations, include_branding)
+    else:
+        raise ValueError(f'Unsupported export format: {export_format}')
+
+    file_name = f'{filename}.{EXPORT_EXTENSIONS[export_format]}'
+    file_path, file_size = save_result_file(
+        f'inventory/exports/{job.user_id}/{file_name}', response_content(response)
+    )
+
+    export = InventoryExport.objects.create(
+        user=job.user,
+        layout=layout,
+        format=export_format,
+        file_path=file_path,
+        file_size=file_size,
+        filters=filters,
+        include_calculations=include_calculations,
+        include_branding=include_branding,
+        export_settings={'job_id': job.pk},
+        total_items=total_items,
+    )
+
+    return {
+        'export_id': export.pk,
+        'file_path': file_path,
+        'file_name': file_name,
+        'message': f'Exported {total_items} items.',
+    }
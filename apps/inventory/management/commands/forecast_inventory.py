@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from apps.inventory.forecasting import forecast_layout
+from apps.inventory.models import InventoryLayout
+
+
+class Command(BaseCommand):
+    help = 'Compute stock velocity, days of cover and reorder points from inventory movements'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Forecast only for specific user ID')
+        parser.add_argument('--layout', type=int, help='Forecast only for specific layout ID')
+        parser.add_argument('--days', type=int, help='Days of movement history to use (default INVENTORY_FORECAST_WINDOW_DAYS)')
+        parser.add_argument('--lead-days', type=int, help='Supplier lead time in days (default INVENTORY_REORDER_LEAD_DAYS)')
+
+    def handle(self, *args, **options):
+        layouts = InventoryLayout.objects.filter(items__isnull=False).distinct().order_by('pk')
+        if options['user']:
+            layouts = layouts.filter(user_id=options['user'])
+        if options['layout']:
+            layouts = layouts.filter(pk=options['layout'])
+
+        started = time.monotonic()
+        total_items = 0
+        total_reorder = 0
+        for layout in layouts:
+            items, reorder = forecast_layout(layout, window_days=options['days'], lead_days=options['lead_days'])
+            total_items += items
+            total_reorder += reorder
+            self.stdout.write(f'Layout {layout.pk} ({layout.name}): {items} items, {reorder} need reordering')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully forecast {total_items} items in {time.monotonic() - started:.1f}s; '
+                f'{total_reorder} need reordering'
+            )
+        )
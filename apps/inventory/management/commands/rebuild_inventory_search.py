@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from apps.inventory.models import InventoryItem, InventoryLayout
+from apps.inventory.search import ensure_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search text and database search index for inventory items'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Rebuild search text only for specific user ID')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Items per bulk update')
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+        chunk_size = options['chunk_size']
+
+        layouts = InventoryLayout.objects.all()
+        if user_id:
+            layouts = layouts.filter(user_id=user_id)
+
+        updated_count = 0
+        for layout in layouts:
+            column_names = layout.get_search_columns()
+            last_id = 0
+            while True:
+                items = list(
+                    InventoryItem.objects.filter(layout=layout, pk__gt=last_id)
+                    .only('id', 'product_name', 'sku_code', 'data', 'search_text')
+                    .order_by('pk')[:chunk_size]
+                )
+                if not items:
+                    break
+                last_id = items[-1].pk
+
+                changed = []
+                for item in items:
+                    old_text = item.search_text
+                    item.sync_search_text(column_names)
+                    if item.search_text != old_text:
+                        changed.append(item)
+                if changed:
+                    InventoryItem.objects.bulk_update(changed, ['search_text'])
+                    updated_count += len(changed)
+
+            self.stdout.write(f'Layout {layout.pk} ({layout.name}): search text up to date')
+
+        if ensure_search_index(connection, rebuild=True):
+            self.stdout.write(f'Rebuilt {connection.vendor} search index')
+        else:
+            self.stdout.write(self.style.WARNING('No native search index on this database; using substring search'))
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully updated search text for {updated_count} items')
+        )
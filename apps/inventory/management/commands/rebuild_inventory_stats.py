@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from apps.inventory.models import InventoryLayout, InventoryStats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized inventory statistics from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Rebuild only for specific user ID')
+
+    def handle(self, *args, **options):
+        user_id = options['user']
+
+        users = User.objects.filter(inventory_layouts__isnull=False).distinct()
+        stats = InventoryStats.objects.all()
+        if user_id:
+            users = users.filter(pk=user_id)
+            stats = stats.filter(user_id=user_id)
+
+        deleted, _ = stats.delete()
+        self.stdout.write(f'Removed {deleted} existing statistics rows')
+
+        rebuilt_count = 0
+        for user in users:
+            for layout in InventoryLayout.objects.filter(user=user):
+                InventoryStats.rebuild(user, layout)
+                rebuilt_count += 1
+
+            totals = InventoryStats.rebuild(user)
+            rebuilt_count += 1
+            self.stdout.write(
+                f'User {user.pk}: {totals.total_items} items, '
+                f'{totals.active_items} active, {totals.low_stock_items} low stock, '
+                f'total value {totals.total_value:,.2f}'
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {rebuilt_count} statistics rows')
+        )
@@ -0,0 +1,63 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.inventory.models import InventoryValuationSnapshot
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Record today\'s inventory value and quantity per layout, category and status. '
+        'Schedule it daily (e.g. from cron); users already snapshotted for the date are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Snapshot date (YYYY-MM-DD); defaults to today')
+        parser.add_argument('--user', type=int, help='Snapshot only for specific user ID')
+        parser.add_argument('--force', action='store_true', help='Replace snapshots that already exist for the date')
+        parser.add_argument(
+            '--keep-days', type=int, default=settings.INVENTORY_SNAPSHOT_RETENTION_DAYS,
+            help='Delete snapshots older than this many days (0 keeps everything)'
+        )
+
+    def handle(self, *args, **options):
+        if options['date']:
+            try:
+                snapshot_date = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+        else:
+            snapshot_date = timezone.localdate()
+
+        users = User.objects.filter(inventory_items__isnull=False).distinct()
+        if options['user']:
+            users = users.filter(pk=options['user'])
+        if not options['force']:
+            users = users.exclude(inventory_snapshots__snapshot_date=snapshot_date)
+
+        captured_users = 0
+        captured_rows = 0
+        for user in users.iterator():
+            rows = InventoryValuationSnapshot.capture(user, snapshot_date)
+            captured_users += 1
+            captured_rows += rows
+            self.stdout.write(f'User {user.pk}: {rows} snapshot rows for {snapshot_date}')
+
+        if options['keep_days']:
+            cutoff = snapshot_date - timedelta(days=options['keep_days'])
+            old = InventoryValuationSnapshot.objects.filter(snapshot_date__lt=cutoff)
+            if options['user']:
+                old = old.filter(user_id=options['user'])
+            deleted, _ = old.delete()
+            if deleted:
+                self.stdout.write(f'Removed {deleted} snapshot rows older than {cutoff}')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully snapshotted {captured_users} users ({captured_rows} rows) for {snapshot_date}'
+            )
+        )
@@ -1,44 +1,47 @@
+import time
+
 from django.core.management.base import BaseCommand
-from apps.inventory.models import InventoryItem
+from apps.inventory.models import InventoryLayout
+from apps.inventory.recalculation import DEFAULT_CHUNK_SIZE, effective_workers, recalculate_layouts
 
 
 class Command(BaseCommand):
-    help = 'Update all inventory items with latest calculations and ensure all documents are up to date'
+    help = 'Update all inventory items with latest calculations, in bulk chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='Update only for specific user ID')
+        parser.add_argument('--layout', type=int, help='Update only for specific layout ID')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Items loaded and written per chunk')
+        parser.add_argument('--workers', type=int, default=1, help='Processes to spread chunks over (1 runs them in this process)')
 
     def handle(self, *args, **options):
+        layouts = InventoryLayout.objects.filter(items__isnull=False).distinct().select_related('user').order_by('pk')
+        if options['user']:
+            layouts = layouts.filter(user_id=options['user'])
+        if options['layout']:
+            layouts = layouts.filter(pk=options['layout'])
+
         self.stdout.write('Starting to update all inventory calculations...')
-        
-        updated_count = 0
-        total_count = InventoryItem.objects.count()
-        
-        for item in InventoryItem.objects.all():
-            try:
-                # Force recalculation
-                item.calculate_totals()
-                item.save()
-                
-                # Update all documents
-                item.update_all_documents()
-                
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'Updated item {item.id}: {item.product_name} - '
-                        f'Qty: {item.get_value("quantity")}, '
-                        f'Price: ₦{item.get_value("unit_price")}, '
-                        f'Total: ₦{item.total_value}'
-                    )
-                )
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'Error updating item {item.id}: {str(e)}'
-                    )
-                )
-        
+        workers = effective_workers(options['workers'])
+        if workers < options['workers']:
+            self.stdout.write(self.style.WARNING('This database allows one writer at a time; running chunks in this process'))
+
+        started = time.monotonic()
+        checked, updated = recalculate_layouts(
+            layouts,
+            chunk_size=max(options['chunk_size'], 1),
+            workers=workers,
+            progress=self.report_progress,
+        )
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'Successfully updated {updated_count} out of {total_count} inventory items'
+                f'Successfully updated {updated} out of {checked} inventory items '
+                f'in {time.monotonic() - started:.1f}s'
             )
-        ) 
\ No newline at end of file
+        )
+
+    def report_progress(self, done, total, checked, updated):
+        # About ten progress lines whatever the size of the run
+        if done == total or done % max(total // 10, 1) == 0:
+            self.stdout.write(f'Chunk {done}/{total}: {checked} items checked, {updated} updated')
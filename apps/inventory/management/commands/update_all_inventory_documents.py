@@ -1,90 +1,72 @@
+import time
+
 from django.core.management.base import BaseCommand
-from apps.inventory.models import InventoryItem, InventoryExport, InventoryTemplate
-from django.core.cache import cache
+from django.utils import timezone
+from apps.inventory.models import InventoryExport, InventoryLayout, InventoryTemplate
+from apps.inventory.recalculation import DEFAULT_CHUNK_SIZE, effective_workers, recalculate_layouts
 
 
 class Command(BaseCommand):
     help = 'Update all inventory documents, templates, and exports with latest data'
 
     def add_arguments(self, parser):
-        parser.add_argument('--force', action='store_true', help='Force update even if not needed')
+        parser.add_argument('--force', action='store_true', help='Kept for compatibility; every item is always checked')
         parser.add_argument('--user', type=int, help='Update only for specific user ID')
+        parser.add_argument('--layout', type=int, help='Update only for specific layout ID')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Items loaded and written per chunk')
+        parser.add_argument('--workers', type=int, default=1, help='Processes to spread chunks over (1 runs them in this process)')
 
     def handle(self, *args, **options):
-        force = options['force']
         user_id = options['user']
-        
+
         self.stdout.write('🔄 Starting inventory document update process...')
-        
-        # Get items to update
+        layouts = InventoryLayout.objects.filter(items__isnull=False).distinct().select_related('user').order_by('pk')
         if user_id:
-            items = InventoryItem.objects.filter(user_id=user_id)
+            layouts = layouts.filter(user_id=user_id)
             self.stdout.write(f'Updating documents for user {user_id}...')
         else:
-            items = InventoryItem.objects.all()
             self.stdout.write('Updating documents for all users...')
-        
-        total_items = items.count()
-        updated_count = 0
-        
-        for item in items:
-            try:
-                # Force recalculation
-                item.calculate_totals()
-                
-                # Update all documents
-                item.update_all_documents()
-                
-                updated_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f'✅ Updated item {item.id}: {item.product_name} - '
-                        f'Qty: {item.get_value("quantity")}, '
-                        f'Price: ₦{item.get_value("unit_price")}, '
-                        f'Total: ₦{item.total_value}, '
-                        f'Status: {item.status.display_name}'
-                    )
-                )
-                
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(
-                        f'❌ Error updating item {item.id}: {str(e)}'
-                    )
-                )
-        
+        if options['layout']:
+            layouts = layouts.filter(pk=options['layout'])
+
+        # Recalculating also bumps the cache versions of every affected user and layout
+        workers = effective_workers(options['workers'])
+        if workers < options['workers']:
+            self.stdout.write(self.style.WARNING('This database allows one writer at a time; running chunks in this process'))
+
+        started = time.monotonic()
+        checked, updated = recalculate_layouts(
+            layouts,
+            chunk_size=max(options['chunk_size'], 1),
+            workers=workers,
+            progress=self.report_progress,
+        )
+
         # Update exports
         self.stdout.write('🔄 Updating inventory exports...')
         exports = InventoryExport.objects.all()
-        for export in exports:
-            try:
-                export.export_settings['needs_refresh'] = True
-                export.save(update_fields=['export_settings'])
-                self.stdout.write(f'✅ Marked export {export.id} for refresh')
-            except Exception as e:
-                self.stdout.write(f'❌ Error updating export {export.id}: {str(e)}')
-        
+        if user_id:
+            exports = exports.filter(user_id=user_id)
+        marked_count = exports.update(needs_refresh=True)
+        self.stdout.write(f'✅ Marked {marked_count} exports for refresh')
+
         # Update templates
         self.stdout.write('🔄 Updating inventory templates...')
         templates = InventoryTemplate.objects.all()
-        for template in templates:
-            try:
-                template.save(update_fields=['updated_at'])
-                self.stdout.write(f'✅ Updated template {template.id}: {template.name}')
-            except Exception as e:
-                self.stdout.write(f'❌ Error updating template {template.id}: {str(e)}')
-        
-        # Clear cache
-        self.stdout.write('🔄 Clearing cache...')
-        try:
-            cache.clear()
-            self.stdout.write('✅ Cache cleared successfully')
-        except Exception as e:
-            self.stdout.write(f'⚠️ Warning: Error clearing cache: {str(e)}')
-        
+        if user_id:
+            templates = templates.filter(user_id=user_id)
+        template_count = templates.update(updated_at=timezone.now())
+        self.stdout.write(f'✅ Updated {template_count} templates')
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'🎉 Successfully updated {updated_count} out of {total_items} inventory items'
+                f'🎉 Successfully updated {updated} out of {checked} inventory items '
+                f'in {time.monotonic() - started:.1f}s'
             )
         )
-        self.stdout.write('✅ All inventory documents, templates, and exports have been updated!') 
\ No newline at end of file
+        self.stdout.write('✅ All inventory documents, templates, and exports have been updated!')
+
+    def report_progress(self, done, total, checked, updated):
+        # About ten progress lines whatever the size of the run
+        if done == total or done % max(total // 10, 1) == 0:
+            self.stdout.write(f'Chunk {done}/{total}: {checked} items checked, {updated} updated')
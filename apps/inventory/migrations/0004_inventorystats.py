@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:34
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0003_inventorycategory_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_items', models.IntegerField(default=0)),
+                ('active_items', models.IntegerField(default=0)),
+                ('low_stock_items', models.IntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('status_counts', models.JSONField(default=dict, help_text='Item counts keyed by status id')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('layout', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='inventory.inventorylayout')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Inventory Statistics',
+                'verbose_name_plural': 'Inventory Statistics',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inventorystats',
+            constraint=models.UniqueConstraint(fields=('user', 'layout'), name='inventory_stats_user_layout_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorystats',
+            constraint=models.UniqueConstraint(condition=models.Q(('layout__isnull', True)), fields=('user',), name='inventory_stats_user_total_uniq'),
+        ),
+    ]
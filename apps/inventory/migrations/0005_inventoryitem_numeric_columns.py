@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:37
+
+from django.db import migrations, models
+
+from apps.inventory.utils import to_decimal_column
+
+
+def backfill_numeric_columns(apps, schema_editor):
+    """Fill the typed numeric columns from the existing JSON data"""
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+    InventoryStats = apps.get_model('inventory', 'InventoryStats')
+    fields = ['quantity', 'unit_price', 'total_value', 'minimum_threshold']
+
+    batch = []
+    for item in InventoryItem.objects.only('id', 'data', 'calculated_data').iterator(chunk_size=2000):
+        data = item.data or {}
+        item.quantity = to_decimal_column(data.get('quantity') or data.get('Quantity'))
+        item.unit_price = to_decimal_column(data.get('unit_price') or data.get('Unit Price'))
+        item.total_value = to_decimal_column((item.calculated_data or {}).get('total'))
+        item.minimum_threshold = to_decimal_column(data.get('minimum_threshold'))
+        batch.append(item)
+        if len(batch) >= 2000:
+            InventoryItem.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        InventoryItem.objects.bulk_update(batch, fields)
+
+    # Statistics rows are rebuilt lazily from the new columns
+    InventoryStats.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_inventorystats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='minimum_threshold',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='quantity',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='total_value',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=20),
+        ),
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['user', 'layout', 'quantity'], name='inventory_i_user_id_5f4485_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['user', 'layout', 'unit_price'], name='inventory_i_user_id_a37393_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['user', 'layout', 'total_value'], name='inventory_i_user_id_56c387_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['user', 'is_active', 'quantity'], name='inventory_i_user_id_d289c2_idx'),
+        ),
+        migrations.RunPython(backfill_numeric_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0005_inventoryitem_numeric_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='calculation_hash',
+            field=models.CharField(blank=True, help_text='calculation_signature() of the inputs calculated_data was computed from', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='inventorylayout',
+            name='calculation_version',
+            field=models.PositiveIntegerField(default=1, help_text='Bumped whenever the calculation settings change'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:46
+
+from django.db import migrations, models
+
+
+def copy_needs_refresh_flag(apps, schema_editor):
+    """Move the needs_refresh flag out of export_settings into the new column"""
+    InventoryExport = apps.get_model('inventory', 'InventoryExport')
+    stale_ids = [
+        export.pk for export in InventoryExport.objects.only('id', 'export_settings')
+        if (export.export_settings or {}).get('needs_refresh')
+    ]
+    InventoryExport.objects.filter(pk__in=stale_ids).update(needs_refresh=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_calculation_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryexport',
+            name='needs_refresh',
+            field=models.BooleanField(default=False, help_text='Items changed since this export was made'),
+        ),
+        migrations.RunPython(copy_needs_refresh_flag, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:49
+
+from django.db import migrations, models
+
+from apps.inventory.search import (
+    build_search_text, drop_search_index, ensure_search_index, search_column_names
+)
+
+
+def backfill_search_text(apps, schema_editor):
+    """Fill search_text for existing items and build the database index"""
+    InventoryLayout = apps.get_model('inventory', 'InventoryLayout')
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+
+    for layout in InventoryLayout.objects.only('id', 'columns', 'column_visibility').iterator():
+        column_names = search_column_names(layout.columns, layout.column_visibility)
+        batch = []
+        items = InventoryItem.objects.filter(layout_id=layout.pk).only('id', 'product_name', 'sku_code', 'data')
+        for item in items.iterator(chunk_size=2000):
+            item.search_text = build_search_text(item.product_name, item.sku_code, item.data, column_names)
+            batch.append(item)
+            if len(batch) >= 2000:
+                InventoryItem.objects.bulk_update(batch, ['search_text'])
+                batch = []
+        if batch:
+            InventoryItem.objects.bulk_update(batch, ['search_text'])
+
+    ensure_search_index(schema_editor.connection, rebuild=True)
+
+
+def remove_search_index(apps, schema_editor):
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_export_needs_refresh'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='search_text',
+            field=models.TextField(blank=True, default='', help_text='Lower-cased text indexed for full-text search'),
+        ),
+        migrations.RunPython(backfill_search_text, remove_search_index),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0008_item_search_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['user', 'updated_at'], name='inventory_i_user_id_8cfff1_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0009_item_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryValuationSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(blank=True, help_text="The items' data['category']; blank when unset", max_length=100)),
+                ('snapshot_date', models.DateField()),
+                ('item_count', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valuation_snapshots', to='inventory.inventorylayout')),
+                ('status', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='valuation_snapshots', to='inventory.inventorystatus')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Inventory Valuation Snapshot',
+                'verbose_name_plural': 'Inventory Valuation Snapshots',
+                'ordering': ['snapshot_date'],
+                'indexes': [models.Index(fields=['user', 'snapshot_date'], name='inventory_i_user_id_720cce_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryvaluationsnapshot',
+            constraint=models.UniqueConstraint(fields=('user', 'layout', 'category', 'status', 'snapshot_date'), name='inventory_snapshot_uniq'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('inventory', '0010_inventoryvaluationsnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('daily_velocity', models.DecimalField(decimal_places=4, default=0, help_text='Average units used per day', max_digits=14)),
+                ('demand_std', models.DecimalField(decimal_places=4, default=0, help_text='Standard deviation of daily use', max_digits=14)),
+                ('days_of_cover', models.DecimalField(blank=True, decimal_places=1, help_text='Days the current stock lasts; empty when nothing is used', max_digits=10, null=True)),
+                ('reorder_point', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('suggested_order', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('needs_reorder', models.BooleanField(default=False)),
+                ('window_days', models.PositiveIntegerField(default=90)),
+                ('computed_at', models.DateTimeField()),
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='forecast', to='inventory.inventoryitem')),
+                ('layout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecasts', to='inventory.inventorylayout')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_forecasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Inventory Forecast',
+                'verbose_name_plural': 'Inventory Forecasts',
+                'indexes': [models.Index(fields=['user', 'needs_reorder', 'days_of_cover'], name='inventory_i_user_id_79add1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.inventory.utils import match_category
+
+
+def backfill_item_categories(apps, schema_editor):
+    """Resolve each existing item's data['category'] to its category key, once"""
+    InventoryCategory = apps.get_model('inventory', 'InventoryCategory')
+    InventoryItem = apps.get_model('inventory', 'InventoryItem')
+
+    categories_by_user = {}
+    for pk, user_id, name in InventoryCategory.objects.values_list('pk', 'user_id', 'name'):
+        categories_by_user.setdefault(user_id, []).append((pk, name))
+
+    for user_id, categories in categories_by_user.items():
+        batch = []
+        items = InventoryItem.objects.filter(user_id=user_id).only('id', 'data')
+        for item in items.iterator(chunk_size=2000):
+            data = item.data or {}
+            source = data.get('category') or data.get('Category')
+            item.category_id = match_category(source, categories) if source else None
+            if item.category_id:
+                batch.append(item)
+            if len(batch) >= 2000:
+                InventoryItem.objects.bulk_update(batch, ['category'])
+                batch = []
+        if batch:
+            InventoryItem.objects.bulk_update(batch, ['category'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0011_inventoryforecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='category',
+            field=models.ForeignKey(blank=True, help_text="Category resolved from data['category'], so category lists filter and group on an index", null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='items', to='inventory.inventorycategory'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['user', 'category'], name='inventory_i_user_id_17fab0_idx'),
+        ),
+        migrations.RunPython(backfill_item_categories, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_inventoryitem_category'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventoryvaluationsnapshot',
+            name='category',
+            field=models.CharField(blank=True, help_text="Name of the items' category; blank when they have none", max_length=100),
+        ),
+    ]
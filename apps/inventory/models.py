@@ -7,11 +7,22 @@ from decimal import Decimal
 import json
 import uuid
 import re
+import hashlib
+import threading
+from contextlib import contextmanager
 from typing import Dict, Any, List, Optional
 from django.db.models import JSONField
+from apps.core.caching import bump_versions
+from apps.core.utils import bulk_update_rows
+from .formulas import compile_rules
+from .search import build_search_text, search_column_names
+from .utils import extract_number, match_category, to_decimal_column
 
 User = get_user_model()
 
+# Items at or below this quantity count as low stock on dashboards and list headers
+LOW_STOCK_QUANTITY = 5
+
 class InventoryStatus(models.Model):
     """Predefined inventory status options with color coding"""
     STATUS_CHOICES = [
@@ -27,6 +38,9 @@ class InventoryStatus(models.Model):
         ('discontinued', 'Discontinued'),
     ]
     
+    # Statuses are shared by all users, so every user's cached pages vary on this namespace
+    CACHE_NAMESPACE = 'inventory:statuses'
+    
     name = models.CharField(max_length=20, choices=STATUS_CHOICES, unique=True)
     display_name = models.CharField(max_length=50)
     color = models.CharField(max_length=7, default="#007bff")
@@ -85,6 +99,7 @@ class InventoryLayout(models.Model):
     auto_calculate = models.BooleanField(default=True)
     calculation_fields = JSONField(default=list, help_text="Fields that trigger calculations")
     calculation_rules = JSONField(default=dict, help_text="Custom calculation rules")
+    calculation_version = models.PositiveIntegerField(default=1, help_text="Bumped whenever the calculation settings change")
     
     # Branding and styling
     company_logo = models.ImageField(upload_to='inventory/logos/', null=True, blank=True)
@@ -124,11 +139,64 @@ class InventoryLayout(models.Model):
             user_identifier = str(self.user.id)
         return f"{user_identifier} - {self.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not {'auto_calculate', 'columns', 'calculation_rules', 'column_visibility'} & instance.get_deferred_fields():
+            instance._calculation_config = instance.get_calculation_config()
+        return instance
+    
+    def get_calculation_config(self) -> str:
+        """Serialized form of every setting that affects items' derived data (calculations and search text)"""
+        return json.dumps([self.auto_calculate, self.columns, self.calculation_rules, self.column_visibility], sort_keys=True, default=str)
+    
     def save(self, *args, **kwargs):
         # Ensure only one default layout per user
         if self.is_default:
             InventoryLayout.objects.filter(user=self.user, is_default=True).exclude(pk=self.pk).update(is_default=False)
+        
+        # A new calculation version makes every item's calculated_data stale
+        config = self.get_calculation_config()
+        rules_changed = self.pk is not None and getattr(self, '_calculation_config', None) != config
+        if rules_changed:
+            self.calculation_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'calculation_version'}
+        
         super().save(*args, **kwargs)
+        self._calculation_config = config
+        
+        if rules_changed:
+            self.recompute_stale_items()
+    
+    def recompute_stale_items(self, chunk_size: int = 500) -> int:
+        """Recompute and bulk-save calculated_data for this layout's stale items"""
+        fields = ['calculated_data', 'calculation_hash', 'search_text', *InventoryItem.NUMERIC_FIELDS]
+        search_columns = self.get_search_columns()
+        updated_count = 0
+        batch = []
+        
+        for item in self.items.all().iterator(chunk_size=chunk_size):
+            item.layout = self
+            if item.is_calculation_stale():
+                item.sync_search_text(search_columns)
+                batch.append(item)
+            if len(batch) >= chunk_size:
+                InventoryItem.compute_totals_bulk(batch, self)
+                bulk_update_rows(batch, fields)
+                updated_count += len(batch)
+                batch = []
+        
+        if batch:
+            InventoryItem.compute_totals_bulk(batch, self)
+            bulk_update_rows(batch, fields)
+            updated_count += len(batch)
+        
+        # Bulk writes skip the item signals, so refresh the statistics once
+        if updated_count:
+            InventoryStats.rebuild(self.user, self)
+            InventoryStats.rebuild(self.user)
+        return updated_count
     
     def get_visible_columns(self):
         """Get list of visible columns in order"""
@@ -141,6 +209,10 @@ class InventoryLayout(models.Model):
                 visible_columns.append(col)
         return visible_columns
     
+    def get_search_columns(self):
+        """Names of the visible columns whose values are full-text indexed"""
+        return search_column_names(self.columns, self.column_visibility)
+    
     def supports_calculations(self):
         """Check if layout supports calculations (has quantity and price fields)"""
         if not self.auto_calculate:
@@ -315,6 +387,11 @@ class InventoryCustomField(models.Model):
     def __str__(self):
         return f"{self.display_name} ({self.user.email})"
     
+    @staticmethod
+    def cache_namespace(user_id) -> str:
+        """Versioned cache namespace of everything built from a user's custom fields (item form classes)"""
+        return f'inventory:custom_fields:{user_id}'
+    
     def clean(self):
         """Validate field configuration"""
         if self.field_type in ['select', 'multiselect'] and not self.choices:
@@ -338,16 +415,31 @@ class InventoryItem(models.Model):
     product_name = models.CharField(max_length=200)
     sku_code = models.CharField(max_length=100)
     status = models.ForeignKey(InventoryStatus, on_delete=models.PROTECT, related_name='items')
+    category = models.ForeignKey(
+        'InventoryCategory', on_delete=models.SET_NULL, null=True, blank=True, related_name='items',
+        help_text="Category resolved from data['category'], so category lists filter and group on an index"
+    )
     
     # Dynamic data storage
     data = JSONField(default=dict, help_text="Dynamic field values")
     calculated_data = JSONField(default=dict, help_text="Auto-calculated values")
+    calculation_hash = models.CharField(max_length=40, blank=True, help_text="calculation_signature() of the inputs calculated_data was computed from")
+    search_text = models.TextField(blank=True, default='', help_text="Lower-cased text indexed for full-text search")
+    
+    # Typed copies of the numeric values in data/calculated_data, kept in sync on
+    # every save so filters, sorts and aggregates can use indexes
+    quantity = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    unit_price = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    minimum_threshold = models.DecimalField(max_digits=14, decimal_places=2, default=0)
     
     # Metadata
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    NUMERIC_FIELDS = ('quantity', 'unit_price', 'total_value', 'minimum_threshold')
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -355,6 +447,12 @@ class InventoryItem(models.Model):
             models.Index(fields=['sku_code']),
             models.Index(fields=['status']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['user', 'layout', 'quantity']),
+            models.Index(fields=['user', 'layout', 'unit_price']),
+            models.Index(fields=['user', 'layout', 'total_value']),
+            models.Index(fields=['user', 'is_active', 'quantity']),
+            models.Index(fields=['user', 'updated_at']),
+            models.Index(fields=['user', 'category']),
         ]
         unique_together = ['user', 'sku_code']
         verbose_name = 'Inventory Item'
@@ -363,6 +461,374 @@ class InventoryItem(models.Model):
     def __str__(self):
         return f"{self.product_name} ({self.sku_code})"
     
+    # Per-thread nesting depth of bulk_operation() blocks
+    _bulk_state = threading.local()
+    
+    @classmethod
+    @contextmanager
+    def bulk_operation(cls):
+        """Suspend the per-item stats and cache receivers; the caller refreshes them once for the batch"""
+        depth = getattr(cls._bulk_state, 'depth', 0)
+        cls._bulk_state.depth = depth + 1
+        try:
+            yield
+        finally:
+            cls._bulk_state.depth = depth
+    
+    @classmethod
+    def in_bulk_operation(cls) -> bool:
+        return getattr(cls._bulk_state, 'depth', 0) > 0
+    
+    @classmethod
+    def refresh_batch_dependents(cls, user, layout_ids) -> None:
+        """Rebuild stats, flag exports and invalidate caches once after a set-based write"""
+        layout_ids = set(layout_ids)
+        for layout in InventoryLayout.objects.filter(pk__in=layout_ids):
+            InventoryStats.rebuild(user, layout)
+        InventoryStats.rebuild(user)
+        
+        InventoryExport.objects.filter(
+            user=user, layout_id__in=layout_ids, needs_refresh=False
+        ).update(needs_refresh=True)
+        
+        cls.invalidate_cache(user.pk, layout_ids)
+    
+    # Columns recalculate_range() derives from data and writes back
+    RECALCULATED_FIELDS = ('calculated_data', 'calculation_hash', 'search_text', 'status', 'category', *NUMERIC_FIELDS)
+    
+    @classmethod
+    def recalculate_range(cls, layout_id, first_pk, last_pk, update_status: bool = True):
+        """
+        Recompute totals, numeric columns, search text, category key and status in memory for
+        a layout's items with first_pk <= pk <= last_pk, and write only the rows
+        that changed with one executemany(). No signals are sent; call
+        refresh_batch_dependents() once the whole batch is done.
+        
+        Returns:
+            Tuple of (items checked, items updated)
+        """
+        from django.db import transaction
+        
+        layout = InventoryLayout.objects.get(pk=layout_id)
+        search_columns = layout.get_search_columns()
+        statuses = {status.name: status for status in InventoryStatus.objects.all()}
+        attnames = [cls._meta.get_field(name).attname for name in cls.RECALCULATED_FIELDS]
+        
+        items = list(cls.objects.filter(layout_id=layout_id, pk__gte=first_pk, pk__lte=last_pk).order_by('pk'))
+        before = [[getattr(item, name) for name in attnames] for item in items]
+        
+        for item in items:
+            item.layout = layout
+            item.sync_search_text(search_columns)
+        cls.resolve_categories(layout.user_id, items)
+        cls.compute_totals_bulk(items, layout)
+        
+        now = timezone.now()
+        changed = []
+        for item, old_values in zip(items, before):
+            item.sync_numeric_fields()
+            if update_status:
+                status = statuses.get(cls.stock_status_name(item.quantity, item.minimum_threshold))
+                if status is not None:
+                    item.status = status
+            if [getattr(item, name) for name in attnames] != old_values:
+                item.updated_at = now
+                changed.append(item)
+        
+        with transaction.atomic():
+            bulk_update_rows(changed, [*cls.RECALCULATED_FIELDS, 'updated_at'])
+        return len(items), len(changed)
+    
+    @classmethod
+    def bulk_change_status(cls, items, status: 'InventoryStatus', user, notes: str = '') -> int:
+        """
+        Set one status on many items with a single UPDATE, bulk-creating the
+        transaction and log rows. Returns the number of items updated.
+        """
+        from django.db import transaction
+        
+        rows = list(items.values('id', 'status_id', 'layout_id', 'quantity', 'unit_price', 'total_value'))
+        if not rows:
+            return 0
+        item_ids = [row['id'] for row in rows]
+        old_statuses = InventoryStatus.objects.in_bulk({row['status_id'] for row in rows})
+        notes = notes or f'Bulk status update to {status.display_name}'
+        
+        with transaction.atomic():
+            cls.objects.filter(pk__in=item_ids).update(status=status, updated_at=timezone.now())
+            
+            InventoryTransaction.objects.bulk_create([
+                InventoryTransaction(
+                    user=user,
+                    item_id=row['id'],
+                    transaction_type='status_change',
+                    unit_price=row['unit_price'],
+                    total_value=row['total_value'],
+                    quantity_before=row['quantity'],
+                    quantity_after=row['quantity'],
+                    status_before_id=row['status_id'],
+                    status_after=status,
+                    notes=notes
+                )
+                for row in rows
+            ], batch_size=500)
+            
+            InventoryLog.objects.bulk_create([
+                InventoryLog(
+                    user=user,
+                    item_id=row['id'],
+                    layout_id=row['layout_id'],
+                    log_type='status_change',
+                    description=f'Bulk status change: {old_statuses[row["status_id"]].display_name} → {status.display_name}',
+                    details={
+                        'old_status': old_statuses[row['status_id']].name,
+                        'new_status': status.name,
+                        'bulk_operation': True
+                    }
+                )
+                for row in rows
+            ], batch_size=500)
+            
+            cls.refresh_batch_dependents(user, {row['layout_id'] for row in rows})
+        
+        return len(rows)
+    
+    @classmethod
+    def bulk_delete(cls, items, user) -> int:
+        """
+        Delete many items with set-based DELETEs. The log rows are kept on the
+        layout, since logs attached to the items would be deleted with them.
+        Returns the number of items deleted.
+        """
+        from django.db import transaction
+        
+        rows = list(items.values('id', 'product_name', 'sku_code', 'layout_id'))
+        if not rows:
+            return 0
+        item_ids = [row['id'] for row in rows]
+        
+        with transaction.atomic(), cls.bulk_operation():
+            InventoryLog.objects.bulk_create([
+                InventoryLog(
+                    user=user,
+                    layout_id=row['layout_id'],
+                    log_type='delete',
+                    description=f'Bulk deleted: {row["product_name"]} ({row["sku_code"]})',
+                    details={
+                        'item_id': row['id'],
+                        'product_name': row['product_name'],
+                        'sku_code': row['sku_code'],
+                        'bulk_operation': True
+                    }
+                )
+                for row in rows
+            ], batch_size=500)
+            
+            cls.objects.filter(pk__in=item_ids).delete()
+            cls.refresh_batch_dependents(user, {row['layout_id'] for row in rows})
+        
+        return len(rows)
+    
+    # Ledger transaction type recorded for each kind of stock movement
+    MOVEMENT_TRANSACTION_TYPES = {'add': 'in', 'subtract': 'out', 'set': 'adjustment'}
+    
+    @staticmethod
+    def moved_quantity(current: Decimal, adjustment_type: str, quantity: Decimal) -> Decimal:
+        """Quantity after a movement; stock never goes below zero"""
+        if adjustment_type == 'add':
+            return current + quantity
+        elif adjustment_type == 'subtract':
+            return max(Decimal('0'), current - quantity)
+        elif adjustment_type == 'set':
+            return max(Decimal('0'), quantity)
+        raise ValueError(f'Invalid adjustment type: {adjustment_type}')
+    
+    @classmethod
+    def apply_stock_movements(cls, user, movements, reference: str = '',
+                              transaction_type: Optional[str] = None) -> List['InventoryItem']:
+        """
+        Apply stock movements atomically and record each one in the ledger.
+        
+        Each movement is a dict with ``item_id``, ``adjustment_type`` ('add',
+        'subtract' or 'set'), ``quantity`` and an optional ``reason``. The
+        items are locked with SELECT ... FOR UPDATE in id order and the new
+        quantities are worked out from the locked rows, so concurrent
+        movements on the same item queue up instead of overwriting each
+        other. Items, InventoryTransaction and InventoryLog rows and the
+        stats rows are written in one database transaction; nothing is
+        written if any movement is invalid.
+        
+        Args:
+            user: Owner of the items
+            movements: Movement dicts, applied in order
+            reference: Stored on every ledger row, e.g. a delivery note number
+            transaction_type: Ledger type for every movement; by default
+                MOVEMENT_TRANSACTION_TYPES picks one per adjustment type
+        
+        Returns:
+            The updated items, in id order
+        
+        Raises:
+            ValueError: A movement has an unknown type or a negative or non-numeric quantity
+            InventoryItem.DoesNotExist: An item is missing or belongs to another user
+        """
+        from django.db import transaction
+        
+        parsed = []
+        for movement in movements:
+            adjustment_type = movement.get('adjustment_type')
+            if adjustment_type not in cls.MOVEMENT_TRANSACTION_TYPES:
+                raise ValueError(f'Invalid adjustment type: {adjustment_type}')
+            try:
+                item_id = int(movement.get('item_id'))
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid item id: {movement.get("item_id")}')
+            quantity = extract_number(movement.get('quantity'))
+            if quantity is None or quantity < 0:
+                raise ValueError(f'Invalid quantity for item {item_id}: {movement.get("quantity")}')
+            parsed.append((item_id, adjustment_type, Decimal(str(quantity)), movement.get('reason') or ''))
+        if not parsed:
+            return []
+        
+        item_ids = {item_id for item_id, _, _, _ in parsed}
+        with transaction.atomic(), cls.bulk_operation():
+            items = cls.objects.select_for_update().select_related('layout', 'status').filter(
+                user=user, pk__in=item_ids
+            ).order_by('pk').in_bulk()
+            missing = item_ids - set(items)
+            if missing:
+                raise cls.DoesNotExist(f'Inventory items not found: {sorted(missing)}')
+            
+            before = {pk: item.stats_contribution() for pk, item in items.items()}
+            transactions = []
+            logs = []
+            for item_id, adjustment_type, quantity, reason in parsed:
+                item = items[item_id]
+                quantity_before = item.quantity
+                status_before_id = item.status_id
+                diff = item.stage_changes({'quantity': cls.moved_quantity(quantity_before, adjustment_type, quantity)})
+                
+                transactions.append(InventoryTransaction(
+                    user=user,
+                    item=item,
+                    transaction_type=transaction_type or cls.MOVEMENT_TRANSACTION_TYPES[adjustment_type],
+                    quantity_change=item.quantity - quantity_before,
+                    unit_price=item.unit_price,
+                    total_value=item.total_value,
+                    quantity_before=quantity_before,
+                    quantity_after=item.quantity,
+                    status_before_id=status_before_id,
+                    status_after_id=item.status_id,
+                    field_changes=diff,
+                    reference=reference,
+                    notes=reason
+                ))
+                logs.append(InventoryLog(
+                    user=user,
+                    item=item,
+                    layout_id=item.layout_id,
+                    log_type='stock_adjustment',
+                    description=f'Stock adjustment: {adjustment_type} {quantity} units. {reason}'.strip(),
+                    details={
+                        'changes': diff,
+                        'quantity': float(item.quantity),
+                        'unit_price': float(item.unit_price),
+                        'total_value': float(item.total_value),
+                        'status': item.status.name,
+                        'reference': reference,
+                    }
+                ))
+            
+            now = timezone.now()
+            for item in items.values():
+                item.sync_search_text()
+                item.updated_at = now
+            bulk_update_rows(
+                items.values(),
+                ['data', 'calculated_data', 'calculation_hash', 'search_text', 'status', *cls.NUMERIC_FIELDS, 'updated_at']
+            )
+            InventoryTransaction.objects.bulk_create(transactions, batch_size=500)
+            InventoryLog.objects.bulk_create(logs, batch_size=500)
+            
+            InventoryStats.apply_item_deltas(
+                (item, before[pk], item.stats_contribution()) for pk, item in items.items()
+            )
+            layout_ids = {item.layout_id for item in items.values()}
+            InventoryExport.objects.filter(
+                user=user, layout_id__in=layout_ids, needs_refresh=False
+            ).update(needs_refresh=True)
+            cls.invalidate_cache(user.pk, layout_ids)
+        
+        for item in items.values():
+            item._stats_snapshot = item.stats_contribution()
+        return list(items.values())
+    
+    # Fields that feed stats_contribution(); loaded values are snapshotted so
+    # the signals can apply InventoryStats deltas without re-reading the row
+    STATS_FIELDS = ('layout_id', 'status_id', 'is_active', 'quantity', 'total_value')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not set(cls.STATS_FIELDS) & instance.get_deferred_fields():
+            instance._stats_snapshot = instance.stats_contribution()
+        if 'data' not in instance.get_deferred_fields():
+            instance._category_source = instance.category_source()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+        
+        # Writes keep calculated_data current, so reads never have to
+        if self.layout_id and self.is_calculation_stale():
+            self.compute_totals()
+            if update_fields is not None:
+                update_fields |= {'calculated_data', 'calculation_hash'}
+        
+        self.sync_numeric_fields()
+        self.sync_search_text()
+        if self.category_source() != getattr(self, '_category_source', None):
+            type(self).resolve_categories(self.user_id, [self])
+            if update_fields is not None:
+                update_fields.add('category')
+        if update_fields is not None:
+            if {'data', 'calculated_data'} & update_fields:
+                update_fields |= set(self.NUMERIC_FIELDS)
+            if {'data', 'product_name', 'sku_code'} & update_fields:
+                update_fields.add('search_text')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    def category_source(self) -> Any:
+        """The raw data value the category key is resolved from"""
+        data = self.data or {}
+        return data.get('category') or data.get('Category')
+    
+    @classmethod
+    def resolve_categories(cls, user_id, items) -> None:
+        """Set the category key of one user's items from their data, with one query"""
+        categories = list(InventoryCategory.objects.filter(user_id=user_id).values_list('pk', 'name'))
+        for item in items:
+            source = item.category_source()
+            item.category_id = match_category(source, categories) if source else None
+            item._category_source = source
+    
+    def sync_search_text(self, column_names: Optional[List[str]] = None) -> None:
+        """Rebuild the full-text search text from the name, SKU and visible dynamic fields"""
+        if column_names is None:
+            column_names = self.layout.get_search_columns() if self.layout_id else []
+        self.search_text = build_search_text(self.product_name, self.sku_code, self.data, column_names)
+    
+    def sync_numeric_fields(self) -> None:
+        """Copy the numeric values from data/calculated_data into the typed columns"""
+        data = self.data or {}
+        self.quantity = to_decimal_column(data.get('quantity') or data.get('Quantity'))
+        self.unit_price = to_decimal_column(data.get('unit_price') or data.get('Unit Price'))
+        self.total_value = to_decimal_column((self.calculated_data or {}).get('total'))
+        self.minimum_threshold = to_decimal_column(data.get('minimum_threshold'))
+    
     def get_value(self, field_name: str) -> Any:
         """Get value for a specific field"""
         # Check core fields first
@@ -407,77 +873,151 @@ class InventoryItem(models.Model):
         
         return data
     
-    def set_value(self, field_name: str, value: Any) -> None:
-        """Set value for a specific field and trigger calculations"""
-        # Handle core fields (but not properties)
-        if hasattr(self, field_name) and not hasattr(type(self), field_name):
+    # Model fields that inline edits may set directly; everything else lives in data
+    EDITABLE_FIELDS = ('product_name', 'sku_code', 'is_active')
+    
+    @staticmethod
+    def cache_namespaces(user_id, layout_ids=()) -> List[str]:
+        """Versioned cache namespaces that hold rendered data for a user's items"""
+        return [f'inventory:user:{user_id}', *(f'inventory:layout:{layout_id}' for layout_id in layout_ids)]
+    
+    @classmethod
+    def invalidate_cache(cls, user_id, layout_ids=()) -> None:
+        """Drop every cached page fragment and aggregate for the user (and layouts)"""
+        bump_versions(*cls.cache_namespaces(user_id, layout_ids))
+    
+    @staticmethod
+    def _json_value(value: Any) -> Any:
+        """Convert a value to something JSONField can store"""
+        if hasattr(value, 'as_tuple'):  # Check if it's a Decimal
+            return float(value)
+        elif hasattr(value, 'pk'):  # Check if it's a model instance
+            # Store model instance as a dictionary with id and name
+            return {
+                'id': value.pk,
+                'name': str(value)
+            }
+        elif hasattr(value, 'isoformat'):  # Check if it's a date/datetime
+            # Convert date/datetime to ISO format string
+            return value.isoformat()
+        return value
+    
+    def _raw_value(self, field_name: str) -> Any:
+        """Get the stored value for a field, reading data rather than the derived numeric columns"""
+        if field_name in self.EDITABLE_FIELDS or field_name == 'status':
+            return getattr(self, field_name)
+        return self.data.get(field_name)
+    
+    def _assign_value(self, field_name: str, value: Any) -> None:
+        """Set a field in memory: a model field directly, anything else in data"""
+        if field_name in self.EDITABLE_FIELDS:
             setattr(self, field_name, value)
+        elif field_name == 'status' and isinstance(value, InventoryStatus):
+            self.status = value
         else:
-            # Handle dynamic fields - handle different types for JSON serialization
-            if hasattr(value, 'as_tuple'):  # Check if it's a Decimal
-                self.data[field_name] = float(value)
-            elif hasattr(value, 'pk'):  # Check if it's a model instance
-                # Store model instance as a dictionary with id and name
-                self.data[field_name] = {
-                    'id': value.pk,
-                    'name': str(value)
-                }
-            elif hasattr(value, 'isoformat'):  # Check if it's a date/datetime
-                # Convert date/datetime to ISO format string
-                self.data[field_name] = value.isoformat()
-            else:
-                self.data[field_name] = value
+            self.data[field_name] = self._json_value(value)
+    
+    def stage_changes(self, changes: Dict[str, Any], derive_status: bool = True, compute: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply field changes, status derivation and totals in memory only.
         
-        self.save()
-        self.calculate_totals()
+        Returns the {'old': ..., 'new': ...} diff of every changed field.
+        """
+        diff = {}
+        for field_name, value in changes.items():
+            old_value = self._json_value(self._raw_value(field_name))
+            self._assign_value(field_name, value)
+            new_value = self._json_value(self._raw_value(field_name))
+            if old_value != new_value:
+                diff[field_name] = {'old': old_value, 'new': new_value}
         
-        # Trigger updates across all inventory documents and templates
-        self.update_all_documents()
-
+        self.sync_numeric_fields()
+        if derive_status:
+            self._update_status_based_on_quantity()
+        if compute:
+            self.compute_totals()
+        return diff
+    
+    def apply_changes(self, changes: Dict[str, Any], user=None, transaction_type: str = 'field_update',
+                      notes: str = '', reference: str = '', log_type: str = 'field_update',
+                      description: Optional[str] = None, derive_status: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Apply one or more field changes and persist them with a single write.
+        
+        Totals and status are worked out in memory, the item is saved with one
+        UPDATE, and the transaction row, the log row and a set-based UPDATE
+        marking the layout's exports stale are written in the same database
+        transaction.
+        """
+        from django.db import transaction
+        
+        user = user or self.user
+        quantity_before = self.quantity
+        status_before = self.status
+        
+        with transaction.atomic():
+            diff = self.stage_changes(changes, derive_status=derive_status)
+            self.save()
+            
+            InventoryTransaction.objects.create(
+                user=user,
+                item=self,
+                transaction_type=transaction_type,
+                quantity_change=self.quantity - quantity_before,
+                unit_price=self.unit_price,
+                total_value=self.total_value,
+                quantity_before=quantity_before,
+                quantity_after=self.quantity,
+                status_before=status_before,
+                status_after=self.status,
+                field_changes=diff,
+                reference=reference,
+                notes=notes
+            )
+            
+            InventoryLog.objects.create(
+                user=user,
+                item=self,
+                log_type=log_type,
+                description=description or f'Updated {", ".join(diff) or "item"}',
+                details={
+                    'changes': diff,
+                    'quantity': float(self.quantity),
+                    'unit_price': float(self.unit_price),
+                    'total_value': float(self.total_value),
+                    'status': self.status.name,
+                }
+            )
+            
+            self.mark_documents_stale()
+        
+        return diff
+    
+    def set_value(self, field_name: str, value: Any) -> None:
+        """Set value for a specific field and trigger calculations"""
+        self.apply_changes({field_name: value})
+    
     def update_all_documents(self, skip_status_update=False):
         """Update all inventory documents and templates when data changes"""
         try:
-            # Force recalculation of totals
-            calculated_data = self.calculate_totals()
-            
-            # Update calculated data in the model
-            self.calculated_data = calculated_data
-            
-            # Update status based on quantity (only if not explicitly setting status)
+            # Recalculate totals and status in memory, then persist them with one write
+            self.compute_totals()
             if not skip_status_update:
                 self._update_status_based_on_quantity()
+            self.save(update_fields=['calculated_data', 'calculation_hash', 'status', *self.NUMERIC_FIELDS, 'updated_at'])
             
-            # Save the model to persist changes
-            self.save(update_fields=['calculated_data', 'status', 'updated_at'])
-            
-            # Update any cached data
-            self.refresh_from_db()
-            
-            # Update related documents and templates
-            self._update_related_documents()
-            
-            # Clear Django's cache for this item
-            from django.core.cache import cache
-            cache_keys_to_clear = [
-                f'inventory_item_{self.id}',
-                f'inventory_user_{self.user.id}',
-                f'inventory_layout_{self.layout.id}',
-                f'inventory_status_{self.status.id}',
-            ]
-            for key in cache_keys_to_clear:
-                cache.delete(key)
+            self.mark_documents_stale()
             
             # Log the update for tracking
-            from .models import InventoryLog
             InventoryLog.objects.create(
                 user=self.user,
                 item=self,
                 log_type='field_update',
                 description=f'Updated item data - Quantity: {self.get_value("quantity")}, Unit Price: ₦{self.get_value("unit_price")}, Total: ₦{self.total_value}',
                 details={
-                    'quantity': self.get_value("quantity"),
-                    'unit_price': self.get_value("unit_price"),
-                    'total_value': self.total_value,
+                    'quantity': float(self.quantity),
+                    'unit_price': float(self.unit_price),
+                    'total_value': float(self.total_value),
                     'status': self.status.name,
                     'status_display': self.status.display_name,
                     'updated_at': self.updated_at.isoformat()
@@ -485,10 +1025,6 @@ class InventoryItem(models.Model):
             )
             
             print(f"✅ Updated all documents for item {self.id}: {self.product_name}")
-            print(f"   Quantity: {self.get_value('quantity')}")
-            print(f"   Unit Price: ₦{self.get_value('unit_price')}")
-            print(f"   Total: ₦{self.total_value}")
-            print(f"   Status: {self.status.display_name}")
             
         except Exception as e:
             print(f"❌ Error updating documents for item {self.id}: {str(e)}")
@@ -496,183 +1032,151 @@ class InventoryItem(models.Model):
     def _update_status_based_on_quantity(self):
         """Update item status based on current quantity"""
         try:
-            quantity = self.quantity
-            minimum_threshold = self.get_value('minimum_threshold') or 0
+            self.sync_numeric_fields()
+            status_name = self.stock_status_name(self.quantity, self.minimum_threshold)
             
-            # Get status objects
-            from .models import InventoryStatus
-            in_stock_status = InventoryStatus.objects.get(name='in_stock')
-            low_stock_status = InventoryStatus.objects.get(name='low_stock')
-            out_of_stock_status = InventoryStatus.objects.get(name='out_of_stock')
-            
-            # Update status based on quantity
-            if quantity <= 0:
-                self.status = out_of_stock_status
-            elif minimum_threshold > 0 and quantity <= minimum_threshold:
-                self.status = low_stock_status
-            else:
-                self.status = in_stock_status
+            if self.status_id is None or self.status.name != status_name:
+                self.status = InventoryStatus.objects.get(name=status_name)
                 
         except Exception as e:
             print(f"⚠️ Warning: Error updating status for item {self.id}: {str(e)}")
     
-    def _update_related_documents(self):
-        """Update related documents, templates, and exports"""
-        try:
-            # Update any cached exports that include this item
-            from .models import InventoryExport
-            exports = InventoryExport.objects.filter(
-                user=self.user,
-                layout=self.layout
-            )
-            
-            for export in exports:
-                # Mark export as needing refresh
-                export.export_settings['needs_refresh'] = True
-                export.save(update_fields=['export_settings'])
-            
-            # Update any templates that reference this item
-            from .models import InventoryTemplate
-            templates = InventoryTemplate.objects.filter(
-                user=self.user
-            )
-            
-            for template in templates:
-                # Update template if it contains this item's data
-                if 'items' in template.field_config:
-                    template.updated_at = self.updated_at
-                    template.save(update_fields=['updated_at'])
-            
-            # Clear any cached data for this item
-            self._clear_cached_data()
-            
-        except Exception as e:
-            print(f"⚠️ Warning: Error updating related documents: {str(e)}")
+    @staticmethod
+    def stock_status_name(quantity, minimum_threshold) -> str:
+        """Name of the status an item's quantity and threshold call for"""
+        if quantity <= 0:
+            return 'out_of_stock'
+        if minimum_threshold > 0 and quantity <= minimum_threshold:
+            return 'low_stock'
+        return 'in_stock'
+    
+    def mark_documents_stale(self):
+        """Flag this layout's exports for refresh and clear cached item data"""
+        InventoryExport.objects.filter(
+            user_id=self.user_id,
+            layout_id=self.layout_id,
+            needs_refresh=False
+        ).update(needs_refresh=True)
+        
+        self.invalidate_cache(self.user_id, [self.layout_id])
     
-    def _clear_cached_data(self):
-        """Clear any cached data for this item"""
-        try:
-            # Clear any Django cache entries for this item
-            from django.core.cache import cache
-            cache_keys = [
-                f'inventory_item_{self.id}',
-                f'inventory_detail_{self.id}',
-                f'inventory_export_{self.user.id}_{self.layout.id}',
-                f'inventory_print_{self.id}',
-            ]
-            
-            for key in cache_keys:
-                cache.delete(key)
-                
-        except Exception as e:
-            print(f"⚠️ Warning: Error clearing cache: {str(e)}")
+    def calculation_signature(self) -> str:
+        """Hash of the inputs to calculated_data: the item's data and the layout's calculation version"""
+        payload = json.dumps(self.data, sort_keys=True, default=str)
+        return hashlib.sha1(f'{self.layout.calculation_version}:{payload}'.encode('utf-8')).hexdigest()
+    
+    def is_calculation_stale(self) -> bool:
+        """Check whether calculated_data was computed from different data or rules"""
+        return self.calculation_hash != self.calculation_signature()
+    
+    def ensure_calculated(self) -> Dict[str, Any]:
+        """Recompute calculated_data in memory if it is stale, without writing to the database"""
+        if self.is_calculation_stale():
+            self.compute_totals()
+        return self.calculated_data
     
     def calculate_totals(self) -> Dict[str, Any]:
-        """Calculate totals based on layout configuration"""
+        """Calculate totals based on layout configuration and save them"""
         if not self.layout.supports_calculations():
             return {}
         
-        calculated = {}
-        
-        # Extract numeric values from data
-        quantity = self._extract_number(self.get_value('quantity') or self.get_value('Quantity'))
-        unit_price = self._extract_number(self.get_value('unit_price') or self.get_value('Unit Price'))
-        
-        if quantity is not None and unit_price is not None:
-            total = quantity * unit_price
-            # Convert Decimal to float for JSON serialization
-            if hasattr(total, 'as_tuple'):  # Check if it's a Decimal
-                total = float(total)
-            calculated['total'] = total
-            calculated['Total'] = total
-        
-        # Apply custom calculation rules
-        for rule in self.layout.calculation_rules.get('rules', []):
-            if rule.get('enabled', False):
-                result = self._apply_calculation_rule(rule)
-                if result is not None:
-                    calculated[rule['output_field']] = result
-        
-        self.calculated_data = calculated
+        calculated = self.compute_totals()
         self.save()
         return calculated
     
-    def _extract_number(self, value) -> Optional[float]:
-        """Extract numeric value from mixed input with enhanced sanitization"""
-        if value is None or value == '':
-            return None
-        
-        if isinstance(value, (int, float, Decimal)):
-            return float(value)
-        
-        # Convert to string and clean
-        value_str = str(value).strip()
-        
-        # Remove common currency symbols
-        value_str = re.sub(r'[₦$€£¥₹₿₤₩₪₫₭₮₯₰₱₲₳₴₵₶₷₸₹₺₻₼₽₾₿]', '', value_str)
+    def compute_totals(self) -> Dict[str, Any]:
+        """Calculate totals based on layout configuration, in memory only"""
+        if not self.layout.supports_calculations():
+            self.calculation_hash = self.calculation_signature()
+            return {}
         
-        # Remove common text patterns like "each", "pcs", "units", etc.
-        value_str = re.sub(r'\b(each|pcs|pieces|units|items|nos|qty|quantity)\b', '', value_str, flags=re.IGNORECASE)
+        type(self).compute_totals_bulk([self], self.layout)
+        return self.calculated_data
+    
+    @classmethod
+    def compute_totals_bulk(cls, items: List['InventoryItem'], layout: 'InventoryLayout') -> None:
+        """
+        Calculate totals for many items of one layout in a single pass, in memory only.
         
-        # Remove other common text patterns
-        value_str = re.sub(r'\b(price|cost|amount|value|total)\b', '', value_str, flags=re.IGNORECASE)
+        Each input field is extracted once per item into a column, and every
+        compiled calculation rule is evaluated over the whole column at once.
+        """
+        for item in items:
+            item.calculation_hash = item.calculation_signature()
+        if not items or not layout.supports_calculations():
+            return
         
-        # Remove parentheses and their contents
-        value_str = re.sub(r'\([^)]*\)', '', value_str)
+        for item in items:
+            item.sync_numeric_fields()
         
-        # Remove extra spaces and keep only numbers, decimals, and minus signs
-        value_str = re.sub(r'[^\d.-]', '', value_str)
+        # Extract numeric values from data
+        quantities = [extract_number(item.data.get('quantity') or item.data.get('Quantity')) for item in items]
+        unit_prices = [extract_number(item.data.get('unit_price') or item.data.get('Unit Price')) for item in items]
         
-        # Handle multiple decimal points (keep only the first one)
-        parts = value_str.split('.')
-        if len(parts) > 2:
-            value_str = parts[0] + '.' + ''.join(parts[1:])
+        # Apply custom calculation rules, one column per referenced field
+        rules = compile_rules(layout.calculation_rules)
+        columns = {}
+        for _, formula in rules:
+            for field_name in formula.fields:
+                if field_name not in columns:
+                    columns[field_name] = [extract_number(item.get_value(field_name)) or 0 for item in items]
+        results = [(output_field, formula.evaluate(columns, len(items))) for output_field, formula in rules]
         
-        try:
-            result = float(value_str) if value_str else None
-            # Validate reasonable range
-            if result is not None and (result < -999999999 or result > 999999999):
-                return None
-            return result
-        except ValueError:
-            return None
-    
-    def _apply_calculation_rule(self, rule: Dict) -> Optional[float]:
-        """Apply a custom calculation rule"""
-        try:
-            formula = rule.get('formula', '')
-            if not formula:
-                return None
-            
-            # Replace field names with actual values
-            for field_name in rule.get('input_fields', []):
-                field_value = self._extract_number(self.get_value(field_name)) or 0
-                formula = formula.replace(f'{{{field_name}}}', str(field_value))
+        for index, item in enumerate(items):
+            calculated = {}
+            quantity, unit_price = quantities[index], unit_prices[index]
+            if quantity is not None and unit_price is not None:
+                total = quantity * unit_price
+                calculated['total'] = total
+                calculated['Total'] = total
             
-            # Safe evaluation (only basic math operations)
-            allowed_chars = set('0123456789+-*/(). ')
-            if all(c in allowed_chars for c in formula):
-                return eval(formula)
+            for output_field, values in results:
+                if values[index] is not None:
+                    calculated[output_field] = values[index]
             
-        except Exception:
-            pass
-        
-        return None
-    
-    @property
-    def total_value(self) -> float:
-        """Get total value for this item"""
-        return self.calculated_data.get('total', 0)
+            item.calculated_data = calculated
+            item.sync_numeric_fields()
     
-    @property
-    def quantity(self) -> float:
-        """Get quantity value"""
-        return self._extract_number(self.data.get('quantity') or self.data.get('Quantity')) or 0
+    def _extract_number(self, value) -> Optional[float]:
+        """Extract numeric value from mixed input with enhanced sanitization"""
+        return extract_number(value)
+    
+    # Product names with a well-known category, used when auto-assigning categories
+    CATEGORY_SUGGESTIONS = {
+        'Motor Spare parts': 'Accessories',
+        'TV set': 'Electronics',
+        'Smoked Glass': 'Furniture',
+        'TEST ITEM': 'Office Supplies',
+        'Laptop': 'Electronics',
+        'Smartphone': 'Electronics',
+        'T-Shirt': 'Clothing',
+        'Jeans': 'Clothing',
+        'Book': 'Books',
+        'Programming Book': 'Books',
+        'Printer Paper': 'Office Supplies',
+        'Office Chair': 'Furniture',
+    }
     
-    @property
-    def unit_price(self) -> float:
-        """Get unit price value"""
-        return self._extract_number(self.data.get('unit_price') or self.data.get('Unit Price')) or 0
+    @classmethod
+    def suggest_category(cls, product_name: str, category_names: List[str]) -> Optional[str]:
+        """Pick a category for a new item from the user's category names, or None if they have none"""
+        if not category_names:
+            return None
+        suggested_category = cls.CATEGORY_SUGGESTIONS.get(product_name, 'Office Supplies')
+        if suggested_category in category_names:
+            return suggested_category
+        # Use the first available category
+        return category_names[0]
+    
+    def stats_contribution(self) -> Dict[str, Any]:
+        """Get this item's contribution to the materialized InventoryStats rows"""
+        return {
+            'layout_id': self.layout_id,
+            'status_id': self.status_id,
+            'active': bool(self.is_active),
+            'low_stock': bool(self.is_active) and self.quantity <= LOW_STOCK_QUANTITY,
+            'value': self.total_value,
+        }
     
     def format_value(self, value, field_type):
         """Format a value based on field type"""
@@ -830,6 +1334,7 @@ class InventoryExport(models.Model):
     export_settings = JSONField(default=dict, help_text="Export-specific settings")
     
     total_items = models.PositiveIntegerField(default=0)
+    needs_refresh = models.BooleanField(default=False, help_text="Items changed since this export was made")
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -870,6 +1375,321 @@ class InventoryTemplate(models.Model):
         return f"{self.name} ({self.user.email})"
 
 
+class InventoryStats(models.Model):
+    """Materialized inventory statistics, one row per user and layout.
+
+    Rows with ``layout`` set hold the statistics for that layout; the row with
+    ``layout=None`` holds the user-wide totals. Rows are kept current by the
+    ``InventoryItem`` signals applying deltas and can be rebuilt from scratch
+    with ``rebuild_inventory_stats``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inventory_stats')
+    layout = models.ForeignKey(InventoryLayout, on_delete=models.CASCADE, null=True, blank=True, related_name='stats')
+
+    total_items = models.IntegerField(default=0)
+    active_items = models.IntegerField(default=0)
+    low_stock_items = models.IntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    status_counts = JSONField(default=dict, help_text="Item counts keyed by status id")
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'layout'], name='inventory_stats_user_layout_uniq'),
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(layout__isnull=True),
+                name='inventory_stats_user_total_uniq'
+            ),
+        ]
+        verbose_name = 'Inventory Statistics'
+        verbose_name_plural = 'Inventory Statistics'
+
+    def __str__(self):
+        scope = self.layout.name if self.layout_id else 'All layouts'
+        return f"{self.user} - {scope}"
+
+    def get_status_count(self, status) -> int:
+        """Get the number of items with the given status (instance or id)"""
+        status_id = getattr(status, 'pk', status)
+        return self.status_counts.get(str(status_id), 0)
+
+    @classmethod
+    def get_for(cls, user, layout=None) -> 'InventoryStats':
+        """Get the statistics row for a user (and optionally a layout), building it if missing"""
+        stats = cls.objects.filter(user=user, layout=layout).first()
+        if stats is None:
+            stats = cls.rebuild(user, layout)
+        return stats
+
+    @classmethod
+    def rebuild(cls, user, layout=None) -> 'InventoryStats':
+        """Recompute a statistics row from the items currently in the database"""
+        from django.db import transaction
+
+        items = InventoryItem.objects.filter(user=user)
+        if layout is not None:
+            items = items.filter(layout=layout)
+
+        active = models.Q(is_active=True)
+        values = items.aggregate(
+            total_items=models.Count('id'),
+            active_items=models.Count('id', filter=active),
+            low_stock_items=models.Count('id', filter=active & models.Q(quantity__lte=LOW_STOCK_QUANTITY)),
+            total_value=models.Sum('total_value'),
+        )
+        values['total_value'] = values['total_value'] or Decimal('0')
+        values['status_counts'] = {
+            str(row['status_id']): row['count']
+            for row in items.order_by().values('status_id').annotate(count=models.Count('id'))
+        }
+
+        with transaction.atomic():
+            stats, _ = cls.objects.update_or_create(user=user, layout=layout, defaults=values)
+        return stats
+
+    @classmethod
+    def apply_item_delta(cls, item, old=None, new=None, create_missing=True) -> None:
+        """Apply the change from contribution ``old`` to ``new`` to the item's rows.
+
+        Either contribution may be None for a newly created or deleted item.
+        Missing rows are rebuilt from the database (which already reflects
+        the change) when ``create_missing`` is set, and skipped otherwise.
+        """
+        cls.apply_item_deltas([(item, old, new)], create_missing=create_missing)
+
+    @classmethod
+    def apply_item_deltas(cls, deltas, create_missing=True) -> None:
+        """Apply many (item, old, new) changes, locking and saving each affected row once.
+
+        Each contribution is applied to the row of the layout it records, so
+        an item that moved layouts leaves its old layout's row and joins the
+        new one.
+        """
+        from django.db import transaction
+
+        rows = {}
+
+        def add(item, layout_id, old, new):
+            rows.setdefault((item.user_id, layout_id), (item, []))[1].append((old, new))
+
+        for item, old, new in deltas:
+            if old == new:
+                continue
+            old_layout_id = old['layout_id'] if old is not None else item.layout_id
+            new_layout_id = new['layout_id'] if new is not None else item.layout_id
+            if old_layout_id == new_layout_id:
+                add(item, new_layout_id, old, new)
+            else:
+                # Moved between layouts: the old layout loses the item, the new one gains it
+                add(item, old_layout_id, old, None)
+                add(item, new_layout_id, None, new)
+            add(item, None, old, new)
+        if not rows:
+            return
+
+        # Layout rows before the user-wide row, in id order, so concurrent writers lock in the same order
+        order = sorted(rows, key=lambda key: (key[0], key[1] is None, key[1] or 0))
+        with transaction.atomic():
+            for user_id, layout_id in order:
+                item, changes = rows[(user_id, layout_id)]
+                stats = cls.objects.select_for_update().filter(user_id=user_id, layout_id=layout_id).first()
+                if stats is None:
+                    if create_missing:
+                        cls.rebuild(item.user, InventoryLayout(pk=layout_id) if layout_id else None)
+                    continue
+
+                values = {
+                    'total_items': stats.total_items,
+                    'active_items': stats.active_items,
+                    'low_stock_items': stats.low_stock_items,
+                    'total_value': stats.total_value,
+                    'status_counts': dict(stats.status_counts),
+                }
+                for old, new in changes:
+                    if old is not None:
+                        cls._add_contribution(values, old, -1)
+                    if new is not None:
+                        cls._add_contribution(values, new, 1)
+
+                for field_name, value in values.items():
+                    setattr(stats, field_name, value)
+                stats.save()
+
+    @classmethod
+    def rebuild_for_item(cls, item, create_missing=True) -> None:
+        """Rebuild the layout and user-wide rows an item contributes to"""
+        for layout in (item.layout, None):
+            if create_missing or cls.objects.filter(user_id=item.user_id, layout=layout).exists():
+                cls.rebuild(item.user, layout)
+
+    @staticmethod
+    def _add_contribution(values: Dict[str, Any], contribution: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) one item's contribution to a set of totals"""
+        values['total_items'] += sign
+        values['active_items'] += sign * int(contribution['active'])
+        values['low_stock_items'] += sign * int(contribution['low_stock'])
+        values['total_value'] += sign * contribution['value']
+
+        status_key = str(contribution['status_id'])
+        count = values['status_counts'].get(status_key, 0) + sign
+        if count > 0:
+            values['status_counts'][status_key] = count
+        else:
+            values['status_counts'].pop(status_key, None)
+
+
+class InventoryValuationSnapshot(models.Model):
+    """
+    Daily item count, quantity and value per layout, category and status.
+    
+    Rows are written by the snapshot_inventory_valuation command, so trend
+    charts read a small indexed date range instead of replaying InventoryLog
+    details or rescanning items.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inventory_snapshots')
+    layout = models.ForeignKey(InventoryLayout, on_delete=models.CASCADE, related_name='valuation_snapshots')
+    category = models.CharField(max_length=100, blank=True, help_text="Name of the items' category; blank when they have none")
+    status = models.ForeignKey(InventoryStatus, on_delete=models.SET_NULL, null=True, blank=True, related_name='valuation_snapshots')
+    snapshot_date = models.DateField()
+    
+    item_count = models.PositiveIntegerField(default=0)
+    total_quantity = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    total_value = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    # Dimensions trend() can group by, mapped to their columns
+    GROUPINGS = {'category': 'category', 'status': 'status__display_name', 'layout': 'layout__name'}
+    
+    class Meta:
+        ordering = ['snapshot_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'layout', 'category', 'status', 'snapshot_date'],
+                name='inventory_snapshot_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'snapshot_date']),
+        ]
+        verbose_name = 'Inventory Valuation Snapshot'
+        verbose_name_plural = 'Inventory Valuation Snapshots'
+    
+    def __str__(self):
+        return f"{self.user} - {self.snapshot_date} - {self.category or 'Uncategorized'}"
+    
+    @classmethod
+    def capture(cls, user, snapshot_date=None) -> int:
+        """
+        Replace a user's snapshot rows for a date with totals aggregated in SQL
+        from their current items. Returns the number of rows written.
+        """
+        from django.db import transaction
+        from django.db.models.functions import Coalesce
+        
+        snapshot_date = snapshot_date or timezone.localdate()
+        # Grouped on the resolved category key, like the category totals
+        groups = InventoryItem.objects.filter(user=user).annotate(
+            category_key=Coalesce('category__name', models.Value(''), output_field=models.CharField())
+        ).values('layout_id', 'category_key', 'status_id').annotate(
+            item_count=models.Count('id'),
+            total_quantity=models.Sum('quantity'),
+            total_value=models.Sum('total_value'),
+        ).order_by()
+        
+        # Category names longer than the column are merged under their prefix
+        rows = {}
+        for group in groups:
+            key = (group['layout_id'], group['category_key'][:100], group['status_id'])
+            row = rows.setdefault(key, cls(
+                user=user, layout_id=key[0], category=key[1], status_id=key[2], snapshot_date=snapshot_date
+            ))
+            row.item_count += group['item_count']
+            row.total_quantity += group['total_quantity'] or 0
+            row.total_value += group['total_value'] or 0
+        
+        with transaction.atomic():
+            cls.objects.filter(user=user, snapshot_date=snapshot_date).delete()
+            cls.objects.bulk_create(rows.values(), batch_size=500)
+        return len(rows)
+    
+    @classmethod
+    def trend(cls, user, start_date, end_date=None, group_by='category', layout=None) -> Dict[str, Any]:
+        """
+        Daily totals per group for a chart.
+        
+        Returns:
+            {'dates': [...], 'series': [{'label', 'item_count', 'total_quantity',
+            'total_value'}, ...]} with one value per date in each series
+        """
+        column = cls.GROUPINGS[group_by]
+        snapshots = cls.objects.filter(user=user, snapshot_date__gte=start_date)
+        if end_date:
+            snapshots = snapshots.filter(snapshot_date__lte=end_date)
+        if layout is not None:
+            snapshots = snapshots.filter(layout=layout)
+        
+        rows = snapshots.values('snapshot_date', column).annotate(
+            item_count=models.Sum('item_count'),
+            total_quantity=models.Sum('total_quantity'),
+            total_value=models.Sum('total_value'),
+        ).order_by('snapshot_date')
+        
+        dates = []
+        series = {}
+        for row in rows:
+            if not dates or dates[-1] != row['snapshot_date']:
+                dates.append(row['snapshot_date'])
+            label = row[column] or ('Uncategorized' if group_by == 'category' else 'None')
+            values = series.setdefault(label, {})
+            values[row['snapshot_date']] = row
+        
+        return {
+            'dates': [day.isoformat() for day in dates],
+            'series': [
+                {
+                    'label': label,
+                    **{
+                        metric: [float(values[day][metric]) if day in values else 0 for day in dates]
+                        for metric in ('item_count', 'total_quantity', 'total_value')
+                    },
+                }
+                for label, values in sorted(series.items())
+            ],
+        }
+
+
+class InventoryForecast(models.Model):
+    """
+    Stock velocity and reorder point of an item, computed from its movement
+    history by the forecast_inventory command (see forecasting.py).
+    """
+    item = models.OneToOneField(InventoryItem, on_delete=models.CASCADE, related_name='forecast')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inventory_forecasts')
+    layout = models.ForeignKey(InventoryLayout, on_delete=models.CASCADE, related_name='forecasts')
+    
+    daily_velocity = models.DecimalField(max_digits=14, decimal_places=4, default=0, help_text="Average units used per day")
+    demand_std = models.DecimalField(max_digits=14, decimal_places=4, default=0, help_text="Standard deviation of daily use")
+    days_of_cover = models.DecimalField(max_digits=10, decimal_places=1, null=True, blank=True, help_text="Days the current stock lasts; empty when nothing is used")
+    reorder_point = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    suggested_order = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    needs_reorder = models.BooleanField(default=False)
+    
+    window_days = models.PositiveIntegerField(default=90)
+    computed_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'needs_reorder', 'days_of_cover']),
+        ]
+        verbose_name = 'Inventory Forecast'
+        verbose_name_plural = 'Inventory Forecasts'
+    
+    def __str__(self):
+        return f"{self.item} - reorder at {self.reorder_point}"
+
+
 # Legacy models for backward compatibility (simplified)
 class InventoryProduct(models.Model):
     """Legacy model - kept for backward compatibility"""
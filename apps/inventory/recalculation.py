@@ -0,0 +1,103 @@
+"""
+Bulk recalculation of inventory items.
+
+Each layout's items are split into keyset chunks (runs of ``chunk_size``
+consecutive primary keys). A chunk is loaded with one query, recomputed in
+memory by InventoryItem.recalculate_range() and written back with one
+executemany(), so no per-item save() or signal runs. Chunks can be spread
+over a process pool; once every chunk is done, statistics, export flags and
+cache versions are refreshed once per user.
+"""
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections
+
+from apps.core.jobs import init_worker
+
+from .models import InventoryItem
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def chunk_ranges(layout, chunk_size=DEFAULT_CHUNK_SIZE):
+    """(first pk, last pk) of each run of ``chunk_size`` items in the layout"""
+    last_pk = 0
+    while True:
+        pks = list(
+            InventoryItem.objects.filter(layout=layout, pk__gt=last_pk)
+            .order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not pks:
+            return
+        yield pks[0], pks[-1]
+        last_pk = pks[-1]
+
+
+def effective_workers(workers):
+    """Worker processes usable on this database; SQLite allows one writer at a time"""
+    if connections[InventoryItem.objects.db].vendor == 'sqlite':
+        return 1
+    return max(workers, 1)
+
+
+def recalculate_chunk(layout_id, first_pk, last_pk, update_status=True):
+    """Process pool entry point for one chunk"""
+    return InventoryItem.recalculate_range(layout_id, first_pk, last_pk, update_status=update_status)
+
+
+def recalculate_layouts(layouts, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, update_status=True, progress=None):
+    """
+    Recalculate every item of the given layouts.
+
+    Args:
+        layouts: InventoryLayout queryset or list
+        chunk_size: Items loaded and written per chunk
+        workers: Processes to spread chunks over (1 runs them in this process)
+        update_status: Also move items to the status their quantity calls for
+        progress: Optional callable(chunks done, total chunks, items checked, items updated)
+
+    Returns:
+        Tuple of (items checked, items updated)
+    """
+    layouts = list(layouts)
+    tasks = [
+        (layout.pk, first_pk, last_pk, update_status)
+        for layout in layouts
+        for first_pk, last_pk in chunk_ranges(layout, chunk_size)
+    ]
+
+    checked = updated = done = 0
+
+    def record(result):
+        nonlocal checked, updated, done
+        checked += result[0]
+        updated += result[1]
+        done += 1
+        if progress:
+            progress(done, len(tasks), checked, updated)
+
+    workers = effective_workers(workers)
+    if workers > 1 and len(tasks) > 1:
+        # Spawned workers set Django up themselves instead of inheriting this
+        # process's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_worker) as pool:
+            for future in as_completed([pool.submit(recalculate_chunk, *task) for task in tasks]):
+                record(future.result())
+    else:
+        for task in tasks:
+            record(recalculate_chunk(*task))
+
+    # Bulk writes skip the item signals, so refresh the dependents once per user
+    layouts_by_user = defaultdict(set)
+    users = {}
+    for layout in layouts:
+        layouts_by_user[layout.user_id].add(layout.pk)
+        users[layout.user_id] = layout.user
+    for user_id, layout_ids in layouts_by_user.items():
+        InventoryItem.refresh_batch_dependents(users[user_id], layout_ids)
+
+    return checked, updated
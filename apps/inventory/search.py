@@ -0,0 +1,209 @@
+"""
+Full-text search over inventory items.
+
+Every item keeps a lower-cased ``search_text`` built from its product name,
+SKU and the visible dynamic fields of its layout. That column is indexed by
+an FTS5 table on SQLite (kept in sync by triggers) and by a GIN tsvector
+index on PostgreSQL; other databases fall back to substring matching on
+the column.
+"""
+import re
+
+from django.db import connection as default_connection, transaction
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'inventory_item_fts'
+ITEM_TABLE = 'inventory_inventoryitem'
+
+# Words are matched by prefix, so typeahead works from the first characters
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        search_text, content='{ITEM_TABLE}', content_rowid='id',
+        tokenize='unicode61', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {ITEM_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {ITEM_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_text ON {ITEM_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.id, new.search_text);
+    END""",
+]
+
+POSTGRES_DDL = [
+    f"""CREATE INDEX IF NOT EXISTS inventory_item_search_tsv
+        ON {ITEM_TABLE} USING GIN (to_tsvector('simple', search_text))""",
+]
+
+
+def search_column_names(columns, column_visibility) -> list:
+    """Names of the visible layout columns whose values are indexed"""
+    column_visibility = column_visibility or {}
+    return [
+        col.get('name') for col in (columns or [])
+        if col.get('name') and column_visibility.get(col.get('name', ''), True)
+    ]
+
+
+def build_search_text(product_name, sku_code, data, column_names) -> str:
+    """
+    Build the text indexed for an item.
+
+    Args:
+        product_name: The item's product name
+        sku_code: The item's SKU
+        data: The item's dynamic field values
+        column_names: Visible layout columns whose string values are indexed
+
+    Returns:
+        Lower-cased product name, SKU and visible string field values
+    """
+    parts = [product_name or '', sku_code or '']
+    data = data or {}
+    for name in column_names:
+        value = data.get(name)
+        if isinstance(value, dict):
+            value = value.get('name')
+        if isinstance(value, str) and value:
+            parts.append(value)
+    return ' '.join(parts).lower()
+
+
+def tokenize(query: str):
+    """Split a search query into lower-cased words"""
+    return TOKEN_RE.findall((query or '').lower())
+
+
+# Databases already known to have the FTS table and triggers
+_fts_ready = set()
+
+
+def _sqlite_fts_ready(connection, use_cache=True) -> bool:
+    key = connection.settings_dict['NAME']
+    if use_cache and key in _fts_ready:
+        return True
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au']
+        )
+        ready = cursor.fetchone()[0] == 4
+    if ready:
+        _fts_ready.add(key)
+    else:
+        _fts_ready.discard(key)
+    return ready
+
+
+def ensure_search_index(connection=None, rebuild=False) -> bool:
+    """
+    Create the database search index if it is missing.
+
+    SQLite drops triggers whenever a migration remakes the items table, so
+    this runs after every migrate and rebuilds the FTS table if it had to
+    recreate anything.
+
+    Args:
+        connection: Database connection, the default one if not given
+        rebuild: Repopulate the index even if it already existed
+
+    Returns:
+        True if a native index is available, False for the fallback
+    """
+    connection = connection or default_connection
+
+    if connection.vendor == 'sqlite':
+        ready = _sqlite_fts_ready(connection, use_cache=False)
+        try:
+            with connection.cursor() as cursor:
+                for statement in SQLITE_DDL:
+                    cursor.execute(statement)
+                if rebuild or not ready:
+                    cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        except Exception as e:
+            # SQLite builds without FTS5 use the substring fallback
+            print(f"⚠️ Warning: Full-text search index unavailable: {str(e)}")
+            return False
+        return True
+
+    if connection.vendor == 'postgresql':
+        try:
+            with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+                for statement in POSTGRES_DDL:
+                    cursor.execute(statement)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not create search index: {str(e)}")
+            return False
+        return True
+
+    return False
+
+
+def drop_search_index(connection=None) -> None:
+    """Remove the database search index"""
+    connection = connection or default_connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}")
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+            _fts_ready.discard(connection.settings_dict['NAME'])
+        elif connection.vendor == 'postgresql':
+            cursor.execute("DROP INDEX IF EXISTS inventory_item_search_tsv")
+
+
+def search_items(queryset, query, ranked=False):
+    """
+    Filter items to those whose indexed text contains words starting with
+    every word of the query.
+
+    Args:
+        queryset: InventoryItem queryset to filter
+        query: Search string typed by the user
+        ranked: Order the results by relevance, best match first
+
+    Returns:
+        Filtered queryset, annotated with search_rank when ranked
+    """
+    terms = tokenize(query)
+    if not terms:
+        return queryset
+
+    connection = default_connection
+    item_id = f'{ITEM_TABLE}.id'
+
+    if connection.vendor == 'sqlite' and _sqlite_fts_ready(connection):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        queryset = queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        ))
+        if ranked:
+            # bm25() is lower for better matches
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {item_id}",
+                [match], output_field=FloatField()
+            )).order_by('-search_rank')
+        return queryset
+
+    if connection.vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        queryset = queryset.filter(RawSQL(
+            f"to_tsvector('simple', {ITEM_TABLE}.search_text) @@ to_tsquery('simple', %s)",
+            [tsquery], output_field=BooleanField()
+        ))
+        if ranked:
+            queryset = queryset.annotate(search_rank=RawSQL(
+                f"ts_rank(to_tsvector('simple', {ITEM_TABLE}.search_text), to_tsquery('simple', %s))",
+                [tsquery], output_field=FloatField()
+            )).order_by('-search_rank')
+        return queryset
+
+    for term in terms:
+        queryset = queryset.filter(search_text__contains=term)
+    return queryset
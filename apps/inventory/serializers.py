@@ -7,20 +7,35 @@ from .models import (
 )
 
 
+class DynamicFieldsMixin:
+    """Limit the serialized fields to the comma-separated ?fields= of a GET request"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return
+        requested = request.query_params.get('fields')
+        if requested:
+            allowed = {name.strip() for name in requested.split(',') if name.strip()}
+            for name in set(self.fields) - allowed:
+                self.fields.pop(name)
+
+
 class InventoryStatusSerializer(serializers.ModelSerializer):
     class Meta:
         model = InventoryStatus
         fields = '__all__'
 
 
-class InventoryLayoutSerializer(serializers.ModelSerializer):
+class InventoryLayoutSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = InventoryLayout
         fields = '__all__'
-        read_only_fields = ('user', 'created_at', 'updated_at')
+        read_only_fields = ('user', 'calculation_version', 'created_at', 'updated_at')
 
 
-class InventoryItemSerializer(serializers.ModelSerializer):
+class InventoryItemSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(source='status.display_name', read_only=True)
     total_value = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     quantity = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
@@ -28,8 +43,51 @@ class InventoryItemSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = InventoryItem
-        fields = '__all__'
-        read_only_fields = ('user', 'created_at', 'updated_at')
+        exclude = ('calculation_hash', 'search_text')
+        read_only_fields = ('user', 'calculated_data', 'minimum_threshold', 'created_at', 'updated_at')
+    
+    def validate_layout(self, layout):
+        request = self.context.get('request')
+        if request and layout.user_id != request.user.pk:
+            raise serializers.ValidationError('Layout not found.')
+        return layout
+    
+    def validate_sku_code(self, sku_code):
+        request = self.context.get('request')
+        if request:
+            duplicates = InventoryItem.objects.filter(user=request.user, sku_code=sku_code)
+            if self.instance:
+                duplicates = duplicates.exclude(pk=self.instance.pk)
+            if duplicates.exists():
+                raise serializers.ValidationError('An item with this SKU already exists.')
+        return sku_code
+    
+    def update(self, instance, validated_data):
+        """Route edits through InventoryItem.apply_changes so they are logged and saved once"""
+        request = self.context.get('request')
+        changes = dict(validated_data.pop('data', None) or {})
+        for field_name in ('product_name', 'sku_code', 'is_active', 'status'):
+            if field_name in validated_data and validated_data[field_name] != getattr(instance, field_name):
+                changes[field_name] = validated_data[field_name]
+        if 'layout' in validated_data:
+            instance.layout = validated_data['layout']
+        instance.apply_changes(
+            changes,
+            user=request.user if request else None,
+            notes='Updated via API',
+            derive_status='status' not in changes,
+        )
+        return instance
+
+
+class InventoryItemUpsertSerializer(serializers.Serializer):
+    """One row of a bulk upsert; items are matched on sku_code"""
+    sku_code = serializers.CharField(max_length=100)
+    product_name = serializers.CharField(max_length=200, required=False)
+    quantity = serializers.FloatField(required=False)
+    unit_price = serializers.FloatField(required=False)
+    status = serializers.ChoiceField(choices=InventoryStatus.STATUS_CHOICES, required=False)
+    data = serializers.DictField(required=False)
 
 
 class InventoryCustomFieldSerializer(serializers.ModelSerializer):
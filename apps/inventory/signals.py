@@ -1,7 +1,39 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from django.core.cache import cache
-from .models import InventoryItem, InventoryCategory
+from apps.core.caching import bump_versions
+from .models import InventoryItem, InventoryCategory, InventoryCustomField, InventoryLayout, InventoryStats, InventoryStatus
+
+@receiver(post_save, sender=InventoryItem)
+def update_inventory_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Apply this save's delta to the materialized InventoryStats rows.
+    Registered before auto_assign_category so nested saves see a fresh snapshot.
+    """
+    if raw or InventoryItem.in_bulk_operation():
+        return
+    
+    new = instance.stats_contribution()
+    if created:
+        InventoryStats.apply_item_delta(instance, old=None, new=new)
+    elif hasattr(instance, '_stats_snapshot'):
+        InventoryStats.apply_item_delta(instance, old=instance._stats_snapshot, new=new)
+    else:
+        # Loaded without the fields we snapshot, so the old state is unknown
+        InventoryStats.rebuild_for_item(instance)
+    instance._stats_snapshot = new
+
+@receiver(post_delete, sender=InventoryItem)
+def remove_from_inventory_stats(sender, instance, **kwargs):
+    """
+    Remove a deleted item from the InventoryStats rows. Rows are never created
+    here, since cascading deletes may already have removed them.
+    """
+    if InventoryItem.in_bulk_operation():
+        return
+    if hasattr(instance, '_stats_snapshot'):
+        InventoryStats.apply_item_delta(instance, old=instance._stats_snapshot, new=None, create_missing=False)
+    else:
+        InventoryStats.rebuild_for_item(instance, create_missing=False)
 
 @receiver(post_save, sender=InventoryItem)
 def auto_assign_category(sender, instance, created, **kwargs):
@@ -12,86 +44,55 @@ def auto_assign_category(sender, instance, created, **kwargs):
         # Check if item already has a category
         if 'category' not in instance.data or not instance.data['category']:
             # Get user's categories
-            user_categories = InventoryCategory.objects.filter(user=instance.user)
+            category_names = list(InventoryCategory.objects.filter(user=instance.user).values_list('name', flat=True))
             
-            if user_categories.exists():
-                # Create a mapping of common product names to categories
-                item_category_mapping = {
-                    'Motor Spare parts': 'Accessories',
-                    'TV set': 'Electronics', 
-                    'Smoked Glass': 'Furniture',
-                    'TEST ITEM': 'Office Supplies',
-                    'Laptop': 'Electronics',
-                    'Smartphone': 'Electronics',
-                    'T-Shirt': 'Clothing',
-                    'Jeans': 'Clothing',
-                    'Book': 'Books',
-                    'Programming Book': 'Books',
-                    'Printer Paper': 'Office Supplies',
-                    'Office Chair': 'Furniture'
-                }
-                
-                # Find a suitable category for this item
-                suggested_category = item_category_mapping.get(instance.product_name, 'Office Supplies')
-                
-                # Check if the suggested category exists
-                category_exists = user_categories.filter(name=suggested_category).exists()
-                if category_exists:
-                    # Update the item's data with the category
-                    instance.data['category'] = suggested_category
-                    instance.save(update_fields=['data'])
-                else:
-                    # Use the first available category
-                    first_category = user_categories.first()
-                    if first_category:
-                        instance.data['category'] = first_category.name
-                        instance.save(update_fields=['data'])
+            # Find a suitable category for this item
+            suggested_category = InventoryItem.suggest_category(instance.product_name, category_names)
+            if suggested_category:
+                # Update the item's data with the category
+                instance.data['category'] = suggested_category
+                instance.save(update_fields=['data'])
 
 @receiver(post_save, sender=InventoryItem)
-def clear_inventory_cache(sender, instance, **kwargs):
-    """
-    Clear cache when inventory items are updated to ensure fresh data across all views
-    """
-    try:
-        # Clear various cache keys that might be used across different views
-        cache_keys_to_clear = [
-            f'inventory_item_{instance.id}',
-            f'inventory_user_{instance.user.id}',
-            f'inventory_layout_{instance.layout.id}',
-            f'inventory_status_{instance.status.id}',
-            f'inventory_category_{instance.data.get("category", "")}',
-            'inventory_list_cache',
-            'inventory_dashboard_cache',
-            'inventory_export_cache',
-        ]
-        
-        for key in cache_keys_to_clear:
-            cache.delete(key)
-        
-        print(f"🧹 Cleared cache for inventory item {instance.id}: {instance.product_name}")
-        
-    except Exception as e:
-        print(f"⚠️ Error clearing cache for item {instance.id}: {str(e)}")
-
 @receiver(post_delete, sender=InventoryItem)
-def clear_cache_on_delete(sender, instance, **kwargs):
+def invalidate_inventory_cache(sender, instance, **kwargs):
     """
-    Clear cache when inventory items are deleted
+    Bump the user's and layout's cache versions so cached list rows, header
+    counts and category totals are rebuilt on the next view
     """
-    try:
-        # Clear cache for the deleted item
-        cache_keys_to_clear = [
-            f'inventory_item_{instance.id}',
-            f'inventory_user_{instance.user.id}',
-            f'inventory_layout_{instance.layout.id}',
-            f'inventory_status_{instance.status.id}',
-            f'inventory_category_{instance.data.get("category", "")}',
-        ]
-        
-        for key in cache_keys_to_clear:
-            cache.delete(key)
-        
-        print(f"🧹 Cleared cache for deleted inventory item {instance.id}")
-        
-    except Exception as e:
-        print(f"⚠️ Error clearing cache for deleted item {instance.id}: {str(e)}") 
\ No newline at end of file
+    if InventoryItem.in_bulk_operation():
+        return
+    InventoryItem.invalidate_cache(instance.user_id, [instance.layout_id])
+
+@receiver(post_save, sender=InventoryLayout)
+@receiver(post_delete, sender=InventoryLayout)
+def invalidate_layout_cache(sender, instance, **kwargs):
+    """Columns and formulas shape every cached row of the layout"""
+    InventoryItem.invalidate_cache(instance.user_id, [instance.pk])
+
+@receiver(post_save, sender=InventoryCategory)
+def link_category_items(sender, instance, created, raw=False, **kwargs):
+    """Give a new category the user's uncategorized items that already name it"""
+    if raw or not created:
+        return
+    InventoryItem.objects.filter(
+        user_id=instance.user_id, category__isnull=True, data__category=instance.name
+    ).update(category=instance)
+
+@receiver(post_save, sender=InventoryCategory)
+@receiver(post_delete, sender=InventoryCategory)
+def invalidate_category_cache(sender, instance, **kwargs):
+    """Category totals are cached per user"""
+    InventoryItem.invalidate_cache(instance.user_id)
+
+@receiver(post_save, sender=InventoryCustomField)
+@receiver(post_delete, sender=InventoryCustomField)
+def invalidate_custom_field_cache(sender, instance, **kwargs):
+    """Item form classes are built from the user's custom fields"""
+    bump_versions(InventoryCustomField.cache_namespace(instance.user_id))
+
+@receiver(post_save, sender=InventoryStatus)
+@receiver(post_delete, sender=InventoryStatus)
+def invalidate_status_cache(sender, instance, **kwargs):
+    """Status options appear on every user's cached rows and dashboard"""
+    bump_versions(InventoryStatus.CACHE_NAMESPACE)
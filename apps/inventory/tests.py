@@ -0,0 +1,110 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .models import InventoryItem, InventoryLayout, InventoryStats, InventoryStatus
+
+User = get_user_model()
+
+
+class InventoryStatsDeltaTest(TestCase):
+    """The materialized stats rows must match a rebuild after every kind of item change"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='stats@example.com', password='testpass123', first_name='Stats', last_name='User'
+        )
+        columns = [{'name': 'quantity'}, {'name': 'unit_price'}]
+        self.layout = InventoryLayout.objects.create(user=self.user, name='Main', columns=columns)
+        self.other_layout = InventoryLayout.objects.create(user=self.user, name='Other', columns=columns)
+        self.in_stock = InventoryStatus.objects.create(name='in_stock', display_name='In Stock')
+        self.damaged = InventoryStatus.objects.create(name='damaged', display_name='Damaged')
+
+        # Existing rows, so the signals apply deltas instead of rebuilding
+        for layout in (self.layout, self.other_layout, None):
+            InventoryStats.rebuild(self.user, layout)
+
+    def create_item(self, sku, quantity, unit_price, layout=None):
+        return InventoryItem.objects.create(
+            user=self.user, layout=layout or self.layout, product_name=f'Product {sku}', sku_code=sku,
+            status=self.in_stock, data={'quantity': quantity, 'unit_price': unit_price}
+        )
+
+    def stats_values(self):
+        values = {}
+        for layout in (self.layout, self.other_layout, None):
+            stats = InventoryStats.objects.get(user=self.user, layout=layout)
+            values[layout.pk if layout else None] = (
+                stats.total_items, stats.active_items, stats.low_stock_items,
+                stats.total_value, stats.status_counts,
+            )
+        return values
+
+    def assertStatsMatchRebuild(self):
+        maintained = self.stats_values()
+        for layout in (self.layout, self.other_layout, None):
+            InventoryStats.rebuild(self.user, layout)
+        self.assertEqual(maintained, self.stats_values())
+
+    def test_create(self):
+        """Test stats after creating items"""
+        self.create_item('A-1', 4, '2.50')
+        self.create_item('A-2', 50, '10')
+        self.create_item('B-1', 1, '7', layout=self.other_layout)
+
+        stats = InventoryStats.objects.get(user=self.user, layout=None)
+        self.assertEqual(stats.total_items, 3)
+        self.assertEqual(stats.total_value, Decimal('517.00'))
+        self.assertStatsMatchRebuild()
+
+    def test_edit(self):
+        """Test stats after changing quantity, status and active flag"""
+        item = self.create_item('A-1', 4, '2.50')
+        self.create_item('A-2', 50, '10')
+
+        item = InventoryItem.objects.get(pk=item.pk)
+        item.data = {'quantity': 80, 'unit_price': '3'}
+        item.status = self.damaged
+        item.save()
+        self.assertStatsMatchRebuild()
+
+        item.is_active = False
+        item.save()
+        self.assertStatsMatchRebuild()
+
+    def test_layout_move(self):
+        """Test that moving an item takes it out of the old layout's row and into the new one"""
+        item = self.create_item('A-1', 4, '2.50')
+        self.create_item('A-2', 50, '10')
+
+        item = InventoryItem.objects.get(pk=item.pk)
+        item.layout = self.other_layout
+        item.data = {'quantity': 6, 'unit_price': '2.50'}
+        item.save()
+
+        self.assertEqual(InventoryStats.objects.get(user=self.user, layout=self.layout).total_items, 1)
+        self.assertEqual(InventoryStats.objects.get(user=self.user, layout=self.other_layout).total_items, 1)
+        self.assertStatsMatchRebuild()
+
+    def test_delete(self):
+        """Test stats after deleting items, including one loaded with deferred fields"""
+        first = self.create_item('A-1', 4, '2.50')
+        second = self.create_item('A-2', 50, '10')
+        self.create_item('B-1', 1, '7', layout=self.other_layout)
+
+        InventoryItem.objects.get(pk=first.pk).delete()
+        self.assertStatsMatchRebuild()
+
+        InventoryItem.objects.only('id', 'user', 'layout').get(pk=second.pk).delete()
+        self.assertStatsMatchRebuild()
+
+    def test_save_with_deferred_fields(self):
+        """Test that saving an item loaded without its stats fields does not count it twice"""
+        item = self.create_item('A-1', 4, '2.50')
+
+        item = InventoryItem.objects.only('id', 'user', 'layout', 'product_name').get(pk=item.pk)
+        item.product_name = 'Renamed'
+        item.save()
+        self.assertEqual(InventoryStats.objects.get(user=self.user, layout=None).total_items, 1)
+        self.assertStatsMatchRebuild()
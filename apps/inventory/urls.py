@@ -33,10 +33,12 @@ urlpatterns = [
     path('ajax/update-field/', views.ajax_update_field, name='ajax_update_field'),
     path('ajax/update-status/', views.ajax_update_status, name='ajax_update_status'),
     path('ajax/stock-adjustment/', views.ajax_stock_adjustment, name='ajax_stock_adjustment'),
+    path('ajax/stock-movements/', views.ajax_stock_movements, name='ajax_stock_movements'),
     path('ajax/calculate-totals/', views.ajax_calculate_totals, name='ajax_calculate_totals'),
     path('ajax/bulk-update-status/', views.ajax_bulk_update_status, name='ajax_bulk_update_status'),
     path('ajax/bulk-delete/', views.ajax_bulk_delete, name='ajax_bulk_delete'),
     path('ajax/get-item-details/', views.ajax_get_item_details, name='ajax_get_item_details'),
+    path('ajax/search-items/', views.ajax_search_items, name='ajax_search_items'),
     path('ajax/get-item-status/<int:pk>/', views.ajax_get_item_status, name='ajax_get_item_status'),
     path('ajax/quick-edit/', views.ajax_quick_edit, name='ajax_quick_edit'),
     path('ajax/save-layout/', views.ajax_save_layout, name='ajax_save_layout'),
@@ -50,6 +52,8 @@ urlpatterns = [
     
     # Import/Export
     path('import/', views.inventory_import, name='import'),
+    path('ajax/import-progress/<int:pk>/', views.ajax_import_progress, name='ajax_import_progress'),
+    path('ajax/valuation-trends/', views.ajax_valuation_trends, name='ajax_valuation_trends'),
     path('export/', views.inventory_export, name='export'),
     path('ajax/export-selected/', views.ajax_export_selected, name='ajax_export_selected'),
     path('ajax/export-preview/', views.ajax_export_preview, name='ajax_export_preview'),
@@ -53,6 +53,111 @@ def parse_number(value: Union[str, int, float, Decimal]) -> Optional[Decimal]:
         return None
 
 
+def extract_number(value) -> Optional[float]:
+    """
+    Extract a numeric value from mixed input such as "₦1,500 each" or "12 pcs".
+    
+    This is the sanitizing logic behind InventoryItem._extract_number and the
+    typed numeric columns on InventoryItem.
+    
+    Args:
+        value: The raw value (number, string, or None)
+    
+    Returns:
+        float if a number could be extracted, None otherwise
+    """
+    if value is None or value == '':
+        return None
+    
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    
+    # Convert to string and clean
+    value_str = str(value).strip()
+    
+    # Remove common currency symbols
+    value_str = re.sub(r'[₦$€£¥₹₿₤₩₪₫₭₮₯₰₱₲₳₴₵₶₷₸₹₺₻₼₽₾₿]', '', value_str)
+    
+    # Remove common text patterns like "each", "pcs", "units", etc.
+    value_str = re.sub(r'\b(each|pcs|pieces|units|items|nos|qty|quantity)\b', '', value_str, flags=re.IGNORECASE)
+    
+    # Remove other common text patterns
+    value_str = re.sub(r'\b(price|cost|amount|value|total)\b', '', value_str, flags=re.IGNORECASE)
+    
+    # Remove parentheses and their contents
+    value_str = re.sub(r'\([^)]*\)', '', value_str)
+    
+    # Remove extra spaces and keep only numbers, decimals, and minus signs
+    value_str = re.sub(r'[^\d.-]', '', value_str)
+    
+    # Handle multiple decimal points (keep only the first one)
+    parts = value_str.split('.')
+    if len(parts) > 2:
+        value_str = parts[0] + '.' + ''.join(parts[1:])
+    
+    try:
+        result = float(value_str) if value_str else None
+        # Validate reasonable range
+        if result is not None and (result < -999999999 or result > 999999999):
+            return None
+        return result
+    except ValueError:
+        return None
+
+
+def to_decimal_column(value, default: Decimal = Decimal('0')) -> Decimal:
+    """
+    Convert a raw value to a Decimal rounded to two places for a typed column.
+    
+    Args:
+        value: The raw value, sanitized with extract_number
+        default: Value to use when no number can be extracted
+    
+    Returns:
+        Decimal with two decimal places
+    """
+    number = extract_number(value)
+    if number is None:
+        return default
+    return Decimal(str(number)).quantize(Decimal('0.01'))
+
+
+def match_category(value, categories) -> Optional[int]:
+    """
+    Resolve a stored data['category'] value to one of the user's category ids.
+    
+    A stored model instance ({'id': ..., 'name': ...}) matches by id. A plain
+    name matches exactly, then case-insensitively, then any category whose
+    name it contains, the order the old per-request JSON lookups tried.
+    
+    Args:
+        value: The raw data['category'] (or data['Category']) value
+        categories: (id, name) pairs of the user's categories
+    
+    Returns:
+        The category id, or None when nothing matches
+    """
+    categories = list(categories)
+    if isinstance(value, dict):
+        if value.get('id') in {pk for pk, _ in categories}:
+            return value['id']
+        value = value.get('name')
+    if not isinstance(value, str) or not value.strip():
+        return None
+    
+    for pk, name in categories:
+        if name == value:
+            return pk
+    lowered = value.lower()
+    for pk, name in categories:
+        if name.lower() == lowered:
+            return pk
+    for pk, name in categories:
+        if name and name.lower() in lowered:
+            return pk
+    return None
+
+
 def format_currency(amount: Union[Decimal, float, int], currency: str = 'USD') -> str:
     """
     Format a number as currency.
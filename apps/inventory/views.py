@@ -4,38 +4,45 @@ from django.contrib import messages
 from django.http import JsonResponse, HttpResponse, Http404
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST, require_GET
-from django.core.paginator import Paginator
 from django.db.models import Q, Sum, Count, Avg, F
 from django.utils import timezone
 from django.core.serializers import serialize
 from django.template.loader import render_to_string
+from django.conf import settings
+from django.core.files.storage import default_storage
 import json
+import logging
 import re
+from datetime import date
 from decimal import Decimal
 # import pandas as pd  # Commented out - heavy dependency, using openpyxl instead
 import io
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
-from openpyxl.drawing.image import Image as XLImage
-import csv
 from django import forms
 
+from apps.core.caching import cache_get_or_set, fragment_cache_timeout, namespace_token, versioned_key
+from apps.core.exports import ExcelExport, iter_instances, streaming_csv_response
+from apps.core.jobs import enqueue
+from apps.core.pagination import paginate
 from .models import (
     InventoryItem, InventoryLayout, InventoryStatus, InventoryCustomField,
     InventoryTransaction, InventoryLog, InventoryExport, ImportedInventoryFile,
-    InventoryTemplate,
+    InventoryTemplate, InventoryStats, InventoryValuationSnapshot, InventoryForecast, LOW_STOCK_QUANTITY,
     # Legacy models
     InventoryProduct, InventoryCategory
 )
 from .forms import (
-    InventoryItemForm, InventoryLayoutForm, InventoryCustomFieldForm,
+    InventoryLayoutForm, InventoryCustomFieldForm,
     StatusChangeForm, InventoryTransactionForm, InventorySearchForm,
     InventoryImportForm, InventoryExportForm, InventoryTemplateForm,
-    LayoutColumnForm, StockAdjustmentForm,
+    LayoutColumnForm, StockAdjustmentForm, item_form_class,
     # Legacy forms
     InventoryProductForm, InventoryCategoryForm
 )
+from .formulas import CompiledFormula, FormulaError
+from .search import search_items
+from .utils import extract_number
+
+logger = logging.getLogger('inventory')
 
 
 @login_required
@@ -51,34 +58,32 @@ def inventory_dashboard(request):
         }
     )
     
-    # Get comprehensive statistics
-    total_items = InventoryItem.objects.filter(user=request.user).count()
-    active_items = InventoryItem.objects.filter(user=request.user, is_active=True).count()
-    
-    # Calculate total value
-    total_value = 0
-    if layout.supports_calculations():
-        items_with_totals = InventoryItem.objects.filter(user=request.user)
-        total_value = sum(item.total_value for item in items_with_totals)
-    
-    # Status statistics
-    status_stats = {}
-    for status in InventoryStatus.objects.filter(is_active=True):
-        count = InventoryItem.objects.filter(user=request.user, status=status).count()
-        status_stats[status.name] = {
-            'count': count,
-            'color': status.color,
-            'display_name': status.display_name
-        }
+    # Header aggregates are cached until the user's inventory or the statuses change
+    summary_key = versioned_key(
+        'inventory_dashboard',
+        [InventoryStatus.CACHE_NAMESPACE, *InventoryItem.cache_namespaces(request.user.pk)],
+        layout.pk,
+    )
+    summary = cache_get_or_set(summary_key, lambda: dashboard_summary(request.user, layout))
     
     # Low stock alerts (items with quantity <= 5)
     low_stock_items = InventoryItem.objects.filter(
         user=request.user,
-        is_active=True
-    ).filter(
-        Q(data__quantity__lte=5) | Q(data__Quantity__lte=5)
+        is_active=True,
+        quantity__lte=LOW_STOCK_QUANTITY
     )[:10]
     
+    # Reorder alerts from the stored forecasts, most urgent first; the fixed
+    # low-stock cut-off is used until forecast_inventory has run
+    if InventoryForecast.objects.filter(user=request.user).exists():
+        low_stock_products = InventoryItem.objects.filter(
+            user=request.user,
+            is_active=True,
+            forecast__needs_reorder=True
+        ).select_related('forecast').order_by(F('forecast__days_of_cover').asc(nulls_last=True), 'quantity')[:10]
+    else:
+        low_stock_products = low_stock_items
+    
     # Recent activity
     recent_logs = InventoryLog.objects.filter(user=request.user)[:10]
     
@@ -87,32 +92,46 @@ def inventory_dashboard(request):
     
     context = {
         'layout': layout,
-        'total_items': total_items,
-        'active_items': active_items,
-        'total_value': total_value,
-        'status_stats': status_stats,
         'low_stock_items': low_stock_items,
+        'low_stock_products': low_stock_products,
         'recent_logs': recent_logs,
         'user_layouts': user_layouts,
+        **summary,
     }
     
     return render(request, 'inventory/dashboard.html', context)
 
 
+def dashboard_summary(user, layout):
+    """Dashboard counters from the materialized user-wide stats row"""
+    stats = InventoryStats.get_for(user)
+    
+    # Calculate total value
+    total_value = 0
+    if layout.supports_calculations():
+        total_value = stats.total_value
+    
+    # Status statistics
+    status_stats = {}
+    for status in InventoryStatus.objects.filter(is_active=True):
+        status_stats[status.name] = {
+            'count': stats.get_status_count(status),
+            'color': status.color,
+            'display_name': status.display_name
+        }
+    
+    return {
+        'total_items': stats.total_items,
+        'active_items': stats.active_items,
+        'total_value': total_value,
+        'status_stats': status_stats,
+        'low_stock_count': stats.low_stock_items,
+    }
+
+
 @login_required
 def inventory_list(request):
     """List inventory items with filtering and search"""
-    # Clear any cached data to ensure fresh results
-    from django.core.cache import cache
-    # Clear specific cache keys instead of using delete_pattern
-    cache_keys_to_clear = [
-        'inventory_list_cache',
-        'inventory_dashboard_cache',
-        'inventory_export_cache',
-    ]
-    for key in cache_keys_to_clear:
-        cache.delete(key)
-    
     # Get layout
     layout_id = request.GET.get('layout')
     if layout_id:
@@ -139,20 +158,11 @@ def inventory_list(request):
             pass
     
     # Get items for this user
-    items = InventoryItem.objects.filter(user=request.user)
+    items = InventoryItem.objects.filter(user=request.user).select_related('layout', 'status')
     
     # Apply category filtering if specified
     if category:
-        # Try multiple filtering methods to ensure we find items
-        category_items = items.filter(data__category=category.name)
-        if not category_items.exists():
-            # Try case-insensitive search
-            category_items = items.filter(data__category__icontains=category.name)
-        if not category_items.exists():
-            # Try different field name
-            category_items = items.filter(data__Category=category.name)
-        
-        items = category_items
+        items = items.filter(category=category)
     
     # Apply layout filtering AFTER category filtering (only if no category is specified)
     if layout and not category:
@@ -164,12 +174,9 @@ def inventory_list(request):
             items = layout_items
         # If no items found with layout, show all items for the category regardless of layout
     
-    # Force recalculation for all items to ensure latest data
-    for item in items:
-        item.calculate_totals()
-    
     # Handle search and filtering
     search_form = InventorySearchForm(request.GET, user=request.user)
+    search = None
     if search_form.is_valid():
         search = search_form.cleaned_data.get('search')
         status = search_form.cleaned_data.get('status')
@@ -180,42 +187,63 @@ def inventory_list(request):
         is_active = search_form.cleaned_data.get('is_active')
         
         if search:
-            items = items.filter(
-                Q(product_name__icontains=search) |
-                Q(sku_code__icontains=search) |
-                Q(data__icontains=search)
-            )
+            items = search_items(items, search, ranked=True)
         
         if status:
             items = items.filter(status=status)
         
         if min_quantity is not None:
-            items = items.filter(
-                Q(data__quantity__gte=min_quantity) | Q(data__Quantity__gte=min_quantity)
-            )
+            items = items.filter(quantity__gte=min_quantity)
         
         if max_quantity is not None:
-            items = items.filter(
-                Q(data__quantity__lte=max_quantity) | Q(data__Quantity__lte=max_quantity)
-            )
+            items = items.filter(quantity__lte=max_quantity)
         
         if min_price is not None:
-            items = items.filter(
-                Q(data__unit_price__gte=min_price) | Q(data__Unit_Price__gte=min_price)
-            )
+            items = items.filter(unit_price__gte=min_price)
         
         if max_price is not None:
-            items = items.filter(
-                Q(data__unit_price__lte=max_price) | Q(data__Unit_Price__lte=max_price)
-            )
+            items = items.filter(unit_price__lte=max_price)
         
         if is_active:
             items = items.filter(is_active=(is_active == 'true'))
     
-    # Pagination
-    paginator = Paginator(items, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Header counters come from the materialized stats row unless the list is narrowed down
+    active_filters = {}
+    if search_form.is_valid():
+        active_filters = {
+            name: value for name, value in search_form.cleaned_data.items()
+            if name != 'layout' and value not in (None, '')
+        }
+    is_filtered = bool(category) or bool(active_filters)
+    cache_namespaces = InventoryItem.cache_namespaces(request.user.pk, [layout.pk])
+    if is_filtered:
+        # Counts for a filtered list are cached until the user's inventory changes
+        header_key = versioned_key(
+            'inventory_header', cache_namespaces, layout.pk, category.pk if category else '',
+            sorted((name, getattr(value, 'pk', value)) for name, value in active_filters.items()),
+        )
+        header_stats = cache_get_or_set(header_key, lambda: {
+            'total_items': items.count(),
+            'active_items': items.filter(is_active=True).count(),
+            'low_stock_items': items.filter(quantity__lte=LOW_STOCK_QUANTITY).count(),
+        })
+    else:
+        stats = InventoryStats.get_for(request.user, layout)
+        header_stats = {
+            'total_items': stats.total_items,
+            'active_items': stats.active_items,
+            'low_stock_items': stats.low_stock_items,
+        }
+    
+    # Pagination: keyset pages for large lists; relevance-ranked searches keep page numbers
+    page_obj = paginate(
+        request, items, 20, ordering=['-created_at', '-id'],
+        count=header_stats['total_items'], keyset=not search,
+    )
+    
+    # Bring stale rows up to date in memory only; reads never write
+    for item in page_obj:
+        item.ensure_calculated()
     
     # Calculate grand total if layout supports calculations
     grand_total = 0
@@ -258,14 +286,13 @@ def inventory_list(request):
         'grand_total': grand_total,
         'statuses': InventoryStatus.objects.filter(is_active=True),
         'user_layouts': InventoryLayout.objects.filter(user=request.user),
-        'total_items': items.count(),
-        'active_items': items.filter(is_active=True).count(),
-        'low_stock_items': items.filter(
-            Q(data__quantity__lte=5) | Q(data__Quantity__lte=5)
-        ).count(),
         'supports_calculations': layout.supports_calculations(),
         'calculation_fields': layout.get_calculation_fields(),
         'current_category': category if category_id else None,
+        # Rendered rows are cached per item until the inventory, layout or statuses change
+        'row_cache_version': namespace_token(InventoryStatus.CACHE_NAMESPACE, *cache_namespaces),
+        'fragment_cache_timeout': fragment_cache_timeout(),
+        **header_stats,
     }
     
     return render(request, 'inventory/inventory_list.html', context)
@@ -291,7 +318,7 @@ def inventory_create(request):
             )
     
     if request.method == 'POST':
-        form = InventoryItemForm(request.POST, user=request.user, layout=layout)
+        form = item_form_class(layout)(request.POST, user=request.user, layout=layout)
         
         if form.is_valid():
             item = form.save(commit=False)
@@ -314,7 +341,7 @@ def inventory_create(request):
             
             return redirect('inventory:list')
     else:
-        form = InventoryItemForm(user=request.user, layout=layout)
+        form = item_form_class(layout)(user=request.user, layout=layout)
     
     context = {
         'form': form,
@@ -331,7 +358,7 @@ def inventory_update(request, pk):
     item = get_object_or_404(InventoryItem, pk=pk, user=request.user)
     
     if request.method == 'POST':
-        form = InventoryItemForm(request.POST, instance=item, user=request.user, layout=item.layout)
+        form = item_form_class(item.layout)(request.POST, instance=item, user=request.user, layout=item.layout)
         if form.is_valid():
             old_data = {
                 'product_name': item.product_name,
@@ -365,7 +392,7 @@ def inventory_update(request, pk):
             messages.success(request, 'Inventory item updated successfully!')
             return redirect('inventory:list')
     else:
-        form = InventoryItemForm(instance=item, user=request.user, layout=item.layout)
+        form = item_form_class(item.layout)(instance=item, user=request.user, layout=item.layout)
     
     context = {
         'form': form,
@@ -401,15 +428,10 @@ def inventory_detail(request, pk):
     """View inventory item details"""
     from datetime import date, timedelta
     
-    # Clear cache for this specific item to ensure fresh data
-    from django.core.cache import cache
-    cache.delete(f'inventory_item_{pk}')
-    
     product = get_object_or_404(InventoryItem, pk=pk, user=request.user)
     
-    # Force recalculation to ensure latest data
-    product.calculate_totals()
-    product.refresh_from_db()
+    # Bring a stale row up to date in memory only
+    product.ensure_calculated()
     
     # Get recent activity logs
     recent_logs = InventoryLog.objects.filter(item=product).order_by('-created_at')[:10]
@@ -480,58 +502,17 @@ def ajax_update_field(request):
                 })
             value = sanitized_value
         
-        # Update the field
-        item.set_value(field_name, value)
-        
-        # Force recalculation of totals if this is a calculation-related field
-        calculated_data = {}
-        if item.layout.supports_calculations():
-            # Always recalculate when quantity or price fields change
-            if field_name.lower() in ['quantity', 'quantity_in_stock', 'unit_price', 'price']:
-                calculated_data = item.calculate_totals()
-            else:
-                calculated_data = item.calculate_totals()
-        
-        # Trigger updates across all documents and templates
-        item.update_all_documents()
-        
-        # Create transaction record - handle serialization
-        old_value = item.get_value(field_name)
-        # Convert various types for JSON serialization
-        if hasattr(old_value, 'as_tuple'):  # Check if it's a Decimal
-            old_value = float(old_value)
-        elif hasattr(old_value, 'isoformat'):  # Check if it's a date/datetime
-            old_value = old_value.isoformat()
-        if hasattr(value, 'as_tuple'):  # Check if it's a Decimal
-            value = float(value)
-        elif hasattr(value, 'isoformat'):  # Check if it's a date/datetime
-            value = value.isoformat()
-            
-        InventoryTransaction.objects.create(
+        # Apply the change, totals and status with a single write
+        item.apply_changes(
+            {field_name: value},
             user=request.user,
-            item=item,
-            transaction_type='field_update',
-            field_changes={field_name: {'old': old_value, 'new': value}},
-            notes=f'Field {field_name} updated via inline editing'
+            notes=f'Field {field_name} updated via inline editing',
+            description=f'Updated {field_name}: {value}'
         )
         
-        # Log the field update - handle Decimal serialization
-        old_log_value = item.get_value(field_name)
-        new_log_value = value
-        
-        # Convert Decimal objects to float for JSON serialization
-        if hasattr(old_log_value, 'as_tuple'):  # Check if it's a Decimal
-            old_log_value = float(old_log_value)
-        if hasattr(new_log_value, 'as_tuple'):  # Check if it's a Decimal
-            new_log_value = float(new_log_value)
-            
-        InventoryLog.objects.create(
-            user=request.user,
-            item=item,
-            log_type='field_update',
-            description=f'Updated {field_name}: {value}',
-            details={'field_name': field_name, 'old_value': old_log_value, 'new_value': new_log_value}
-        )
+        calculated_data = {}
+        if item.layout.supports_calculations():
+            calculated_data = item.calculated_data
         
         return JsonResponse({
             'success': True,
@@ -559,65 +540,23 @@ def ajax_update_status(request):
         item_id = data.get('item_id')
         status_id = data.get('new_status')  # Changed from 'status_id' to 'new_status'
         
-        print(f"DEBUG: Updating status for item {item_id} to status {status_id}")
-        
         item = get_object_or_404(InventoryItem, pk=item_id, user=request.user)
         
         # Get status by ID
         status = get_object_or_404(InventoryStatus, pk=status_id)
         
         old_status = item.status
-        print(f"DEBUG: Old status - {old_status.name} ({old_status.display_name})")
-        print(f"DEBUG: New status - {status.name} ({status.display_name})")
-        
-        item.status = status
-        item.save()
-        
-        # Trigger updates across all documents and templates (skip automatic status update)
-        item.update_all_documents(skip_status_update=True)
-        
-        # Force refresh of all related data
-        from django.core.cache import cache
-        cache_keys_to_clear = [
-            f'inventory_item_{item.id}',
-            f'inventory_user_{item.user.id}',
-            f'inventory_layout_{item.layout.id}',
-            f'inventory_status_{item.status.id}',
-            f'inventory_status_{old_status.id}',
-            f'inventory_category_{item.data.get("category", "")}',
-            'inventory_list_cache',
-            'inventory_dashboard_cache',
-            'inventory_export_cache',
-        ]
-        
-        for key in cache_keys_to_clear:
-            cache.delete(key)
-        
-        print(f"DEBUG: Status saved successfully for item {item_id}")
-        print(f"DEBUG: Cleared cache keys for fresh data across all views")
-        
-        # Create transaction record
-        InventoryTransaction.objects.create(
-            user=request.user,
-            item=item,
-            transaction_type='status_change',
-            status_before=old_status,
-            status_after=status,
-            notes=f'Status changed from {old_status.display_name} to {status.display_name}'
-        )
+        logger.debug("Updating status of item %s from %s to %s", item_id, old_status.name, status.name)
         
-        # Log the status change
-        InventoryLog.objects.create(
+        # Save the status and record the change with a single write (skip automatic status update)
+        item.apply_changes(
+            {'status': status},
             user=request.user,
-            item=item,
+            transaction_type='status_change',
+            notes=f'Status changed from {old_status.display_name} to {status.display_name}',
             log_type='status_change',
             description=f'Status changed: {old_status.display_name} → {status.display_name}',
-            details={
-                'old_status': old_status.name,
-                'new_status': status.name,
-                'old_display_name': old_status.display_name,
-                'new_display_name': status.display_name
-            }
+            derive_status=False
         )
         
         return JsonResponse({
@@ -648,52 +587,69 @@ def ajax_stock_adjustment(request):
         quantity = extract_numeric_value(data.get('quantity', 0))
         reason = data.get('reason', '')
         
-        item = get_object_or_404(InventoryItem, pk=item_id, user=request.user)
-        
-        old_quantity = item.quantity
+        # Worked out from the locked row, so concurrent adjustments are not lost
+        item, = InventoryItem.apply_stock_movements(request.user, [{
+            'item_id': item_id,
+            'adjustment_type': adjustment_type,
+            'quantity': quantity,
+            'reason': reason,
+        }], transaction_type='adjustment')
         
-        if adjustment_type == 'add':
-            new_quantity = old_quantity + quantity
-        elif adjustment_type == 'subtract':
-            new_quantity = max(0, old_quantity - quantity)
-        elif adjustment_type == 'set':
-            new_quantity = max(0, quantity)
-        else:
-            raise ValueError('Invalid adjustment type')
-        
-        # Update quantity
-        item.set_value('quantity', new_quantity)
-        
-        # Update all related documents and calculations
-        item.update_all_documents()
+        return JsonResponse({
+            'success': True,
+            'new_quantity': float(item.quantity),
+            'total': str(item.total_value),
+            'message': f'Stock adjusted successfully'
+        })
         
-        # Create transaction log
-        InventoryTransaction.objects.create(
-            user=request.user,
-            item=item,
-            transaction_type='adjustment',
-            quantity_change=new_quantity - old_quantity,
-            quantity_before=old_quantity,
-            quantity_after=new_quantity,
-            notes=reason
-        )
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        })
+
+
+@csrf_exempt
+@require_POST
+@login_required
+def ajax_stock_movements(request):
+    """
+    Apply a batch of stock movements (e.g. a scanned delivery note) in one transaction.
+    
+    Body: {"reference": "DN-1042", "movements": [{"item_id": 1, "adjustment_type":
+    "add", "quantity": 12, "reason": "..."}, ...]}. Either every movement is
+    applied or none is.
+    """
+    try:
+        data = json.loads(request.body)
+        movements = data.get('movements')
+        if not isinstance(movements, list) or not movements:
+            return JsonResponse({
+                'success': False,
+                'error': 'movements must be a non-empty list'
+            })
+        max_rows = settings.INVENTORY_API_BULK_MAX_ROWS
+        if len(movements) > max_rows:
+            return JsonResponse({
+                'success': False,
+                'error': f'At most {max_rows} movements per call'
+            })
         
-        # Log the adjustment
-        InventoryLog.objects.create(
-            user=request.user,
-            item=item,
-            log_type='stock_adjustment',
-            description=f'Stock adjustment: {adjustment_type} {quantity} ({reason})'
+        items = InventoryItem.apply_stock_movements(
+            request.user, movements, reference=str(data.get('reference', ''))[:100]
         )
         
         return JsonResponse({
             'success': True,
-            'new_quantity': new_quantity,
-            'total': str(item.total_value),
-            'message': f'Stock adjusted successfully'
+            'applied_count': len(movements),
+            'items': [
+                {'id': item.pk, 'quantity': float(item.quantity), 'total': str(item.total_value), 'status': item.status.name}
+                for item in items
+            ],
+            'message': f'Applied {len(movements)} stock movements to {len(items)} items'
         })
         
-    except Exception as e:
+    except (ValueError, InventoryItem.DoesNotExist) as e:
         return JsonResponse({
             'success': False,
             'error': str(e)
@@ -722,8 +678,8 @@ def ajax_calculate_totals(request):
         grand_total = 0
         item_count = 0
         
-        for item in items:
-            calculated = item.calculate_totals()
+        for item in items.select_related('layout'):
+            calculated = item.ensure_calculated() if item.layout.supports_calculations() else {}
             totals[item.id] = calculated
             
             # Add to grand total if calculations are supported
@@ -864,164 +820,28 @@ def inventory_import(request):
                     messages.error(request, 'Unsupported file format. Please use Excel (.xlsx, .xls) or CSV files.')
                     return redirect('inventory:import')
                 
-                # Read the file using openpyxl for Excel and csv for CSV
-                if file_type == 'excel':
-                    from openpyxl import load_workbook
-                    wb = load_workbook(uploaded_file, data_only=True)
-                    ws = wb.active
-                    
-                    # Get headers from first row
-                    headers = []
-                    for cell in ws[1]:
-                        headers.append(cell.value if cell.value else '')
-                    
-                    # Get data rows
-                    data_rows = []
-                    for row in ws.iter_rows(min_row=2):
-                        row_data = []
-                        for cell in row:
-                            row_data.append(cell.value if cell.value else '')
-                        data_rows.append(row_data)
-                else:
-                    # CSV file
-                    import csv
-                    decoded_file = uploaded_file.read().decode('utf-8').splitlines()
-                    reader = csv.reader(decoded_file)
-                    headers = next(reader)  # First row is headers
-                    data_rows = list(reader)
-                
-                # Auto-detect columns and create mapping
-                column_mapping = {}
-                detected_columns = []
-                
-                for col in headers:
-                    if not col:
-                        continue
-                    col_lower = col.lower().strip()
-                    if any(keyword in col_lower for keyword in ['product', 'name', 'item']):
-                        column_mapping[col] = 'product_name'
-                        detected_columns.append(col)
-                    elif any(keyword in col_lower for keyword in ['sku', 'code', 'id']):
-                        column_mapping[col] = 'sku_code'
-                        detected_columns.append(col)
-                    elif any(keyword in col_lower for keyword in ['quantity', 'qty', 'stock']):
-                        column_mapping[col] = 'quantity'
-                        detected_columns.append(col)
-                    elif any(keyword in col_lower for keyword in ['price', 'cost', 'unit']):
-                        column_mapping[col] = 'unit_price'
-                        detected_columns.append(col)
-                    elif any(keyword in col_lower for keyword in ['status']):
-                        column_mapping[col] = 'status'
-                        detected_columns.append(col)
+                # Keep the upload; the rows are read and imported by a background job
+                stored_path = default_storage.save(
+                    f'inventory/imports/{request.user.pk}/{uploaded_file.name}', uploaded_file
+                )
                 
                 # Create import record
                 import_record = ImportedInventoryFile.objects.create(
                     user=request.user,
                     layout=layout,
                     file_name=uploaded_file.name,
-                    file_path=f'inventory/imports/{uploaded_file.name}',
+                    file_path=stored_path,
                     file_size=uploaded_file.size,
                     file_type=file_type,
-                    column_mapping=column_mapping,
-                    total_rows=len(data_rows),
-                    status='processing'
+                    import_settings={'chunk_size': settings.INVENTORY_IMPORT_CHUNK_SIZE},
+                    status='pending'
                 )
                 
-                # Process the data
-                imported_count = 0
-                failed_count = 0
-                errors = []
-                
-                for index, row_data in enumerate(data_rows):
-                    try:
-                        # Create a row dictionary for easier access
-                        row = {}
-                        for i, header in enumerate(headers):
-                            if i < len(row_data):
-                                row[header] = row_data[i]
-                            else:
-                                row[header] = ''
-                        
-                        # Extract values using mapping
-                        product_name = row.get(column_mapping.get('product_name', ''), '')
-                        sku_code = row.get(column_mapping.get('sku_code', ''), '')
-                        quantity = row.get(column_mapping.get('quantity', ''), 0)
-                        unit_price = row.get(column_mapping.get('unit_price', ''), 0)
-                        status_name = row.get(column_mapping.get('status', ''), 'in_stock')
-                        
-                        # Validate required fields
-                        if not product_name or not sku_code:
-                            failed_count += 1
-                            errors.append(f"Row {index + 1}: Missing product name or SKU")
-                            continue
-                        
-                        # Get or create status
-                        status, _ = InventoryStatus.objects.get_or_create(
-                            name=status_name,
-                            defaults={'display_name': status_name.replace('_', ' ').title()}
-                        )
-                        
-                        # Check if item already exists
-                        existing_item = InventoryItem.objects.filter(
-                            user=request.user,
-                            sku_code=sku_code
-                        ).first()
-                        
-                        if existing_item:
-                            # Update existing item
-                            existing_item.product_name = product_name
-                            existing_item.set_value('quantity', quantity)
-                            existing_item.set_value('unit_price', unit_price)
-                            existing_item.status = status
-                            existing_item.save()
-                        else:
-                            # Create new item
-                            item = InventoryItem.objects.create(
-                                user=request.user,
-                                layout=layout,
-                                product_name=product_name,
-                                sku_code=sku_code,
-                                status=status,
-                                data={
-                                    'quantity': quantity,
-                                    'unit_price': unit_price
-                                }
-                            )
-                        
-                        imported_count += 1
-                        
-                    except Exception as e:
-                        failed_count += 1
-                        errors.append(f"Row {index + 1}: {str(e)}")
-                
-                # Update import record
-                import_record.imported_rows = imported_count
-                import_record.failed_rows = failed_count
-                import_record.error_log = '\n'.join(errors)
-                import_record.status = 'completed'
-                import_record.completed_at = timezone.now()
-                import_record.save()
-                
-                # Log the import
-                InventoryLog.objects.create(
-                    user=request.user,
-                    layout=layout,
-                    log_type='import',
-                    description=f'Imported {imported_count} items from {uploaded_file.name}',
-                    details={
-                        'file_name': uploaded_file.name,
-                        'imported_count': imported_count,
-                        'failed_count': failed_count,
-                        'total_rows': len(data_rows)
-                    }
+                job = enqueue(
+                    request.user, 'inventory.import', {'import_id': import_record.pk},
+                    title=f'Import {uploaded_file.name}'
                 )
-                
-                if imported_count > 0:
-                    messages.success(request, f'Successfully imported {imported_count} items!')
-                if failed_count > 0:
-                    messages.warning(request, f'{failed_count} rows failed to import. Check the import log for details.')
-                
-                return redirect('inventory:list')
+                return redirect(job)
                 
             except Exception as e:
                 messages.error(request, f'Import failed: {str(e)}')
@@ -1041,6 +861,45 @@ def inventory_import(request):
     return render(request, 'inventory/inventory_import.html', context)
 
 
+@require_GET
+@login_required
+def ajax_import_progress(request, pk):
+    """Get the progress of an inventory import via AJAX"""
+    import_record = get_object_or_404(ImportedInventoryFile, pk=pk, user=request.user)
+    return JsonResponse({
+        'success': True,
+        'status': import_record.status,
+        'total_rows': import_record.total_rows,
+        'imported_rows': import_record.imported_rows,
+        'failed_rows': import_record.failed_rows,
+        'completed_at': import_record.completed_at.isoformat() if import_record.completed_at else None,
+    })
+
+
+@require_GET
+@login_required
+def ajax_valuation_trends(request):
+    """Daily value and quantity trends per category, status or layout from the valuation snapshots"""
+    group_by = request.GET.get('group', 'category')
+    if group_by not in InventoryValuationSnapshot.GROUPINGS:
+        return JsonResponse({'success': False, 'error': 'Invalid group'}, status=400)
+    try:
+        months = min(max(int(request.GET.get('months', 12)), 1), 24)
+    except ValueError:
+        months = 12
+    
+    layout = None
+    if request.GET.get('layout'):
+        layout = get_object_or_404(InventoryLayout, pk=request.GET['layout'], user=request.user)
+    
+    today = timezone.localdate()
+    month_index = today.year * 12 + today.month - 1 - months
+    start_date = date(month_index // 12, month_index % 12 + 1, 1)
+    
+    trend = InventoryValuationSnapshot.trend(request.user, start_date, group_by=group_by, layout=layout)
+    return JsonResponse({'success': True, 'group': group_by, 'start_date': start_date.isoformat(), **trend})
+
+
 @login_required
 def inventory_export(request):
     """Export inventory to Excel/PDF with branding and calculations"""
@@ -1053,61 +912,23 @@ def inventory_export(request):
                 include_calculations = form.cleaned_data.get('include_calculations', True)
                 include_branding = form.cleaned_data.get('include_branding', True)
                 
-                # Get items for export
-                items = InventoryItem.objects.filter(user=request.user, layout=layout)
-                
-                # Apply filters
-                if form.cleaned_data.get('category_filter'):
-                    items = items.filter(category=form.cleaned_data['category_filter'])
-                
-                if form.cleaned_data.get('status_filter'):
-                    items = items.filter(status=form.cleaned_data['status_filter'])
-                
-                if form.cleaned_data.get('search'):
-                    search = form.cleaned_data['search']
-                    items = items.filter(
-                        Q(product_name__icontains=search) |
-                        Q(sku_code__icontains=search) |
-                        Q(description__icontains=search)
-                    )
-                
-                if form.cleaned_data.get('min_quantity'):
-                    items = items.filter(data__quantity_in_stock__gte=form.cleaned_data['min_quantity'])
-                
-                if form.cleaned_data.get('max_quantity'):
-                    items = items.filter(data__quantity_in_stock__lte=form.cleaned_data['max_quantity'])
-                
-                if form.cleaned_data.get('min_price'):
-                    items = items.filter(data__unit_price__gte=form.cleaned_data['min_price'])
-                
-                if form.cleaned_data.get('max_price'):
-                    items = items.filter(data__unit_price__lte=form.cleaned_data['max_price'])
-                
-                if form.cleaned_data.get('date_from'):
-                    items = items.filter(created_at__gte=form.cleaned_data['date_from'])
-                
-                if form.cleaned_data.get('date_to'):
-                    items = items.filter(created_at__lte=form.cleaned_data['date_to'])
-                
-                # Handle low stock filter
-                if not form.cleaned_data.get('include_low_stock', True):
-                    items = items.exclude(
-                        data__quantity_in_stock__lt=F('data__minimum_threshold')
-                    )
+                if export_format not in ('excel', 'csv', 'pdf'):
+                    messages.error(request, 'Unsupported export format')
+                    return redirect('inventory:export')
                 
                 # Generate filename
                 timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
                 filename = f"inventory_export_{layout.name.replace(' ', '_')}_{timestamp}"
                 
-                if export_format == 'excel':
-                    return export_to_excel(items, layout, filename, include_calculations, include_branding)
-                elif export_format == 'csv':
-                    return export_to_csv(items, layout, filename, include_calculations)
-                elif export_format == 'pdf':
-                    return export_to_pdf(items, layout, filename, include_calculations, include_branding)
-                else:
-                    messages.error(request, 'Unsupported export format')
-                    return redirect('inventory:export')
+                job = enqueue(request.user, 'inventory.export', {
+                    'layout_id': layout.pk,
+                    'format': export_format,
+                    'filename': filename,
+                    'include_calculations': include_calculations,
+                    'include_branding': include_branding,
+                    'filters': export_filters(form.cleaned_data),
+                }, title=f'Export {layout.name} ({dict(form.EXPORT_FORMATS)[export_format]})')
+                return redirect(job)
                     
             except Exception as e:
                 messages.error(request, f'Export failed: {str(e)}')
@@ -1123,25 +944,15 @@ def inventory_export(request):
     
     # Calculate initial summary statistics
     if default_layout:
-        total_items = InventoryItem.objects.filter(user=request.user, layout=default_layout).count()
-        total_value = sum(item.total_value for item in InventoryItem.objects.filter(user=request.user, layout=default_layout))
-        
-        # Count unique categories from data field
-        categories = 0
-        category_names = set()
-        for item in InventoryItem.objects.filter(user=request.user, layout=default_layout):
-            category_data = item.data.get('category', {})
-            if isinstance(category_data, dict) and category_data.get('name'):
-                category_names.add(category_data['name'])
-        categories = len(category_names)
-        
-        # Count low stock items
-        low_stock_count = 0
-        for item in InventoryItem.objects.filter(user=request.user, layout=default_layout):
-            quantity = item.data.get('quantity_in_stock', 0)
-            min_threshold = item.data.get('minimum_threshold', 0)
-            if quantity < min_threshold:
-                low_stock_count += 1
+        stats = InventoryStats.get_for(request.user, default_layout)
+        total_items = stats.total_items
+        total_value = stats.total_value
+        low_stock_count = stats.low_stock_items
+        
+        # Count unique categories
+        categories = InventoryItem.objects.filter(
+            user=request.user, layout=default_layout, category__isnull=False
+        ).values('category_id').distinct().count()
     else:
         total_items = 0
         total_value = 0
@@ -1162,23 +973,87 @@ def inventory_export(request):
     return render(request, 'inventory/inventory_export.html', context)
 
 
-def export_to_excel(items, layout, filename, include_calculations=True, include_branding=True):
-    """Export inventory to Excel with formatting and company branding"""
-    from openpyxl import Workbook
-    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-    from openpyxl.utils import get_column_letter
-    from openpyxl.drawing.image import Image as XLImage
-    import os
+EXPORT_FILTER_FIELDS = (
+    'category_filter', 'status_filter', 'search', 'min_quantity', 'max_quantity',
+    'min_price', 'max_price', 'date_from', 'date_to',
+)
+
+
+def export_filters(cleaned_data):
+    """JSON-serializable export filters from a valid InventoryExportForm"""
+    filters = {'include_low_stock': cleaned_data.get('include_low_stock', True)}
+    for name in EXPORT_FILTER_FIELDS:
+        value = cleaned_data.get(name)
+        if not value:
+            continue
+        if hasattr(value, 'pk'):
+            value = value.pk
+        elif hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = str(value)
+        filters[name] = value
+    return filters
+
+
+def filter_export_items(items, filters):
+    """Apply filters saved by export_filters() to an item queryset"""
+    if filters.get('category_filter'):
+        items = items.filter(category=filters['category_filter'])
     
-    # Force recalculation for all items to ensure latest data
-    for item in items:
-        item.calculate_totals()
-        item.refresh_from_db()
+    if filters.get('status_filter'):
+        items = items.filter(status_id=filters['status_filter'])
+    
+    if filters.get('search'):
+        items = search_items(items, filters['search'])
+    
+    if filters.get('min_quantity'):
+        items = items.filter(quantity__gte=Decimal(filters['min_quantity']))
+    
+    if filters.get('max_quantity'):
+        items = items.filter(quantity__lte=Decimal(filters['max_quantity']))
+    
+    if filters.get('min_price'):
+        items = items.filter(unit_price__gte=Decimal(filters['min_price']))
     
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Inventory"
+    if filters.get('max_price'):
+        items = items.filter(unit_price__lte=Decimal(filters['max_price']))
     
+    if filters.get('date_from'):
+        items = items.filter(created_at__gte=date.fromisoformat(filters['date_from']))
+    
+    if filters.get('date_to'):
+        items = items.filter(created_at__lte=date.fromisoformat(filters['date_to']))
+    
+    # Handle low stock filter
+    if not filters.get('include_low_stock', True):
+        items = items.exclude(quantity__lt=F('minimum_threshold'))
+    
+    return items
+
+
+def _export_columns(layout, include_calculations=True):
+    """Visible layout columns that go into an export"""
+    return [
+        column for column in layout.get_visible_columns()
+        if column.get('name') != 'actions'
+        and (include_calculations or column.get('name') != 'total')
+    ]
+
+
+def _iter_export_items(items, layout):
+    """Items read in chunks, sharing layout instances and brought up to date in memory only"""
+    layouts = {layout.pk: layout}
+    for item in iter_instances(items.select_related('status')):
+        if item.layout_id not in layouts:
+            layouts[item.layout_id] = item.layout
+        item.layout = layouts[item.layout_id]
+        item.ensure_calculated()
+        yield item
+
+
+def export_to_excel(items, layout, filename, include_calculations=True, include_branding=True):
+    """Export inventory to Excel with formatting and company branding, written row by row"""
     # Get company profile for branding
     company_profile = None
     if include_branding:
@@ -1187,310 +1062,109 @@ def export_to_excel(items, layout, filename, include_calculations=True, include_
         except:
             pass
     
-    # Add branding header if requested
-    if include_branding and company_profile:
-        # Add company logo if available
-        logo_path = None
-        if company_profile.logo and os.path.exists(company_profile.logo.path):
-            try:
-                logo_path = company_profile.logo.path
-                # Add logo to Excel (positioned at A1)
-                img = XLImage(logo_path)
-                img.width = 100
-                img.height = 60
-                ws.add_image(img, 'A1')
-                # Adjust row height to accommodate logo
-                ws.row_dimensions[1].height = 50
-            except:
-                pass
-        
-        # Company name and details
-        company_name_cell = ws['B1'] if logo_path else ws['A1']
-        company_name_cell.value = company_profile.company_name
-        company_name_cell.font = Font(size=18, bold=True, color="2E86AB")
-        company_name_cell.alignment = Alignment(horizontal='left', vertical='center')
-        
-        # Company details
-        details_row = 2
-        company_details = []
-        if company_profile.address:
-            company_details.append(company_profile.address)
-        if company_profile.phone:
-            company_details.append(f"Phone: {company_profile.phone}")
-        if company_profile.email:
-            company_details.append(f"Email: {company_profile.email}")
-        if company_profile.website:
-            company_details.append(f"Website: {company_profile.website}")
-        
-        if company_details:
-            details_cell = ws[f'B{details_row}'] if logo_path else ws[f'A{details_row}']
-            details_cell.value = " | ".join(company_details)
-            details_cell.font = Font(size=10, color="666666")
-            details_cell.alignment = Alignment(horizontal='left', vertical='center')
-            details_row += 1
-        
-        # Add export info
-        export_info_row = details_row + 1
-        export_info_cell = ws[f'B{export_info_row}'] if logo_path else ws[f'A{export_info_row}']
-        export_info_cell.value = f"Inventory Export Report - Generated on {timezone.now().strftime('%B %d, %Y at %H:%M')}"
-        export_info_cell.font = Font(size=12, bold=True, italic=True, color="2E86AB")
-        export_info_cell.alignment = Alignment(horizontal='left', vertical='center')
-        
-        row_offset = export_info_row + 2
-    else:
-        row_offset = 1
-    
-    # Add headers
-    headers = []
-    for column in layout.get_visible_columns():
-        if column.get('name') == 'actions':
-            continue
-        if not include_calculations and column.get('name') == 'total':
-            continue
-        headers.append(column.get('display_name', column.get('name')))
-    
-    # Style for headers
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    header_fill = PatternFill(start_color="2E86AB", end_color="2E86AB", fill_type="solid")
-    header_alignment = Alignment(horizontal='center', vertical='center')
-    
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=row_offset, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = header_alignment
-        cell.border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-    
-    # Add data with enhanced styling
     currency_symbol = company_profile.currency_symbol if company_profile else '₦'
-    
-    for row, item in enumerate(items, row_offset + 1):
-        col = 1
-        for column in layout.get_visible_columns():
-            if column.get('name') == 'actions':
-                continue
-            if not include_calculations and column.get('name') == 'total':
-                continue
-            
-            field_name = column.get('name')
-            if field_name == 'serial_number':
-                value = row - row_offset  # Serial number based on row position
-            elif field_name == 'product_name':
-                value = item.product_name
-            elif field_name == 'sku_code':
-                value = item.sku_code
-            elif field_name == 'status':
-                value = item.status.display_name
-            elif field_name == 'total':
-                # Use company currency symbol if available
-                currency_symbol = company_profile.currency_symbol if company_profile else '₦'
-                # Only apply fallback for problematic symbols, otherwise use the actual symbol
-                if currency_symbol == '₦':
-                    # Try to use the actual Naira symbol, fallback to 'N' only if needed
-                    try:
-                        # Test if the symbol can be properly encoded
-                        test_str = f"{currency_symbol}1000.00"
-                        test_str.encode('utf-8')
-                        # If no error, use the actual symbol
-                        currency_symbol = '₦'
-                    except UnicodeEncodeError:
-                        currency_symbol = 'N'  # Fallback only if encoding fails
-                value = f"{currency_symbol}{item.total_value:,.2f}"
-            elif field_name == 'unit_price':
-                # Use company currency symbol if available
-                currency_symbol = company_profile.currency_symbol if company_profile else '₦'
-                # Only apply fallback for problematic symbols, otherwise use the actual symbol
-                if currency_symbol == '₦':
-                    # Try to use the actual Naira symbol, fallback to 'N' only if needed
-                    try:
-                        # Test if the symbol can be properly encoded
-                        test_str = f"{currency_symbol}1000.00"
-                        test_str.encode('utf-8')
-                        # If no error, use the actual symbol
-                        currency_symbol = '₦'
-                    except UnicodeEncodeError:
-                        currency_symbol = 'N'  # Fallback only if encoding fails
-                unit_price = item.data.get('unit_price', 0)
-                value = f"{currency_symbol}{unit_price:,.2f}"
-            else:
-                value = item.get_value(field_name)
-            
-            cell = ws.cell(row=row, column=col, value=value)
-            
-            # Apply alternating row colors
-            if (row - row_offset) % 2 == 0:
-                cell.fill = PatternFill(start_color="F8F9FA", end_color="F8F9FA", fill_type="solid")
-            
-            # Format numbers and currency
-            if field_name in ['quantity']:
-                cell.number_format = '#,##0.00'
-            elif field_name in ['unit_price', 'total']:
-                cell.number_format = f'"{currency_symbol}"#,##0.00'
-            elif field_name == 'serial_number':
-                cell.alignment = Alignment(horizontal='center')
-                cell.font = Font(bold=True)
-            
-            # Add borders
-            cell.border = Border(
-                left=Side(style='thin', color="CCCCCC"),
-                right=Side(style='thin', color="CCCCCC"),
-                top=Side(style='thin', color="CCCCCC"),
-                bottom=Side(style='thin', color="CCCCCC")
-            )
-            
-            col += 1
+    currency_format = f'"{currency_symbol}"#,##0.00'
+    columns = _export_columns(layout, include_calculations)
+    headers = [column.get('display_name', column.get('name')) for column in columns]
+    field_names = [column.get('name') for column in columns]
+    
+    export = ExcelExport("Inventory")
+    # Widths must be known before the first row; size text columns generously
+    export.set_widths([
+        30 if name == 'product_name' else min(max(len(str(header)) + 6, 12), 50)
+        for name, header in zip(field_names, headers)
+    ])
+    if include_branding:
+        export.add_branding(
+            company_profile,
+            f"Inventory Export Report - Generated on {timezone.now().strftime('%B %d, %Y at %H:%M')}"
+        )
+    export.add_header(headers)
+    
+    totals = {'count': 0, 'value': Decimal('0')}
+    
+    def rows():
+        for index, item in enumerate(_iter_export_items(items, layout), 1):
+            totals['count'] = index
+            totals['value'] += item.total_value or 0
+            row = []
+            for field_name in field_names:
+                if field_name == 'serial_number':
+                    value = index  # Serial number based on row position
+                elif field_name == 'product_name':
+                    value = item.product_name
+                elif field_name == 'sku_code':
+                    value = item.sku_code
+                elif field_name == 'status':
+                    value = item.status.display_name
+                elif field_name == 'quantity':
+                    value = item.quantity
+                elif field_name == 'total':
+                    value = item.total_value
+                elif field_name == 'unit_price':
+                    value = item.unit_price
+                else:
+                    value = item.get_value(field_name)
+                row.append(value)
+            yield row
+    
+    # Numbers are written as numbers; the formats add separators and the currency symbol
+    formats = [
+        '#,##0.00' if name == 'quantity' else currency_format if name in ('unit_price', 'total') else None
+        for name in field_names
+    ]
+    export.add_rows(rows(), formats=formats, striped=True)
     
     # Add grand total if calculations are included
-    if include_calculations and layout.supports_calculations():
-        total_row = row_offset + len(items) + 1
-        
-        # Style for total row
-        total_font = Font(bold=True, size=11)
-        total_fill = PatternFill(start_color="E9ECEF", end_color="E9ECEF", fill_type="solid")
-        
-        # Total label
-        total_label_cell = ws.cell(row=total_row, column=1, value="Grand Total")
-        total_label_cell.font = total_font
-        total_label_cell.fill = total_fill
-        
-        # Total value
-        total_value = sum(item.total_value for item in items)
-        total_value_cell = ws.cell(row=total_row, column=len(headers), value=total_value)
-        total_value_cell.font = total_font
-        total_value_cell.fill = total_fill
-        total_value_cell.number_format = f'"{currency_symbol}"#,##0.00'
-        
-        # Add borders to total row
-        for col in range(1, len(headers) + 1):
-            cell = ws.cell(row=total_row, column=col)
-            cell.border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-    
-    # Auto-adjust column widths with better logic
-    for column in ws.columns:
-        max_length = 0
-        column_letter = get_column_letter(column[0].column)
-        for cell in column:
-            try:
-                if cell.value:
-                    # Calculate length based on content type
-                    if isinstance(cell.value, (int, float)):
-                        length = len(f"{cell.value:,.2f}")
-                    else:
-                        length = len(str(cell.value))
-                    max_length = max(max_length, length)
-            except:
-                pass
-        
-        # Set reasonable column widths
-        if max_length < 10:
-            adjusted_width = 12
-        elif max_length < 20:
-            adjusted_width = 18
-        elif max_length < 30:
-            adjusted_width = 25
-        else:
-            adjusted_width = min(max_length + 5, 50)
-        
-        ws.column_dimensions[column_letter].width = adjusted_width
-    
-    # Add summary information at the bottom
-    summary_row = total_row + 3 if include_calculations and layout.supports_calculations() else row_offset + len(items) + 3
+    show_total = include_calculations and layout.supports_calculations()
+    if show_total:
+        export.add_row(
+            ["Grand Total"] + [None] * (len(headers) - 2) + [totals['value']],
+            styles=['export_total'] * (len(headers) - 1) + [export.style('export_total', currency_format)]
+        )
     
     # Summary section
-    ws.cell(row=summary_row, column=1, value="Summary Information").font = Font(bold=True, size=12, color="2E86AB")
-    summary_row += 1
-    
-    ws.cell(row=summary_row, column=1, value="Total Items:").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=len(items))
-    summary_row += 1
-    
-    ws.cell(row=summary_row, column=1, value="Report Generated:").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=timezone.now().strftime('%B %d, %Y at %H:%M'))
-    summary_row += 1
-    
-    ws.cell(row=summary_row, column=1, value="Layout:").font = Font(bold=True)
-    ws.cell(row=summary_row, column=2, value=layout.name)
-    
-    if include_calculations and layout.supports_calculations():
-        summary_row += 1
-        ws.cell(row=summary_row, column=1, value="Total Inventory Value:").font = Font(bold=True)
-        total_value = sum(item.total_value for item in items)
-        ws.cell(row=summary_row, column=2, value=total_value)
-        ws.cell(row=summary_row, column=2).number_format = f'"{currency_symbol}"#,##0.00'
-    
-    # Create response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = f'attachment; filename="{filename}.xlsx"'
+    export.add_blank(2)
+    export.add_row(["Summary Information"], style='export_section')
+    label = 'export_label'
+    export.add_row([export.cell("Total Items:", label), totals['count']])
+    export.add_row([export.cell("Report Generated:", label), timezone.now().strftime('%B %d, %Y at %H:%M')])
+    export.add_row([export.cell("Layout:", label), layout.name])
+    if show_total:
+        export.add_row([
+            export.cell("Total Inventory Value:", label),
+            export.cell(totals['value'], export.style('export_cell', currency_format)),
+        ])
     
-    wb.save(response)
-    return response
+    return export.response(f'{filename}.xlsx')
 
 
 def export_to_csv(items, layout, filename, include_calculations=True):
-    """Export inventory to CSV"""
-    import csv
-    
-    # Force recalculation for all items to ensure latest data
-    for item in items:
-        item.calculate_totals()
-        item.refresh_from_db()
-    
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
-    
-    writer = csv.writer(response)
-    
-    # Write headers
-    headers = []
-    for column in layout.get_visible_columns():
-        if column.get('name') == 'actions':
-            continue
-        if not include_calculations and column.get('name') == 'total':
-            continue
-        headers.append(column.get('display_name', column.get('name')))
-    
-    writer.writerow(headers)
-    
-    # Write data
-    for index, item in enumerate(items, 1):
-        row = []
-        for column in layout.get_visible_columns():
-            if column.get('name') == 'actions':
-                continue
-            if not include_calculations and column.get('name') == 'total':
-                continue
-            
-            field_name = column.get('name')
-            if field_name == 'serial_number':
-                value = index  # Serial number based on position
-            elif field_name == 'product_name':
-                value = item.product_name
-            elif field_name == 'sku_code':
-                value = item.sku_code
-            elif field_name == 'status':
-                value = item.status.display_name
-            elif field_name == 'total':
-                value = item.total_value
-            else:
-                value = item.get_value(field_name)
-            
-            row.append(value)
-        
-        writer.writerow(row)
+    """Export inventory to CSV, streamed while the rows are read"""
+    columns = _export_columns(layout, include_calculations)
+    headers = [column.get('display_name', column.get('name')) for column in columns]
+    
+    def rows():
+        for index, item in enumerate(_iter_export_items(items, layout), 1):
+            row = []
+            for column in columns:
+                field_name = column.get('name')
+                if field_name == 'serial_number':
+                    value = index  # Serial number based on position
+                elif field_name == 'product_name':
+                    value = item.product_name
+                elif field_name == 'sku_code':
+                    value = item.sku_code
+                elif field_name == 'status':
+                    value = item.status.display_name
+                elif field_name == 'total':
+                    value = item.total_value
+                else:
+                    value = item.get_value(field_name)
+                row.append(value)
+            yield row
     
-    return response
+    return streaming_csv_response(f'{filename}.csv', headers, rows())
 
 
 def export_to_pdf(items, layout, filename, include_calculations=True, include_branding=True):
@@ -1592,10 +1266,9 @@ def export_to_pdf(items, layout, filename, include_calculations=True, include_br
         
         return "<br/>".join(lines)
     
-    # Force recalculation for all items to ensure latest data
+    # Bring stale rows up to date in memory only; the queryset cache keeps the results
     for item in items:
-        item.calculate_totals()
-        item.refresh_from_db()
+        item.ensure_calculated()
     
     response = HttpResponse(content_type='application/pdf')
     response['Content-Disposition'] = f'attachment; filename="{filename}.pdf"'
@@ -1915,46 +1588,22 @@ def stock_adjustment(request, pk):
             reason = form.cleaned_data['reason']
             notes = form.cleaned_data.get('notes', '')
             
+            if adjustment_type not in InventoryItem.MOVEMENT_TRANSACTION_TYPES:
+                messages.error(request, 'Invalid adjustment type.')
+                return redirect('inventory:stock_adjustment', pk=pk)
+            
             try:
                 old_quantity = product.quantity
                 
-                # Calculate new quantity based on adjustment type
-                if adjustment_type == 'add':
-                    new_quantity = old_quantity + quantity
-                elif adjustment_type == 'subtract':
-                    new_quantity = max(0, old_quantity - quantity)
-                elif adjustment_type == 'set':
-                    new_quantity = max(0, quantity)
-                else:
-                    messages.error(request, 'Invalid adjustment type.')
-                    return redirect('inventory:stock_adjustment', pk=pk)
-                
-                # Update the product quantity
-                product.set_value('quantity', new_quantity)
-                
-                # Update all related documents and calculations
-                product.update_all_documents()
-                
-                # Create transaction record
-                InventoryTransaction.objects.create(
-                    user=request.user,
-                    item=product,
-                    transaction_type='adjustment',
-                    quantity_change=new_quantity - old_quantity,
-                    quantity_before=old_quantity,
-                    quantity_after=new_quantity,
-                    notes=f"{reason}\n{notes}".strip()
-                )
-                
-                # Log the adjustment
-                InventoryLog.objects.create(
-                    user=request.user,
-                    item=product,
-                    log_type='stock_adjustment',
-                    description=f'Stock adjustment: {adjustment_type} {quantity} units. {reason}'
-                )
+                # Update quantity, totals and status from the locked row, and record the adjustment
+                product, = InventoryItem.apply_stock_movements(request.user, [{
+                    'item_id': product.pk,
+                    'adjustment_type': adjustment_type,
+                    'quantity': quantity,
+                    'reason': f"{reason}\n{notes}".strip(),
+                }], transaction_type='adjustment')
                 
-                messages.success(request, f'Stock adjustment completed! Quantity updated from {old_quantity} to {new_quantity}.')
+                messages.success(request, f'Stock adjustment completed! Quantity updated from {old_quantity} to {product.quantity}.')
                 return redirect('inventory:detail', pk=pk)
                 
             except Exception as e:
@@ -2010,38 +1659,11 @@ def category_list(request):
     except:
         company_profile = None
     
-    # Calculate product count and total value for each category
+    # Product count and total value per category, cached until the user's inventory changes
+    totals_key = versioned_key('inventory_categories', InventoryItem.cache_namespaces(request.user.pk))
+    category_totals = cache_get_or_set(totals_key, lambda: category_summary(request.user))
     for category in categories:
-        # Get items in this category - try multiple field variations
-        category_items = InventoryItem.objects.filter(
-            user=request.user,
-            data__category=category.name
-        )
-        
-        # If no items found, try case-insensitive search
-        if category_items.count() == 0:
-            category_items = InventoryItem.objects.filter(
-                user=request.user,
-                data__category__icontains=category.name
-            )
-        
-        # If still no items, try different field names
-        if category_items.count() == 0:
-            category_items = InventoryItem.objects.filter(
-                user=request.user,
-                data__Category=category.name
-            )
-        
-        # Calculate product count
-        category.product_count = category_items.count()
-        
-        # Calculate total value
-        category.total_value = 0
-        for item in category_items:
-            # Ensure item has total_value calculated
-            if not hasattr(item, 'total_value') or item.total_value is None:
-                item.calculate_totals()
-            category.total_value += item.total_value
+        category.product_count, category.total_value = category_totals.get(category.pk, (0, 0))
     
     context = {
         'categories': categories,
@@ -2051,6 +1673,17 @@ def category_list(request):
     return render(request, 'inventory/category_list.html', context)
 
 
+def category_summary(user):
+    """Map of category id to (product count, total value) for the user's items, in one GROUP BY"""
+    rows = (
+        InventoryItem.objects.filter(user=user, category__isnull=False)
+        .values('category_id')
+        .annotate(product_count=Count('id'), total_value=Sum('total_value'))
+        .order_by()
+    )
+    return {row['category_id']: (row['product_count'], row['total_value'] or 0) for row in rows}
+
+
 @login_required
 def category_create(request):
     """Create category (legacy)"""
@@ -2208,42 +1841,9 @@ def ajax_bulk_update_status(request):
         else:
             status = get_object_or_404(InventoryStatus, name=new_status)
         
-        # Update all selected items
+        # Update all selected items with one UPDATE
         items = InventoryItem.objects.filter(pk__in=item_ids, user=request.user)
-        updated_count = 0
-        
-        for item in items:
-            old_status = item.status
-            item.status = status
-            item.save()
-            
-            # Trigger updates across all documents and templates
-            item.update_all_documents()
-            
-            # Create transaction record
-            InventoryTransaction.objects.create(
-                user=request.user,
-                item=item,
-                transaction_type='status_change',
-                status_before=old_status,
-                status_after=status,
-                notes=f'Bulk status update to {status.display_name}'
-            )
-            
-            # Log the status change
-            InventoryLog.objects.create(
-                user=request.user,
-                item=item,
-                log_type='status_change',
-                description=f'Bulk status change: {old_status.display_name} → {status.display_name}',
-                details={
-                    'old_status': old_status.name,
-                    'new_status': status.name,
-                    'bulk_operation': True
-                }
-            )
-            
-            updated_count += 1
+        updated_count = InventoryItem.bulk_change_status(items, status, request.user)
         
         return JsonResponse({
             'success': True,
@@ -2276,26 +1876,9 @@ def ajax_bulk_delete(request):
                 'error': 'No items selected'
             })
         
-        # Get items and delete them
+        # Log and delete the items set-based
         items = InventoryItem.objects.filter(pk__in=item_ids, user=request.user)
-        deleted_count = 0
-        
-        for item in items:
-            # Log before deletion
-            InventoryLog.objects.create(
-                user=request.user,
-                item=item,
-                log_type='delete',
-                description=f'Bulk deleted: {item.product_name} ({item.sku_code})',
-                details={
-                    'product_name': item.product_name,
-                    'sku_code': item.sku_code,
-                    'bulk_operation': True
-                }
-            )
-            
-            item.delete()
-            deleted_count += 1
+        deleted_count = InventoryItem.bulk_delete(items, request.user)
         
         return JsonResponse({
             'success': True,
@@ -2331,7 +1914,7 @@ def ajax_get_item_status(request, pk):
             'status_display_name': item.status.display_name,
             'status_color': item.status.color,
             'is_active': item.is_active,
-            'quantity': item.quantity,
+            'quantity': float(item.quantity),
             'unit_price': float(item.unit_price),
             'total_value': float(item.total_value),
             'last_updated': item.updated_at.isoformat()
@@ -2366,7 +1949,7 @@ def ajax_get_item_details(request):
         # Get calculated data
         calculated_data = {}
         if item.layout.supports_calculations():
-            calculated_data = item.calculate_totals()
+            calculated_data = item.ensure_calculated()
         
         # Get recent transactions
         recent_transactions = item.transactions.order_by('-transaction_date')[:5]
@@ -2419,54 +2002,26 @@ def ajax_quick_edit(request):
         
         item = get_object_or_404(InventoryItem, pk=item_id, user=request.user)
         
-        # Track all changes
-        changes = {}
+        # Sanitize numeric values
+        updates = {}
         for field_name, new_value in field_updates.items():
-            old_value = item.get_value(field_name)
-            
-            # Sanitize numeric values
             if field_name.lower() in ['quantity', 'unit_price', 'price', 'cost']:
                 sanitized_value = item._extract_number(new_value)
                 if sanitized_value is not None:
                     new_value = sanitized_value
-            
-            # Update the field
-            item.set_value(field_name, new_value)
-            
-                    # Convert various types for JSON serialization
-        if hasattr(old_value, 'as_tuple'):  # Check if it's a Decimal
-            old_value = float(old_value)
-        elif hasattr(old_value, 'isoformat'):  # Check if it's a date/datetime
-            old_value = old_value.isoformat()
-        if hasattr(new_value, 'as_tuple'):  # Check if it's a Decimal
-            new_value = float(new_value)
-        elif hasattr(new_value, 'isoformat'):  # Check if it's a date/datetime
-            new_value = new_value.isoformat()
-                
-            changes[field_name] = {'old': old_value, 'new': new_value}
+            updates[field_name] = new_value
         
-        # Recalculate totals if needed
-        calculated_data = {}
-        if item.layout.supports_calculations():
-            calculated_data = item.calculate_totals()
-        
-        # Create transaction record
-        InventoryTransaction.objects.create(
+        # Apply every field, totals and status with a single write
+        changes = item.apply_changes(
+            updates,
             user=request.user,
-            item=item,
-            transaction_type='field_update',
-            field_changes=changes,
-            notes=f'Quick edit: Updated {len(changes)} fields'
+            notes=f'Quick edit: Updated {len(updates)} fields',
+            description=f'Quick edit: Updated {len(updates)} fields'
         )
         
-        # Log the changes - changes dict already has Decimal objects converted to float
-        InventoryLog.objects.create(
-            user=request.user,
-            item=item,
-            log_type='field_update',
-            description=f'Quick edit: Updated {len(changes)} fields',
-            details={'changes': changes, 'quick_edit': True}
-        )
+        calculated_data = {}
+        if item.layout.supports_calculations():
+            calculated_data = item.calculated_data
         
         return JsonResponse({
             'success': True,
@@ -2589,6 +2144,21 @@ def ajax_validate_field(request):
         field_value = data.get('field_value')
         field_type = data.get('field_type', 'text')
         
+        # Validate with the layout's item form field when the field is on the form
+        layout = None
+        if data.get('item_id'):
+            item = InventoryItem.objects.filter(pk=data['item_id'], user=request.user).select_related('layout').first()
+            layout = item.layout if item else None
+        elif data.get('layout_id'):
+            layout = InventoryLayout.objects.filter(pk=data['layout_id'], user=request.user).first()
+        errors = item_form_class(layout).validate_value(field_name, field_value) if layout else None
+        if errors is not None:
+            return JsonResponse({
+                'success': True,
+                'is_valid': not errors,
+                'errors': errors
+            })
+        
         # Basic validation
         errors = []
         
@@ -2627,19 +2197,19 @@ def ajax_get_calculation_preview(request):
         formula = data.get('formula', '')
         field_values = data.get('field_values', {})
         
-        # Safe evaluation of formula
+        # Safe evaluation of formula (numbers, fields and basic arithmetic only)
         result = None
         try:
-            # Replace field names with values
-            for field_name, value in field_values.items():
-                formula = formula.replace(f'{{{field_name}}}', str(value))
-            
-            # Only allow basic math operations
-            allowed_chars = set('0123456789+-*/(). ')
-            if all(c in allowed_chars for c in formula):
-                result = eval(formula)
-            else:
+            compiled = CompiledFormula(formula)
+            values = {name: extract_number(field_values.get(name)) for name in compiled.fields}
+            if any(value is None for value in values.values()):
                 result = 'Invalid formula'
+            else:
+                result = compiled.evaluate_one(values)
+                if result is None:
+                    result = 'Calculation error'
+        except FormulaError:
+            result = 'Invalid formula'
         except Exception:
             result = 'Calculation error'
         
@@ -2674,8 +2244,13 @@ def ajax_export_selected(request):
         else:
             layout = InventoryLayout.objects.filter(user=request.user, is_default=True).first()
         
-        # Get items
-        items = InventoryItem.objects.filter(pk__in=item_ids, user=request.user)
+        # Get items: the selected ones, narrowed by an optional search
+        search = data.get('search')
+        items = InventoryItem.objects.filter(user=request.user)
+        if item_ids or not search:
+            items = items.filter(pk__in=item_ids)
+        if search:
+            items = search_items(items, search)
         
         # Generate filename
         timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
@@ -2703,14 +2278,33 @@ def ajax_export_selected(request):
         })
 
 
+@require_GET
+@login_required
+def ajax_search_items(request):
+    """Ranked typeahead search over the user's inventory items"""
+    query = request.GET.get('q', '')
+    items = InventoryItem.objects.filter(user=request.user)
+    if request.GET.get('layout'):
+        items = items.filter(layout_id=request.GET['layout'])
+    items = search_items(items, query, ranked=True) if query.strip() else items.none()
+    
+    results = [
+        {'id': item['id'], 'product_name': item['product_name'], 'sku_code': item['sku_code']}
+        for item in items.values('id', 'product_name', 'sku_code')[:10]
+    ]
+    return JsonResponse({
+        'success': True,
+        'results': results
+    })
+
+
 @login_required
 def inventory_print(request, pk):
     """Print view for inventory item"""
     item = get_object_or_404(InventoryItem, pk=pk, user=request.user)
     
-    # Force recalculation to ensure latest data
-    item.calculate_totals()
-    item.refresh_from_db()
+    # Bring a stale row up to date in memory only
+    item.ensure_calculated()
     
     context = {
         'item': item,
@@ -2980,31 +2574,25 @@ def ajax_export_preview(request):
         
         # Apply filters
         if data.get('category_filter'):
-            # Filter by category stored in data field
-            items = items.filter(data__category__id=data['category_filter'])
+            items = items.filter(category_id=data['category_filter'])
         
         if data.get('status_filter'):
             items = items.filter(status__pk=data['status_filter'])
         
         if data.get('search'):
-            search = data['search']
-            items = items.filter(
-                Q(product_name__icontains=search) |
-                Q(sku_code__icontains=search) |
-                Q(data__description__icontains=search)
-            )
+            items = search_items(items, data['search'])
         
         if data.get('min_quantity'):
-            items = items.filter(data__quantity_in_stock__gte=data['min_quantity'])
+            items = items.filter(quantity__gte=data['min_quantity'])
         
         if data.get('max_quantity'):
-            items = items.filter(data__quantity_in_stock__lte=data['max_quantity'])
+            items = items.filter(quantity__lte=data['max_quantity'])
         
         if data.get('min_price'):
-            items = items.filter(data__unit_price__gte=data['min_price'])
+            items = items.filter(unit_price__gte=data['min_price'])
         
         if data.get('max_price'):
-            items = items.filter(data__unit_price__lte=data['max_price'])
+            items = items.filter(unit_price__lte=data['max_price'])
         
         if data.get('date_from'):
             items = items.filter(created_at__gte=data['date_from'])
@@ -3015,29 +2603,18 @@ def ajax_export_preview(request):
         # Handle low stock filter
         if not data.get('include_low_stock', True):
             # Exclude items below minimum threshold
-            items = items.exclude(
-                data__quantity_in_stock__lt=F('data__minimum_threshold')
-            )
+            items = items.exclude(quantity__lt=F('minimum_threshold'))
         
         # Calculate summary statistics
-        total_items = items.count()
-        total_value = sum(item.total_value for item in items)
+        summary = items.aggregate(total_items=Count('id'), total_value=Sum('total_value'))
+        total_items = summary['total_items']
+        total_value = summary['total_value'] or 0
         
-        # Get unique categories from data field
-        category_names = set()
-        for item in items:
-            category_data = item.data.get('category', {})
-            if isinstance(category_data, dict) and category_data.get('name'):
-                category_names.add(category_data['name'])
-        categories = len(category_names)
+        # Count unique categories
+        categories = items.filter(category__isnull=False).values('category_id').distinct().count()
         
         # Count low stock items
-        low_stock_count = 0
-        for item in items:
-            quantity = item.data.get('quantity_in_stock', 0)
-            min_threshold = item.data.get('minimum_threshold', 0)
-            if quantity < min_threshold:
-                low_stock_count += 1
+        low_stock_count = items.filter(quantity__lt=F('minimum_threshold')).count()
         
         # Get preview items (first 10)
         preview_items = items[:10]
@@ -3053,11 +2630,11 @@ def ajax_export_preview(request):
                 'product_name': item.product_name,
                 'sku_code': item.sku_code,
                 'category': category_name,
-                'quantity': item.data.get('quantity_in_stock', 0),
-                'unit_price': item.data.get('unit_price', 0),
-                'total_value': item.total_value,
+                'quantity': float(item.quantity),
+                'unit_price': float(item.unit_price),
+                'total_value': float(item.total_value),
                 'status': item.status.display_name if item.status else 'Active',
-                'is_low_stock': item.data.get('quantity_in_stock', 0) < item.data.get('minimum_threshold', 0)
+                'is_low_stock': item.quantity < item.minimum_threshold
             })
         
         return JsonResponse({
@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from apps.core.pagination import KeysetAPIPagination
 from .models import Invoice
 from .serializers import InvoiceSerializer, InvoiceCreateSerializer
 
@@ -15,6 +16,8 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     filterset_fields = ['status', 'invoice_date', 'due_date']
     search_fields = ['invoice_number', 'client_name', 'client_email']
     ordering = ['-created_at']
+    pagination_class = KeysetAPIPagination
+    keyset_ordering = ['-created_at', '-id']
     
     def get_queryset(self):
         return Invoice.objects.filter(user=self.request.user).prefetch_related('items')
@@ -101,6 +101,18 @@ class Invoice(models.Model):
     def __str__(self):
         return f"Invoice {self.invoice_number}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets post_save receivers act on status changes only
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+    
+    @staticmethod
+    def cache_namespace(user_id) -> str:
+        """Versioned cache namespace of figures derived from a user's invoices"""
+        return f'invoices:user:{user_id}'
+    
     def save(self, *args, **kwargs):
         if not self.invoice_number:
             self.invoice_number = self.generate_invoice_number()
@@ -14,6 +14,7 @@ urlpatterns = [
     path('<int:pk>/pdf/', views.invoice_pdf, name='pdf'),
     path('<int:pk>/print/', views.invoice_print, name='print'),
     path('export/excel/', views.export_excel, name='export_excel'),
+    path('export/csv/', views.export_csv, name='export_csv'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
     
     # Invoice Template URLs
@@ -2,18 +2,18 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
-from django.core.paginator import Paginator
 from django.http import HttpResponse, JsonResponse
 from decimal import Decimal
 from .models import Invoice, InvoiceItem, InvoiceTemplate
 from .forms import InvoiceForm, InvoiceItemFormSet, InvoiceFilterForm, InvoiceTemplateForm
 # from apps.core.utils import generate_pdf_response
-import openpyxl
 from django.template.loader import render_to_string
 from xhtml2pdf import pisa
 from django.template.loader import render_to_string
 from django.http import HttpResponse
 from apps.core.models import CompanyProfile
+from apps.core.exports import excel_export_response, iter_values, streaming_csv_response
+from apps.core.pagination import paginate
 import os
 import urllib.parse
 import base64
@@ -48,15 +48,13 @@ def get_filtered_invoices(request):
 def invoice_list(request):
     invoices = get_filtered_invoices(request)
     filter_form = InvoiceFilterForm(request.GET)
-    paginator = Paginator(invoices, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
     from django.db.models import Sum, Count
     totals = invoices.aggregate(
         total_count=Count('id'),
         total_amount=Sum('grand_total') or 0,
         paid_amount=Sum('amount_paid') or 0
     )
+    page_obj = paginate(request, invoices, 25, ordering=['-created_at', '-id'], count=totals['total_count'])
     current_template = InvoiceTemplate.objects.filter(user=request.user, is_default=True).first()
     if not current_template:
         current_template = InvoiceTemplate.objects.filter(user=request.user).first()
@@ -838,26 +836,33 @@ def invoice_toggle_payment(request, pk):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 
+INVOICE_EXPORT_HEADERS = ["Invoice #", "Client", "Date", "Due Date", "Amount", "Status"]
+
+
+def invoice_export_rows(invoices):
+    """Spreadsheet rows for an invoice queryset, read in chunks without building instances"""
+    status_labels = dict(Invoice.STATUS_CHOICES)
+    fields = ('invoice_number', 'client_name', 'invoice_date', 'due_date', 'grand_total', 'status')
+    for number, client, invoice_date, due_date, total, status in iter_values(invoices.order_by('-created_at', '-id'), fields):
+        yield [
+            number,
+            client,
+            invoice_date.strftime("%Y-%m-%d"),
+            due_date.strftime("%Y-%m-%d") if due_date else "",
+            total,
+            status_labels.get(status, status),
+        ]
+
+
 @login_required
 def export_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Invoices"
-    headers = ["Invoice #", "Client", "Date", "Due Date", "Amount", "Status"]
-    ws.append(headers)
-    for invoice in Invoice.objects.filter(user=request.user):
-        ws.append([
-            invoice.invoice_number,
-            invoice.client_name,
-            invoice.invoice_date.strftime("%Y-%m-%d"),
-            invoice.due_date.strftime("%Y-%m-%d") if invoice.due_date else "",
-            invoice.grand_total,
-            invoice.get_status_display(),
-        ])
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=invoices.xlsx'
-    wb.save(response)
-    return response
+    rows = invoice_export_rows(Invoice.objects.filter(user=request.user))
+    return excel_export_response("Invoices", 'invoices.xlsx', INVOICE_EXPORT_HEADERS, rows)
+
+@login_required
+def export_csv(request):
+    rows = invoice_export_rows(Invoice.objects.filter(user=request.user))
+    return streaming_csv_response('invoices.csv', INVOICE_EXPORT_HEADERS, rows)
 
 @login_required
 def export_pdf(request):
@@ -16,6 +16,7 @@ urlpatterns = [
     path('<int:pk>/print/', views.joborder_print, name='joborder_print'),
     path('<int:pk>/set_status/', views.joborder_set_status, name='joborder_set_status'),
     path('export/excel/', views.export_excel, name='export_excel'),
+    path('export/csv/', views.export_csv, name='export_csv'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
 ]
 
@@ -11,13 +11,13 @@ from decimal import Decimal
 import json
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-import openpyxl
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 from xhtml2pdf import pisa
 import os
 import urllib.parse
 from apps.core.models import CompanyProfile
+from apps.core.exports import excel_export_response, iter_values, streaming_csv_response
 import base64
 
 @login_required
@@ -350,25 +350,31 @@ def joborder_set_status(request, pk):
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
+JOBORDER_EXPORT_HEADERS = ["Job Order #", "Title", "Status", "Created By", "Date"]
+
+
+def joborder_export_rows(joborders):
+    """Spreadsheet rows for a job order queryset, read in chunks without building instances"""
+    status_labels = dict(JobOrder.STATUS_CHOICES)
+    fields = ('tracking_id', 'title', 'status', 'created_by__first_name', 'created_by__last_name', 'created_at')
+    for tracking_id, title, status, first_name, last_name, created_at in iter_values(joborders.order_by('-created_at', '-id'), fields):
+        yield [
+            tracking_id,
+            title,
+            status_labels.get(status, status),
+            f'{first_name or ""} {last_name or ""}'.strip(),
+            created_at.strftime("%Y-%m-%d"),
+        ]
+
 @login_required
 def export_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Job Orders"
-    headers = ["Job Order #", "Title", "Status", "Created By", "Date"]
-    ws.append(headers)
-    for joborder in JobOrder.objects.filter(created_by=request.user):
-        ws.append([
-            joborder.tracking_id,
-            joborder.title,
-            joborder.get_status_display(),
-            joborder.created_by.get_full_name() if joborder.created_by else '',
-            joborder.created_at.strftime("%Y-%m-%d"),
-        ])
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=joborders.xlsx'
-    wb.save(response)
-    return response
+    rows = joborder_export_rows(JobOrder.objects.filter(created_by=request.user))
+    return excel_export_response("Job Orders", 'joborders.xlsx', JOBORDER_EXPORT_HEADERS, rows)
+
+@login_required
+def export_csv(request):
+    rows = joborder_export_rows(JobOrder.objects.filter(created_by=request.user))
+    return streaming_csv_response('joborders.csv', JOBORDER_EXPORT_HEADERS, rows)
 
 @login_required
 def export_pdf(request):
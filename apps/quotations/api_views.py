@@ -1,10 +1,13 @@
 from rest_framework import viewsets, permissions
+from apps.core.pagination import KeysetAPIPagination
 from .models import Quotation, QuotationItem, QuotationTemplate
 from .serializers import QuotationSerializer, QuotationItemSerializer, QuotationTemplateSerializer
 
 class QuotationViewSet(viewsets.ModelViewSet):
     serializer_class = QuotationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetAPIPagination
+    keyset_ordering = ['-created_at', '-id']
     def get_queryset(self):
         company = self.request.user.companyprofile_set.first()
         return Quotation.objects.filter(company=company)
@@ -12,6 +15,8 @@ class QuotationViewSet(viewsets.ModelViewSet):
 class QuotationItemViewSet(viewsets.ModelViewSet):
     serializer_class = QuotationItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetAPIPagination
+    keyset_ordering = ['id']
     def get_queryset(self):
         company = self.request.user.companyprofile_set.first()
         return QuotationItem.objects.filter(quotation__company=company)
@@ -2,7 +2,6 @@ from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Sum, Count
-from django.core.paginator import Paginator
 from django.http import HttpResponse, JsonResponse
 from django.template.loader import render_to_string
 from django.forms import modelformset_factory
@@ -11,8 +10,9 @@ from .models import Quotation, QuotationItem, QuotationTemplate
 from .forms import QuotationForm, QuotationItemFormSet, QuotationFilterForm, QuotationTemplateForm
 from apps.clients.models import Client
 from apps.core.models import CompanyProfile, format_currency, number_to_words
+from apps.core.exports import excel_export_response, iter_values
+from apps.core.pagination import paginate
 from apps.core.utils import get_company_context
-import openpyxl
 from xhtml2pdf import pisa
 from io import BytesIO
 import os
@@ -72,10 +72,6 @@ def quotation_list(request):
     except:
         filter_form.fields['client'].queryset = Client.objects.none()
     
-    paginator = Paginator(quotations, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
     # Calculate totals
     totals = quotations.aggregate(
         total_count=Count('id'),
@@ -87,6 +83,8 @@ def quotation_list(request):
         expired_count=Count('id', filter=Q(status='expired')),
     )
     
+    page_obj = paginate(request, quotations, 25, ordering=['-created_at', '-id'], count=totals['total_count'])
+    
     # Get current template
     current_template = QuotationTemplate.objects.filter(user=request.user, is_default=True).first()
     if not current_template:
@@ -614,6 +612,35 @@ def convert_to_invoice(request, pk):
     return render(request, 'quotations/convert_to_invoice.html', context)
 
 
+QUOTATION_EXPORT_HEADERS = [
+    "Quotation #", "Date", "Client", "Status", "Subtotal", 
+    "Tax", "Discount", "Shipping", "Other Charges", "Grand Total"
+]
+
+
+def quotation_export_rows(quotations):
+    """Spreadsheet rows for a quotation queryset, read in chunks without building instances"""
+    status_labels = dict(Quotation.STATUS_CHOICES)
+    fields = (
+        'quotation_number', 'quotation_date', 'client__name', 'status', 'subtotal',
+        'total_tax', 'total_discount', 'shipping_fee', 'other_charges', 'grand_total',
+    )
+    for (number, quotation_date, client_name, status, subtotal, tax, discount,
+         shipping_fee, other_charges, grand_total) in iter_values(quotations, fields):
+        yield [
+            number,
+            quotation_date.strftime("%Y-%m-%d"),
+            client_name or "No Client",
+            status_labels.get(status, status),
+            float(subtotal),
+            float(tax),
+            float(discount),
+            float(shipping_fee),
+            float(other_charges),
+            float(grand_total),
+        ]
+
+
 @login_required
 def quotation_export_excel(request, pk=None):
     """Export quotations to Excel"""
@@ -622,38 +649,7 @@ def quotation_export_excel(request, pk=None):
     else:
         quotations = get_filtered_quotations(request)
     
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Quotations"
-    
-    # Headers
-    headers = [
-        "Quotation #", "Date", "Client", "Status", "Subtotal", 
-        "Tax", "Discount", "Shipping", "Other Charges", "Grand Total"
-    ]
-    ws.append(headers)
-    
-    # Data
-    for quotation in quotations:
-        ws.append([
-            quotation.quotation_number,
-            quotation.quotation_date.strftime("%Y-%m-%d"),
-            quotation.client.name if quotation.client else "No Client",
-            quotation.get_status_display(),
-            float(quotation.subtotal),
-            float(quotation.total_tax),
-            float(quotation.total_discount),
-            float(quotation.shipping_fee),
-            float(quotation.other_charges),
-            float(quotation.grand_total),
-        ])
-    
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    response['Content-Disposition'] = 'attachment; filename=quotations.xlsx'
-    wb.save(response)
-    return response
+    return excel_export_response("Quotations", 'quotations.xlsx', QUOTATION_EXPORT_HEADERS, quotation_export_rows(quotations))
 
 
 @login_required
@@ -14,5 +14,6 @@ urlpatterns = [
     path('<int:receipt_id>/pdf/', views.receipt_pdf_view, name='pdf'),
     path('<int:receipt_id>/email/', views.receipt_email_view, name='email'),
     path('export/excel/', views.export_excel, name='export_excel'),
+    path('export/csv/', views.export_csv, name='export_csv'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
 ]
@@ -8,7 +8,6 @@ from .forms import ReceiptForm
 from apps.invoices.models import Invoice
 from django.db.models import Sum, Count
 from django.utils import timezone
-import openpyxl
 from django.template.loader import render_to_string
 from xhtml2pdf import pisa
 from django.template.loader import render_to_string
@@ -16,6 +15,7 @@ from django.http import HttpResponse
 import os
 import urllib.parse
 from apps.core.models import CompanyProfile
+from apps.core.exports import excel_export_response, iter_values, streaming_csv_response
 from apps.core.utils import get_company_context
 import base64
 
@@ -245,30 +245,32 @@ def receipt_email_view(request, receipt_id):
     messages.info(request, 'Email feature not implemented yet.')
     return redirect('receipts:detail', receipt_id=receipt.pk)
 
+RECEIPT_EXPORT_HEADERS = ["Receipt #", "Client", "Date", "Amount", "Invoice Status"]
+
+
+def receipt_export_rows(receipts):
+    """Spreadsheet rows for a receipt queryset, read in chunks without building instances"""
+    status_labels = dict(Invoice.STATUS_CHOICES)
+    fields = ('receipt_no', 'client_name', 'date_received', 'amount_received', 'invoice__status')
+    for number, client, date_received, amount, status in iter_values(receipts.order_by('-created_at', '-id'), fields):
+        yield [
+            number,
+            client,
+            date_received.strftime("%Y-%m-%d"),
+            amount,
+            status_labels.get(status, status),
+        ]
+
 @login_required
 def export_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Receipts"
-    headers = ["Receipt #", "Client", "Date", "Amount", "Invoice Status"]
-    ws.append(headers)
-    
     # Filter receipts by the user who created them
-    receipts = Receipt.objects.filter(created_by=request.user).select_related('invoice')
-    
-    for receipt in receipts:
-        ws.append([
-            receipt.receipt_no,
-            receipt.client_name,
-            receipt.date_received.strftime("%Y-%m-%d"),
-            receipt.amount_received,
-            receipt.invoice.get_status_display(),
-        ])
-    
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=receipts.xlsx'
-    wb.save(response)
-    return response
+    rows = receipt_export_rows(Receipt.objects.filter(created_by=request.user))
+    return excel_export_response("Receipts", 'receipts.xlsx', RECEIPT_EXPORT_HEADERS, rows)
+
+@login_required
+def export_csv(request):
+    rows = receipt_export_rows(Receipt.objects.filter(created_by=request.user))
+    return streaming_csv_response('receipts.csv', RECEIPT_EXPORT_HEADERS, rows)
 
 @login_required
 def export_pdf(request):
@@ -19,6 +19,7 @@ urlpatterns = [
     path('<int:pk>/update-status/', views.waybill_update_status, name='update_status'),
     # Export endpoints
     path('export/excel/', views.export_excel, name='export_excel'),
+    path('export/csv/', views.export_csv, name='export_csv'),
     path('export/pdf/', views.export_pdf, name='export_pdf'),
     
     # Template management
@@ -1,8 +1,7 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.core.paginator import Paginator
+from django.db.models import Q, Count
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.cache import cache_page
 from django.core.cache import cache
@@ -14,7 +13,6 @@ from .forms import (
     WaybillFieldTemplateForm, create_dynamic_item_form, BaseWaybillItemFormSet
 )
 import json
-import openpyxl
 from django.http import HttpResponse
 from django.template.loader import render_to_string
 # from weasyprint import HTML
@@ -22,6 +20,8 @@ from xhtml2pdf import pisa
 import os
 import urllib.parse
 from apps.core.models import CompanyProfile
+from apps.core.exports import excel_export_response, iter_values, streaming_csv_response
+from apps.core.pagination import paginate
 import base64
 
 
@@ -57,16 +57,20 @@ def waybill_list(request):
         if date_to:
             waybills = waybills.filter(waybill_date__lte=date_to)
     
-    # Pagination
-    paginator = Paginator(waybills, 25)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
     # Statistics
-    total_waybills = waybills.count()
-    pending_count = waybills.filter(status='pending').count()
-    in_transit_count = waybills.filter(status='in_transit').count()
-    delivered_count = waybills.filter(status='delivered').count()
+    counts = waybills.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        in_transit=Count('id', filter=Q(status='in_transit')),
+        delivered=Count('id', filter=Q(status='delivered')),
+    )
+    total_waybills = counts['total']
+    pending_count = counts['pending']
+    in_transit_count = counts['in_transit']
+    delivered_count = counts['delivered']
+    
+    # Pagination
+    page_obj = paginate(request, waybills, 25, ordering=['-created_at', '-id'], count=total_waybills)
     
     context = {
         'page_obj': page_obj,
@@ -1292,25 +1296,33 @@ def waybill_update_status(request, pk):
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
 
+WAYBILL_EXPORT_HEADERS = ["Waybill #", "Sender", "Receiver", "Date", "Status"]
+
+
+def waybill_export_rows(waybills):
+    """Spreadsheet rows for a waybill queryset, read in chunks without building instances"""
+    status_labels = dict(Waybill.STATUS_CHOICES)
+    fields = ('waybill_number', 'custom_data', 'waybill_date', 'status')
+    for number, custom_data, waybill_date, status in iter_values(waybills.order_by('-created_at', '-id'), fields):
+        custom_data = custom_data or {}
+        yield [
+            number,
+            custom_data.get('sender_info', {}).get('sender_name', ''),
+            custom_data.get('receiver_info', {}).get('receiver_name', ''),
+            waybill_date.strftime("%Y-%m-%d"),
+            status_labels.get(status, status),
+        ]
+
+
 @login_required
 def export_excel(request):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Waybills"
-    headers = ["Waybill #", "Sender", "Receiver", "Date", "Status"]
-    ws.append(headers)
-    for waybill in Waybill.objects.filter(user=request.user):
-        ws.append([
-            waybill.waybill_number,
-            waybill.custom_data.get('sender_info', {}).get('sender_name', ''),
-            waybill.custom_data.get('receiver_info', {}).get('receiver_name', ''),
-            waybill.waybill_date.strftime("%Y-%m-%d"),
-            waybill.get_status_display(),
-        ])
-    response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-    response['Content-Disposition'] = 'attachment; filename=waybills.xlsx'
-    wb.save(response)
-    return response
+    rows = waybill_export_rows(Waybill.objects.filter(user=request.user))
+    return excel_export_response("Waybills", 'waybills.xlsx', WAYBILL_EXPORT_HEADERS, rows)
+
+@login_required
+def export_csv(request):
+    rows = waybill_export_rows(Waybill.objects.filter(user=request.user))
+    return streaming_csv_response('waybills.csv', WAYBILL_EXPORT_HEADERS, rows)
 
 @login_required
 def export_pdf(request):
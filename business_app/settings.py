@@ -132,7 +132,7 @@ CACHES = {
         'LOCATION': 'unique-snowflake',
         'TIMEOUT': 300,  # 5 minutes
         'OPTIONS': {
-            'MAX_ENTRIES': 1000,
+            'MAX_ENTRIES': 5000,  # room for cached list row fragments
             'CULL_FREQUENCY': 3,
         },
     }
@@ -232,6 +232,51 @@ SUPPORTED_CURRENCIES = {
 FILE_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 5 * 1024 * 1024  # 5MB
 
+# Rows per transaction when importing inventory spreadsheets
+INVENTORY_IMPORT_CHUNK_SIZE = config('INVENTORY_IMPORT_CHUNK_SIZE', default=500, cast=int)
+# Most rows accepted by one call to the inventory bulk upsert API
+INVENTORY_API_BULK_MAX_ROWS = config('INVENTORY_API_BULK_MAX_ROWS', default=5000, cast=int)
+# Days of daily inventory valuation snapshots kept for trend charts
+INVENTORY_SNAPSHOT_RETENTION_DAYS = config('INVENTORY_SNAPSHOT_RETENTION_DAYS', default=400, cast=int)
+# Reorder forecasting (manage.py forecast_inventory): days of movement history used,
+# supplier lead time, safety stock in standard deviations of daily demand, and the
+# days of demand a suggested order should cover
+INVENTORY_FORECAST_WINDOW_DAYS = config('INVENTORY_FORECAST_WINDOW_DAYS', default=90, cast=int)
+INVENTORY_REORDER_LEAD_DAYS = config('INVENTORY_REORDER_LEAD_DAYS', default=7, cast=int)
+INVENTORY_REORDER_SAFETY_FACTOR = config('INVENTORY_REORDER_SAFETY_FACTOR', default=1.65, cast=float)
+INVENTORY_REORDER_COVER_DAYS = config('INVENTORY_REORDER_COVER_DAYS', default=30, cast=int)
+# Item form classes (layout columns + custom fields) kept built per process
+INVENTORY_FORM_CACHE_SIZE = config('INVENTORY_FORM_CACHE_SIZE', default=256, cast=int)
+
+# Lists with more rows than this page by keyset cursor instead of page number
+PAGINATION_KEYSET_THRESHOLD = config('PAGINATION_KEYSET_THRESHOLD', default=1000, cast=int)
+# How list totals are obtained: 'exact', 'cached' or 'estimate' (PostgreSQL planner estimate)
+PAGINATION_COUNT_MODE = config('PAGINATION_COUNT_MODE', default='cached')
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=60, cast=int)
+
+# Seconds that rendered fragments (list rows, header counts) stay cached; writes
+# invalidate them sooner by bumping the owner's cache version
+FRAGMENT_CACHE_TIMEOUT = config('FRAGMENT_CACHE_TIMEOUT', default=900, cast=int)
+
+# Rows fetched per database round trip by streaming exports
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=2000, cast=int)
+
+# Background jobs (manage.py runjobs). Off by default, so jobs run inside the request;
+# turn on only where a runjobs worker is started (see Procfile)
+JOBS_ASYNC = config('JOBS_ASYNC', default=False, cast=bool)
+JOBS_CONCURRENCY = config('JOBS_CONCURRENCY', default=2, cast=int)
+JOBS_POLL_INTERVAL = config('JOBS_POLL_INTERVAL', default=2.0, cast=float)
+# Running jobs whose heartbeat is older than this many seconds are taken over
+JOBS_STALE_TIMEOUT = config('JOBS_STALE_TIMEOUT', default=1800, cast=int)
+# Seconds between heartbeats a worker sends for each running job
+JOBS_HEARTBEAT_INTERVAL = config('JOBS_HEARTBEAT_INTERVAL', default=60, cast=int)
+JOBS_MAX_ATTEMPTS = config('JOBS_MAX_ATTEMPTS', default=2, cast=int)
+
+# Post queued invoice/receipt outbox entries in the web process, right after the
+# saving transaction commits (and on dashboard loads); the Procfile also runs
+# drain_accounting_outbox --interval as a worker
+ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS = config('ACCOUNTING_OUTBOX_DRAIN_IN_PROCESS', default=True, cast=bool)
+
 # Email settings
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = config('EMAIL_HOST', default='smtp.gmail.com')